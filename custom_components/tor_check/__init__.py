@@ -5,45 +5,60 @@ https://github.com/limych/ha-tor_check
 """
 from __future__ import annotations
 
+from datetime import timedelta
+from functools import partial
 import logging
-from ssl import SSLContext
-from types import MappingProxyType
-from typing import Any, Final
+from typing import TYPE_CHECKING, Any, Final
 
-import aiohttp
-from aiohttp.hdrs import USER_AGENT
-from aiohttp_socks import ProxyConnector
 import voluptuous as vol
 
-from homeassistant import config_entries
 from homeassistant.config_entries import SOURCE_IMPORT, ConfigEntry
-from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE, Platform
-from homeassistant.core import Event, HomeAssistant, callback
-from homeassistant.helpers.aiohttp_client import (
-    ENABLE_CLEANUP_CLOSED,
-    MAXIMUM_CONNECTIONS,
-    MAXIMUM_CONNECTIONS_PER_HOST,
-    SERVER_SOFTWARE,
-    WARN_CLOSE_MSG,
-    HassClientResponse,
-    async_get_clientsession,
+from homeassistant.const import Platform
+from homeassistant.core import (
+    CoreState,
+    HomeAssistant,
+    ServiceCall,
+    ServiceResponse,
+    SupportsResponse,
+    callback,
 )
+from homeassistant.exceptions import HomeAssistantError
 import homeassistant.helpers.config_validation as cv
-from homeassistant.helpers.frame import warn_use
-from homeassistant.helpers.json import json_dumps
-from homeassistant.loader import bind_hass
-from homeassistant.util import ssl as ssl_util
+from homeassistant.helpers.start import async_at_started
 
-from .api import TorCheckApiClient
 from .const import (
+    ATTR_ADDRESSES,
+    ATTR_INVALID,
+    ATTR_NETWORKS,
+    CONF_CIRCUIT_SAMPLES,
+    CONF_CONTROL_PASSWORD,
+    CONF_CONTROL_PORT,
+    CONF_FLEET,
+    CONF_GEOIP_DATABASES,
+    CONF_HTTP_FILTER,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_ONION_SERVICES,
     CONF_TOR_HOST,
     CONF_TOR_PORT,
+    CONF_TRANSFER_PROBE_URL,
     DEFAULT_CONFIG,
+    DEFAULT_OPTIONS,
     DOMAIN,
+    HTTP_FILTER_OFF,
+    SERVICE_DEBUG,
+    SERVICE_LOOKUP,
     STARTUP_MESSAGE,
     ConfigType,
 )
-from .coordinator import TorCheckDataUpdateCoordinator
+
+if TYPE_CHECKING:
+    from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+    from .coordinator import TorCheckDataUpdateCoordinator
+
+# Modules of networking, proxy and data sources are imported on entry setup
+# only, so loading of the integration and its config flow stays light
 
 _LOGGER: Final = logging.getLogger(__name__)
 
@@ -60,115 +75,19 @@ CONFIG_SCHEMA = vol.Schema(
                     CONF_TOR_HOST, default=DEFAULT_CONFIG[CONF_TOR_HOST]
                 ): cv.string,
                 vol.Optional(CONF_TOR_PORT, default=DEFAULT_CONFIG[CONF_TOR_PORT]): int,
+                vol.Optional(CONF_CONTROL_PORT): int,
+                vol.Optional(CONF_CONTROL_PASSWORD): cv.string,
             }
         )
     },
     extra=vol.ALLOW_EXTRA,
 )
 
-
-@callback
-def _async_get_proxy_connector(
-    hass: HomeAssistant, proxy_url: str, verify_ssl: bool = True
-) -> aiohttp.BaseConnector:
-    """Return the connector pool for aiohttp.
-
-    This method must be run in the event loop.
-    """
-    if verify_ssl:
-        ssl_context: bool | SSLContext = ssl_util.get_default_context()
-    else:
-        ssl_context = ssl_util.get_default_no_verify_context()
-
-    connector = ProxyConnector.from_url(
-        url=proxy_url,
-        rdns=True,
-        enable_cleanup_closed=ENABLE_CLEANUP_CLOSED,
-        ssl=ssl_context,
-        limit=MAXIMUM_CONNECTIONS,
-        limit_per_host=MAXIMUM_CONNECTIONS_PER_HOST,
-    )
-
-    async def _async_close_connector(event: Event) -> None:
-        """Close connector pool."""
-        await connector.close()
-
-    hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_connector)
-
-    return connector
-
-
-@callback
-def _async_register_clientsession_shutdown(
-    hass: HomeAssistant, clientsession: aiohttp.ClientSession
-) -> None:
-    """Register ClientSession close on Home Assistant shutdown or config entry unload.
-
-    This method must be run in the event loop.
-    """
-
-    @callback
-    def _async_close_websession(*_: Any) -> None:
-        """Close websession."""
-        clientsession.detach()
-
-    unsub = hass.bus.async_listen_once(
-        EVENT_HOMEASSISTANT_CLOSE, _async_close_websession
-    )
-
-    if not (config_entry := config_entries.current_entry.get()):
-        return
-
-    config_entry.async_on_unload(unsub)
-    config_entry.async_on_unload(_async_close_websession)
-
-
-@callback
-@bind_hass
-def async_create_proxy_clientsession(
-    hass: HomeAssistant,
-    proxy_url: str,
-    verify_ssl: bool = True,
-    auto_cleanup: bool = True,
-    **kwargs: Any,
-) -> aiohttp.ClientSession:
-    """Create a new ClientSession with kwargs, i.e. for cookies.
-
-    If auto_cleanup is False, you need to call detach() after the session
-    returned is no longer used. Default is True, the session will be
-    automatically detached on homeassistant_stop or when being created
-    in config entry setup, the config entry is unloaded.
-
-    This method must be run in the event loop.
-    """
-    auto_cleanup_method = None
-    if auto_cleanup:
-        auto_cleanup_method = _async_register_clientsession_shutdown
-
-    clientsession = aiohttp.ClientSession(
-        connector=_async_get_proxy_connector(hass, proxy_url, verify_ssl),
-        json_serialize=json_dumps,
-        response_class=HassClientResponse,
-        **kwargs,
-    )
-    # Prevent packages accidentally overriding our default headers
-    # It's important that we identify as Home Assistant
-    # If a package requires a different user agent, override it by passing a headers
-    # dictionary to the request method.
-    # pylint: disable-next=protected-access
-    clientsession._default_headers = MappingProxyType(  # type: ignore[assignment]
-        {USER_AGENT: SERVER_SOFTWARE},
-    )
-
-    clientsession.close = warn_use(  # type: ignore[method-assign]
-        clientsession.close,
-        WARN_CLOSE_MSG,
-    )
-
-    if auto_cleanup_method:
-        auto_cleanup_method(hass, clientsession)
-
-    return clientsession
+SERVICE_LOOKUP_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ADDRESSES): vol.All(cv.ensure_list_csv, [cv.string]),
+    }
+)
 
 
 async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
@@ -178,6 +97,57 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         _LOGGER.info(STARTUP_MESSAGE)
         hass.data[DOMAIN] = {}
 
+    async def _async_lookup(call: ServiceCall) -> ServiceResponse:
+        """Check which of IP addresses or networks are TOR exit nodes."""
+        # pylint: disable-next=import-outside-toplevel
+        from .api import TorCheckApiClientError
+
+        # pylint: disable-next=import-outside-toplevel
+        from .coordinator import async_get_exit_nodes_service
+
+        service = async_get_exit_nodes_service(hass)
+        await service.async_load()
+        try:
+            exit_nodes = await service.async_get_exit_nodes()
+        except TorCheckApiClientError as exception:
+            raise HomeAssistantError(
+                f"Can't get list of TOR exit nodes: {exception}"
+            ) from exception
+
+        response: dict[str, Any] = {ATTR_ADDRESSES: {}, ATTR_NETWORKS: {}}
+        invalid = []
+        for query, count in exit_nodes.lookup(call.data[ATTR_ADDRESSES]).items():
+            if count is None:
+                invalid.append(query)
+            elif "/" in query:
+                response[ATTR_NETWORKS][query] = count
+            else:
+                response[ATTR_ADDRESSES][query] = bool(count)
+        response[ATTR_INVALID] = invalid
+        return response
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_LOOKUP,
+        _async_lookup,
+        schema=SERVICE_LOOKUP_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+    async def _async_debug(call: ServiceCall) -> ServiceResponse:
+        """Return timings of the last refreshes and requests."""
+        # pylint: disable-next=import-outside-toplevel
+        from .diagnostics import async_get_debug_info
+
+        return async_get_debug_info(hass)
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_DEBUG,
+        _async_debug,
+        supports_response=SupportsResponse.ONLY,
+    )
+
     if DOMAIN not in config:
         return True
 
@@ -193,18 +163,75 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
 # https://developers.home-assistant.io/docs/config_entries_index/#setting-up-an-entry
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up this integration using UI."""
+    if CONF_FLEET in entry.data:
+        return await _async_setup_fleet_entry(hass, entry)
+
+    # pylint: disable=import-outside-toplevel
+    from .api import TorCheckApiClient
+    from .coordinator import TorCheckDataUpdateCoordinator, async_get_exit_nodes_service
+    from .geoip import GeoIpReader
+    from .onion import OnionServicesMonitor
+    from .proxy import (
+        async_acquire_proxy_clientsession,
+        async_get_direct_clientsession,
+        async_get_request_policy,
+        async_get_single_flight,
+        async_release_proxy_clientsession,
+    )
+    from .sampling import TorCircuitSampler
+
     proxy_url = f"socks5://{entry.data[CONF_TOR_HOST]}:{entry.data[CONF_TOR_PORT]}"
 
+    tor_session = async_acquire_proxy_clientsession(hass, proxy_url)
+    entry.async_on_unload(partial(async_release_proxy_clientsession, hass, tor_session))
+
+    options = {**DEFAULT_OPTIONS, **entry.options}
+
+    geoip = None
+    if options[CONF_GEOIP_DATABASES]:
+        geoip = await hass.async_add_executor_job(
+            GeoIpReader.open, options[CONF_GEOIP_DATABASES]
+        )
+        entry.async_on_unload(geoip.close)
+
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = coordinator = TorCheckDataUpdateCoordinator(
         hass=hass,
         client=TorCheckApiClient(
-            session=async_get_clientsession(hass),
-            tor_session=async_create_proxy_clientsession(hass, proxy_url),
+            session=async_get_direct_clientsession(hass),
+            tor_session=tor_session,
+            proxy_url=proxy_url,
+            flights=async_get_single_flight(hass),
+            policy=async_get_request_policy(hass),
+            tor_policy=async_get_request_policy(hass, proxy_url),
         ),
+        exit_nodes=async_get_exit_nodes_service(hass),
+        min_update_interval=timedelta(seconds=options[CONF_MIN_UPDATE_INTERVAL]),
+        max_update_interval=timedelta(seconds=options[CONF_MAX_UPDATE_INTERVAL]),
+        geoip=geoip,
+        circuit_sampler=TorCircuitSampler(
+            entry.data[CONF_TOR_HOST],
+            entry.data[CONF_TOR_PORT],
+            options[CONF_CIRCUIT_SAMPLES],
+        )
+        if options[CONF_CIRCUIT_SAMPLES]
+        else None,
+        onion_monitor=OnionServicesMonitor(options[CONF_ONION_SERVICES])
+        if options[CONF_ONION_SERVICES]
+        else None,
+        transfer_probe_url=options[CONF_TRANSFER_PROBE_URL] or None,
     )
-    # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
-    await coordinator.async_config_entry_first_refresh()
+    await coordinator.async_load_cache()
+    if (control_port := entry.data.get(CONF_CONTROL_PORT)) is not None:
+        await coordinator.async_connect_control(
+            entry.data[CONF_TOR_HOST],
+            control_port,
+            entry.data.get(CONF_CONTROL_PASSWORD),
+        )
+        entry.async_on_unload(coordinator.async_close_control)
+    await _async_first_refresh(hass, entry, coordinator)
+    if options[CONF_HTTP_FILTER] != HTTP_FILTER_OFF:
+        _async_setup_http_filter(hass, entry, coordinator, options[CONF_HTTP_FILTER])
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
     entry.async_on_unload(entry.add_update_listener(async_reload_entry))
@@ -212,6 +239,117 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return True
 
 
+async def _async_setup_fleet_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
+    """Set up fleet of TOR daemons checked by single coordinator."""
+    # pylint: disable=import-outside-toplevel
+    from .api import TorCheckApiClient
+    from .coordinator import async_get_exit_nodes_service
+    from .fleet import TorFleetDataUpdateCoordinator, format_endpoint, parse_endpoints
+    from .proxy import (
+        async_acquire_proxy_clientsession,
+        async_get_direct_clientsession,
+        async_get_request_policy,
+        async_get_single_flight,
+        async_release_proxy_clientsession,
+    )
+
+    options = {**DEFAULT_OPTIONS, **entry.options}
+    session = async_get_direct_clientsession(hass)
+    flights = async_get_single_flight(hass)
+    policy = async_get_request_policy(hass)
+    clients = {}
+    for host, port in parse_endpoints(entry.data[CONF_FLEET]):
+        endpoint = format_endpoint(host, port)
+        proxy_url = f"socks5://{endpoint}"
+        tor_session = async_acquire_proxy_clientsession(hass, proxy_url)
+        entry.async_on_unload(
+            partial(async_release_proxy_clientsession, hass, tor_session)
+        )
+        clients[endpoint] = TorCheckApiClient(
+            session=session,
+            tor_session=tor_session,
+            proxy_url=proxy_url,
+            flights=flights,
+            policy=policy,
+            tor_policy=async_get_request_policy(hass, proxy_url),
+        )
+
+    hass.data.setdefault(DOMAIN, {})
+    hass.data[DOMAIN][entry.entry_id] = coordinator = TorFleetDataUpdateCoordinator(
+        hass=hass,
+        clients=clients,
+        exit_nodes=async_get_exit_nodes_service(hass),
+        min_update_interval=timedelta(seconds=options[CONF_MIN_UPDATE_INTERVAL]),
+        max_update_interval=timedelta(seconds=options[CONF_MAX_UPDATE_INTERVAL]),
+    )
+    await coordinator.exit_nodes.async_load()
+    await _async_first_refresh(hass, entry, coordinator)
+
+    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(async_reload_entry))
+
+    return True
+
+
+async def _async_first_refresh(
+    hass: HomeAssistant, entry: ConfigEntry, coordinator: DataUpdateCoordinator
+) -> None:
+    """Refresh coordinator data, in background if Home Assistant is starting."""
+    if hass.state is CoreState.running:
+        # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
+        await coordinator.async_config_entry_first_refresh()
+        return
+
+    # Slow TOR probes must not delay Home Assistant startup, so entities
+    # start with restored state and are updated once probes complete
+
+    async def _async_refresh(_hass: HomeAssistant) -> None:
+        """Refresh data in background after Home Assistant is started."""
+        await coordinator.async_refresh()
+
+    entry.async_on_unload(async_at_started(hass, _async_refresh))
+
+
+@callback
+def _async_setup_http_filter(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    coordinator: TorCheckDataUpdateCoordinator,
+    action: str,
+) -> None:
+    """Filter HTTP requests from TOR exit nodes known to coordinator."""
+    # pylint: disable=import-outside-toplevel
+    from .coordinator import KEY_TOR_EXIT_NODES
+    from .middleware import async_get_http_filter
+
+    if (http_filter := async_get_http_filter(hass)) is None:
+        _LOGGER.warning(
+            "Filtering of HTTP requests from TOR exit nodes will start"
+            " after Home Assistant restart"
+        )
+        return
+
+    http_filter.action = action
+    http_filter.owner = entry.entry_id
+
+    @callback
+    def _async_update_exit_nodes() -> None:
+        """Pass fresh exit nodes index to the filter."""
+        if (exit_nodes := (coordinator.data or {}).get(KEY_TOR_EXIT_NODES)) is not None:
+            http_filter.set_exit_nodes(exit_nodes)
+
+    @callback
+    def _async_stop() -> None:
+        """Stop filtering on entry unload."""
+        if http_filter.owner == entry.entry_id:
+            http_filter.action = HTTP_FILTER_OFF
+            http_filter.owner = None
+
+    _async_update_exit_nodes()
+    entry.async_on_unload(coordinator.async_add_listener(_async_update_exit_nodes))
+    entry.async_on_unload(_async_stop)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Handle removal of an entry."""
     if unloaded := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
@@ -219,7 +357,14 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     return unloaded
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove persistent data of an entry."""
+    # pylint: disable-next=import-outside-toplevel
+    from .coordinator import async_remove_entry_cache
+
+    await async_remove_entry_cache(hass, entry.entry_id)
+
+
 async def async_reload_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload config entry."""
-    await async_unload_entry(hass, entry)
-    await async_setup_entry(hass, entry)
+    await hass.config_entries.async_reload(entry.entry_id)
@@ -2,15 +2,83 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Awaitable, Callable, Hashable, Sequence
+from dataclasses import dataclass, field
+from functools import partial
+from http import HTTPStatus
+import ipaddress
+import json
+import logging
+import random
 import socket
+import time
+from typing import Any, Final, TypeVar
+from urllib.parse import urlsplit
 
 import aiohttp
+from aiohttp.hdrs import ETAG, IF_MODIFIED_SINCE, IF_NONE_MATCH, LAST_MODIFIED
 import async_timeout
 import python_socks
 
+from .exit_nodes import TorExitNodes, TorExitNodesBuilder
+from .stats import RollingStats
+from .tracing import RequestTimings
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+_T = TypeVar("_T")
+
 TOR_CHECK_URL = "https://check.torproject.org/cgi-bin/TorBulkExitList.py?ip=1.1.1.1"
 IPIFY_API_URL = "https://api.ipify.org"
 
+# Seconds to wait for answer of IP echo provider before asking the next one
+HEDGE_DELAY_DEFAULT: Final = 1.0
+HEDGE_DELAY_MIN: Final = 0.05
+HEDGE_DELAY_MAX: Final = 5.0
+# Percentile of provider latency used as hedge delay
+HEDGE_PERCENTILE: Final = 95
+# Number of latency samples needed to trust their percentiles
+HEDGE_MIN_SAMPLES: Final = 5
+
+# Seconds to keep result of finished request for reuse by callers allowing it
+SINGLE_FLIGHT_FRESHNESS: Final = 30.0
+
+# Seconds to wait for answer to request
+REQUEST_TIMEOUT: Final = 10.0
+# Seconds to wait for document downloaded to measure transfer speed
+TRANSFER_TIMEOUT: Final = 30.0
+# Timeouts of endpoints which are slower than usual
+ENDPOINT_TIMEOUTS: Final = {
+    # Large document
+    TOR_CHECK_URL: 30.0,
+}
+
+# Number of failures in a row to stop sending requests for a while
+BREAKER_FAILURES: Final = 3
+# Seconds to wait before trying again, doubled after every next failed try
+BREAKER_RESET_MIN: Final = 30.0
+BREAKER_RESET_MAX: Final = 600.0
+
+# Maximum number of retries of single request failed to connect to proxy
+RETRY_ATTEMPTS: Final = 2
+# Retries earned by every request and maximum of retries saved for later, so
+# retries can't multiply load on failing proxy
+RETRY_BUDGET_RATIO: Final = 0.2
+RETRY_BUDGET_MAX: Final = 5.0
+# Seconds of backoff before the first retry, doubled for every next one, and
+# maximum of it. Actual delay is random between zero and backoff.
+RETRY_BACKOFF_MIN: Final = 0.5
+RETRY_BACKOFF_MAX: Final = 4.0
+
+# Maximum size of exit nodes list response body, in bytes
+EXIT_NODES_MAX_SIZE: Final = 2 * 1024 * 1024
+
+# Response validators and request headers to send them back for conditional GET
+_VALIDATORS: Final = {
+    ETAG: IF_NONE_MATCH,
+    LAST_MODIFIED: IF_MODIFIED_SINCE,
+}
+
 
 class TorCheckApiClientError(Exception):
     """Exception to indicate a general API error."""
@@ -24,27 +92,336 @@ class TorCheckApiClientAuthenticationError(TorCheckApiClientError):
     """Exception to indicate an authentication error."""
 
 
-async def _async_get_data(session: aiohttp.ClientSession, url: str) -> any:
-    """Fetch data from remote server."""
-    try:
-        async with async_timeout.timeout(10):
-            response = await session.request(
-                method="GET",
-                url=url,
+class TorCheckApiClientProxyError(TorCheckApiClientCommunicationError):
+    """Exception to indicate an error of connection to proxy."""
+
+
+class TorCheckApiClientCircuitOpenError(TorCheckApiClientCommunicationError):
+    """Exception to indicate requests are suspended after many failures."""
+
+
+class SingleFlight:
+    """Deduplicate concurrent identical requests.
+
+    Callers of the same key await one in-flight request instead of sending
+    their own. Successful result is kept for a short time, so a caller which
+    allows it can reuse the result of request that has just finished, e.g.
+    config entry setup right after validation of the config flow.
+    """
+
+    def __init__(self, freshness: float = SINGLE_FLIGHT_FRESHNESS) -> None:
+        """Initialize."""
+        self._freshness = freshness
+        self._inflight: dict[Hashable, asyncio.Task] = {}
+        self._results: dict[Hashable, tuple[float, Any]] = {}
+
+    async def async_do(
+        self,
+        key: Hashable,
+        request: Callable[[], Awaitable[_T]],
+        max_age: float = 0,
+    ) -> _T:
+        """Return result of request, shared with concurrent callers of same key.
+
+        If max_age is given, result of request finished within that many
+        seconds (but not more than freshness window) is returned without
+        sending a new request.
+        """
+        if max_age > 0 and (cached := self._results.get(key)) is not None:
+            finished, result = cached
+            if time.monotonic() - finished <= min(max_age, self._freshness):
+                return result
+
+        if (task := self._inflight.get(key)) is None:
+            task = self._inflight[key] = asyncio.create_task(
+                self._async_run(key, request)
             )
+            # Don't warn about error nobody waited for if all callers cancelled
+            task.add_done_callback(lambda done: done.cancelled() or done.exception())
+        # Cancelled caller must not cancel request of others
+        return await asyncio.shield(task)
+
+    async def _async_run(
+        self, key: Hashable, request: Callable[[], Awaitable[_T]]
+    ) -> _T:
+        """Send request and remember its result."""
+        try:
+            result = await request()
+        finally:
+            del self._inflight[key]
+        now = time.monotonic()
+        self._results = {
+            item: cached
+            for item, cached in self._results.items()
+            if now - cached[0] <= self._freshness
+        }
+        self._results[key] = (now, result)
+        return result
+
+
+class CircuitBreaker:
+    """Stop sending requests which are likely to fail.
+
+    After several failures in a row the circuit opens and requests fail
+    immediately. When reset timeout passes, a single request is let through
+    as a probe: its success closes the circuit, its failure opens it again
+    for twice longer time.
+    """
+
+    def __init__(
+        self,
+        failures: int = BREAKER_FAILURES,
+        reset_min: float = BREAKER_RESET_MIN,
+        reset_max: float = BREAKER_RESET_MAX,
+    ) -> None:
+        """Initialize."""
+        self._max_failures = failures
+        self._reset_min = reset_min
+        self._reset_max = reset_max
+        self.failures = 0
+        self._reset_timeout = reset_min
+        # Monotonic time the circuit is open until, None if it is closed
+        self.open_until: float | None = None
+        self._probing = False
+
+    def acquire(self) -> None:
+        """Allow request or raise error if circuit is open.
+
+        Every allowed request must be followed by release().
+        """
+        if self.open_until is None:
+            return
+        if self._probing or time.monotonic() < self.open_until:
+            raise TorCheckApiClientCircuitOpenError(
+                "Requests are suspended after repeated failures"
+            )
+        self._probing = True
+
+    def release(self, success: bool | None) -> None:
+        """Account result of allowed request, None if it was interrupted."""
+        probe, self._probing = self._probing, False
+        if success is None:
+            return
+        if success:
+            self.failures = 0
+            self._reset_timeout = self._reset_min
+            self.open_until = None
+            return
+        self.failures += 1
+        if probe:
+            self._reset_timeout = min(self._reset_timeout * 2, self._reset_max)
+        if probe or self.failures >= self._max_failures:
+            self.open_until = time.monotonic() + self._reset_timeout
+
+
+class RetryBudget:
+    """Limit of retries proportional to number of requests."""
+
+    def __init__(
+        self, ratio: float = RETRY_BUDGET_RATIO, maximum: float = RETRY_BUDGET_MAX
+    ) -> None:
+        """Initialize."""
+        self._ratio = ratio
+        self._maximum = maximum
+        self.balance = maximum
+
+    def deposit(self) -> None:
+        """Earn part of retry by request."""
+        self.balance = min(self.balance + self._ratio, self._maximum)
+
+    def withdraw(self) -> bool:
+        """Spend retry, return false if there is not enough budget for it."""
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+class RequestPolicy:
+    """Timeouts, retries and circuit breakers of requests through one session.
+
+    Failures to talk to proxy trip the breaker of session as a whole, other
+    communication errors trip the breaker of endpoint (host) only. Requests
+    failed to connect to proxy are retried with jittered exponential backoff.
+    """
+
+    def __init__(
+        self,
+        timeouts: dict[str, float] | None = None,
+        *,
+        attempts: int = RETRY_ATTEMPTS,
+        backoff_min: float = RETRY_BACKOFF_MIN,
+        backoff_max: float = RETRY_BACKOFF_MAX,
+        breaker_factory: Callable[[], CircuitBreaker] = CircuitBreaker,
+    ) -> None:
+        """Initialize.
+
+        Timeouts are seconds to wait for answer by URL, REQUEST_TIMEOUT for
+        the others.
+        """
+        self._timeouts = ENDPOINT_TIMEOUTS if timeouts is None else timeouts
+        self._attempts = attempts
+        self._backoff_min = backoff_min
+        self._backoff_max = backoff_max
+        self._breaker_factory = breaker_factory
+        self.budget = RetryBudget()
+        self.breaker = breaker_factory()
+        self.endpoint_breakers: dict[str, CircuitBreaker] = {}
+
+    async def async_request(
+        self,
+        url: str,
+        request: Callable[[float], Awaitable[_T]],
+        timeout: float = REQUEST_TIMEOUT,
+    ) -> _T:
+        """Send request with timeout, retrying it if it is worth it.
+
+        Timeout is used unless policy has its own one for URL.
+        """
+        host = urlsplit(url).netloc
+        if (endpoint := self.endpoint_breakers.get(host)) is None:
+            endpoint = self.endpoint_breakers[host] = self._breaker_factory()
+        timeout = self._timeouts.get(url, timeout)
+
+        self.breaker.acquire()
+        try:
+            endpoint.acquire()
+        except TorCheckApiClientError:
+            self.breaker.release(None)
+            raise
+
+        self.budget.deposit()
+        attempt = 0
+        session_ok: bool | None = None
+        endpoint_ok: bool | None = None
+        try:
+            while True:
+                try:
+                    result = await request(timeout)
+                except TorCheckApiClientProxyError as exception:
+                    if attempt >= self._attempts or not self.budget.withdraw():
+                        session_ok = False
+                        raise
+                    backoff = min(self._backoff_min * 2**attempt, self._backoff_max)
+                    attempt += 1
+                    _LOGGER.debug("Retrying %s: %s", url, exception)
+                    await asyncio.sleep(random.uniform(0, backoff))
+                    continue
+                except TorCheckApiClientCommunicationError:
+                    session_ok, endpoint_ok = True, False
+                    raise
+                except TorCheckApiClientError:
+                    # Endpoint answered, even though not as expected
+                    session_ok = endpoint_ok = True
+                    raise
+                session_ok = endpoint_ok = True
+                return result
+        finally:
+            self.breaker.release(session_ok)
+            endpoint.release(endpoint_ok)
+
+
+async def _async_get_data(
+    session: aiohttp.ClientSession,
+    url: str,
+    validators: dict[str, str] | None = None,
+    parser: Callable[[aiohttp.StreamReader], Awaitable[_T]] | None = None,
+    policy: RequestPolicy | None = None,
+) -> any:
+    """Fetch data from remote server.
+
+    If validators are passed, request is conditional and validators are updated
+    from response. In this case None is returned when data was not modified.
+
+    If parser is passed, it is used to read response body from the stream
+    instead of returning it as text.
+
+    If policy is passed, it sets timeout and retries of request and suspends
+    requests to failing proxy or endpoint.
+
+    Phase timings of request are collected if session is traced.
+    """
+    request = partial(_async_timed_request, session, url, validators, parser)
+    if policy is None:
+        return await request(REQUEST_TIMEOUT)
+    return await policy.async_request(url, request)
+
+
+async def _async_timed_request(
+    session: aiohttp.ClientSession,
+    url: str,
+    validators: dict[str, str] | None,
+    parser: Callable[[aiohttp.StreamReader], Awaitable[_T]] | None,
+    timeout: float,
+) -> any:
+    """Send single request and collect its timings."""
+    timings = RequestTimings(url)
+    try:
+        data = await _async_request(session, url, validators, parser, timeout, timings)
+    except TorCheckApiClientError as exception:
+        timings.finish(exception)
+        raise
+    timings.finish()
+    return data
+
+
+async def _async_request(
+    session: aiohttp.ClientSession,
+    url: str,
+    validators: dict[str, str] | None,
+    parser: Callable[[aiohttp.StreamReader], Awaitable[_T]] | None,
+    timeout: float,
+    timings: RequestTimings,
+) -> any:
+    """Send GET request and convert its errors to API errors."""
+    headers = {
+        header: validators[key]
+        for key, header in _VALIDATORS.items()
+        if validators and key in validators
+    }
+    try:
+        async with async_timeout.timeout(timeout), session.request(
+            method="GET",
+            url=url,
+            headers=headers,
+            trace_request_ctx=timings,
+        ) as response:
+            # Leaving the context releases connection on every exit path,
+            # connection with unread body is closed instead of reused
             if response.status in (401, 403):
                 raise TorCheckApiClientAuthenticationError("Invalid credentials")
+            if headers and response.status == HTTPStatus.NOT_MODIFIED:
+                return None
             response.raise_for_status()
+            if validators is not None:
+                validators.clear()
+                validators.update(
+                    (key, response.headers[key])
+                    for key in _VALIDATORS
+                    if key in response.headers
+                )
+            if parser is not None:
+                return await parser(response.content)
             return await response.text()
 
+    except TorCheckApiClientError:
+        raise
     except asyncio.TimeoutError as exception:
         raise TorCheckApiClientCommunicationError(
             "Timeout error fetching information",
         ) from exception
+    except (
+        python_socks.ProxyConnectionError,
+        python_socks.ProxyTimeoutError,
+    ) as exception:
+        raise TorCheckApiClientProxyError(
+            f"Error connecting to proxy: {exception}",
+        ) from exception
     except (
         aiohttp.ClientError,
         socket.gaierror,
-        python_socks.ProxyConnectionError,
+        # Proxy failed to connect to server
+        python_socks.ProxyError,
     ) as exception:
         raise TorCheckApiClientCommunicationError(
             "Error fetching information",
@@ -53,6 +430,256 @@ async def _async_get_data(session: aiohttp.ClientSession, url: str) -> any:
         raise TorCheckApiClientError("Something really wrong happened!") from exception
 
 
+async def _async_parse_exit_nodes(content: aiohttp.StreamReader) -> TorExitNodes:
+    """Parse exit nodes list line by line from response stream."""
+    builder = TorExitNodesBuilder()
+    size = 0
+    async for line in content:
+        if (size := size + len(line)) > EXIT_NODES_MAX_SIZE:
+            raise TorCheckApiClientError("Exit nodes list is too large")
+        builder.add(line)
+    return builder.build()
+
+
+@dataclass(frozen=True)
+class TransferTimings:
+    """Timings of single HTTP transfer."""
+
+    # Seconds from sending request to receiving response headers
+    ttfb: float
+    # Bytes of response body per second
+    throughput: float
+
+
+async def _async_measure_transfer(
+    session: aiohttp.ClientSession, url: str, policy: RequestPolicy | None = None
+) -> TransferTimings:
+    """Download document and measure transfer timings."""
+
+    async def _async_measure(timeout: float) -> TransferTimings:
+        # Every retry is measured from its own start
+        start = time.monotonic()
+
+        async def _parser(content: aiohttp.StreamReader) -> TransferTimings:
+            ttfb = time.monotonic() - start
+            size = 0
+            async for chunk in content.iter_any():
+                size += len(chunk)
+            duration = max(time.monotonic() - start - ttfb, 1e-6)
+            return TransferTimings(ttfb, size / duration)
+
+        return await _async_timed_request(session, url, None, _parser, timeout)
+
+    if policy is None:
+        return await _async_measure(TRANSFER_TIMEOUT)
+    return await policy.async_request(url, _async_measure, TRANSFER_TIMEOUT)
+
+
+async def _async_probe_url(
+    session: aiohttp.ClientSession, url: str, timeout: float
+) -> float:
+    """Return seconds to get any HTTP answer from URL."""
+    start = time.monotonic()
+    try:
+        async with async_timeout.timeout(timeout), session.get(
+            url, allow_redirects=False
+        ):
+            return time.monotonic() - start
+
+    except asyncio.TimeoutError as exception:
+        raise TorCheckApiClientCommunicationError(
+            "Timeout waiting for answer",
+        ) from exception
+    except (
+        aiohttp.ClientError,
+        socket.gaierror,
+        python_socks.ProxyError,
+        python_socks.ProxyConnectionError,
+        python_socks.ProxyTimeoutError,
+    ) as exception:
+        raise TorCheckApiClientCommunicationError(
+            f"Error connecting: {exception}",
+        ) from exception
+
+
+class TorExitNodesApiClient:
+    """TOR exit nodes list API Client."""
+
+    def __init__(
+        self, session: aiohttp.ClientSession, policy: RequestPolicy | None = None
+    ) -> None:
+        """Initialize."""
+        self._session = session
+        self._policy = policy
+        self._exit_nodes: TorExitNodes | None = None
+        self._exit_nodes_validators: dict[str, str] = {}
+
+    async def async_get_tor_exit_nodes(self) -> TorExitNodes:
+        """Get list of exit nodes from the TOR.
+
+        List is revalidated with conditional GET and parsed only if changed.
+        """
+        if self._exit_nodes is None:
+            self._exit_nodes_validators.clear()
+        data = await _async_get_data(
+            self._session,
+            TOR_CHECK_URL,
+            self._exit_nodes_validators,
+            _async_parse_exit_nodes,
+            self._policy,
+        )
+        if data is not None:
+            self._exit_nodes = data
+        return self._exit_nodes
+
+
+@dataclass(frozen=True)
+class IpEchoProvider:
+    """Service which answers with IP address the request came from."""
+
+    name: str
+    url: str
+    parse: Callable[[str], str] = str.strip
+
+
+def _parse_tor_check_ip(text: str) -> str:
+    """Return IP address from TOR Project check API answer."""
+    return json.loads(text)["IP"]
+
+
+IP_ECHO_PROVIDERS: Final = (
+    IpEchoProvider("ipify", IPIFY_API_URL),
+    IpEchoProvider(
+        "torproject", "https://check.torproject.org/api/ip", _parse_tor_check_ip
+    ),
+    IpEchoProvider("icanhazip", "https://icanhazip.com"),
+    IpEchoProvider("amazonaws", "https://checkip.amazonaws.com"),
+)
+
+
+@dataclass
+class IpEchoProviderHealth:
+    """Observed health of IP echo provider."""
+
+    latencies: RollingStats = field(default_factory=lambda: RollingStats(32))
+    # Number of failures since the last successful answer
+    failures: int = 0
+
+    @property
+    def score(self) -> float:
+        """Return score of provider, the lower the better.
+
+        Score is typical latency of provider doubled for every recent failure,
+        so persistently slow or failing providers are asked last.
+        """
+        latency = self.latencies.percentile(50)
+        if latency is None:
+            latency = HEDGE_DELAY_DEFAULT
+        return latency * 2 ** min(self.failures, 10)
+
+    def add_censored(self, elapsed: float) -> None:
+        """Account request cancelled after elapsed seconds without answer.
+
+        Provider would have answered later than that, so it is a sample only if
+        it is longer than typical latency. Otherwise provider which was asked
+        just before another one answered would look the fastest.
+        """
+        latency = self.latencies.percentile(50)
+        if elapsed > (HEDGE_DELAY_DEFAULT if latency is None else latency):
+            self.latencies.add(elapsed)
+
+    @property
+    def hedge_delay(self) -> float:
+        """Return seconds to wait for answer before asking another provider."""
+        if len(self.latencies) < HEDGE_MIN_SAMPLES:
+            return HEDGE_DELAY_DEFAULT
+        return min(
+            max(self.latencies.percentile(HEDGE_PERCENTILE), HEDGE_DELAY_MIN),
+            HEDGE_DELAY_MAX,
+        )
+
+
+class HedgedIpEcho:
+    """Get own IP address from the fastest of several IP echo providers.
+
+    Providers are asked in order of their health score. If the answer does not
+    come within usual latency of provider, the next provider is asked too.
+    The first valid answer wins and other requests are cancelled.
+    """
+
+    def __init__(
+        self,
+        session: aiohttp.ClientSession,
+        providers: Sequence[IpEchoProvider] = IP_ECHO_PROVIDERS,
+        policy: RequestPolicy | None = None,
+    ) -> None:
+        """Initialize."""
+        self._session = session
+        self._providers = providers
+        self._policy = policy
+        self.health: dict[str, IpEchoProviderHealth] = {
+            provider.name: IpEchoProviderHealth() for provider in providers
+        }
+
+    async def _async_request(self, provider: IpEchoProvider) -> str:
+        """Get IP address from provider."""
+        text = await _async_get_data(self._session, provider.url, policy=self._policy)
+        try:
+            return str(ipaddress.ip_address(provider.parse(text)))
+        except (KeyError, TypeError, ValueError) as exception:
+            raise TorCheckApiClientError(
+                f"Invalid answer of {provider.name}"
+            ) from exception
+
+    async def async_get_ip(self) -> str:
+        """Get own IP address."""
+        queue = iter(
+            sorted(self._providers, key=lambda item: self.health[item.name].score)
+        )
+        pending: dict[asyncio.Task, tuple[IpEchoProvider, float]] = {}
+        last: IpEchoProvider | None = None
+        error: TorCheckApiClientError | None = None
+
+        def _ask_next() -> None:
+            nonlocal last
+            if (provider := next(queue, None)) is not None:
+                task = asyncio.create_task(self._async_request(provider))
+                pending[task] = (provider, time.monotonic())
+                last = provider
+
+        _ask_next()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending,
+                    timeout=self.health[last.name].hedge_delay,
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+                ip_address: str | None = None
+                # Results of all finished requests are accounted, not only winner
+                for task in done:
+                    provider, start = pending.pop(task)
+                    health = self.health[provider.name]
+                    try:
+                        result = task.result()
+                    except TorCheckApiClientError as exception:
+                        health.failures += 1
+                        error = exception
+                        continue
+                    health.latencies.add(time.monotonic() - start)
+                    health.failures = 0
+                    ip_address = ip_address or result
+                if ip_address is not None:
+                    return ip_address
+                _ask_next()
+        finally:
+            for task, (provider, start) in pending.items():
+                task.cancel()
+                self.health[provider.name].add_censored(time.monotonic() - start)
+
+        raise error or TorCheckApiClientError("No IP echo providers")
+
+
 class TorCheckApiClient:
     """TOR API Client."""
 
@@ -60,19 +687,55 @@ class TorCheckApiClient:
         self,
         session: aiohttp.ClientSession,
         tor_session: aiohttp.ClientSession,
+        providers: Sequence[IpEchoProvider] = IP_ECHO_PROVIDERS,
+        *,
+        proxy_url: str | None = None,
+        flights: SingleFlight | None = None,
+        policy: RequestPolicy | None = None,
+        tor_policy: RequestPolicy | None = None,
     ) -> None:
-        """Sample API Client."""
+        """Sample API Client.
+
+        Clients of the same proxy URL sharing single-flight layer don't send
+        identical requests to the TOR at once. Clients of the same session
+        should share its request policy too.
+        """
         self._session = session
         self._tor_session = tor_session
+        self._proxy_url = proxy_url
+        self._flights = flights or SingleFlight()
+        self._policy = policy or RequestPolicy()
+        self._tor_policy = tor_policy or RequestPolicy()
+        # Latencies differ a lot through TOR, so health is tracked separately
+        self.ip_echo = HedgedIpEcho(session, providers, self._policy)
+        self.tor_ip_echo = HedgedIpEcho(tor_session, providers, self._tor_policy)
+
+    async def async_get_my_tor_ip(self, max_age: float = 0) -> str:
+        """Get my current IP from the TOR.
+
+        Result of the same request finished within max_age seconds is reused.
+        """
+        return await self._flights.async_do(
+            (self._proxy_url, "my_tor_ip"), self.tor_ip_echo.async_get_ip, max_age
+        )
+
+    async def async_get_my_ip(self, max_age: float = 0) -> str:
+        """Get my current real IP.
+
+        Result of the same request finished within max_age seconds is reused.
+        """
+        return await self._flights.async_do(
+            (None, "my_ip"), self.ip_echo.async_get_ip, max_age
+        )
 
-    async def async_get_tor_exit_nodes(self) -> list[str]:
-        """Get list of exit nodes from the TOR."""
-        return (await _async_get_data(self._session, TOR_CHECK_URL)).split()
+    async def async_probe_tor_url(self, url: str, timeout: float) -> float:
+        """Return seconds to get answer from URL through the TOR."""
+        return await _async_probe_url(self._tor_session, url, timeout)
 
-    async def async_get_my_tor_ip(self) -> str:
-        """Get my current IP from the TOR."""
-        return await _async_get_data(self._tor_session, IPIFY_API_URL)
+    async def async_measure_tor_transfer(self, url: str) -> TransferTimings:
+        """Measure transfer timings of document through the TOR."""
+        return await _async_measure_transfer(self._tor_session, url, self._tor_policy)
 
-    async def async_get_my_ip(self) -> str:
-        """Get my current real IP."""
-        return await _async_get_data(self._session, IPIFY_API_URL)
+    async def async_measure_transfer(self, url: str) -> TransferTimings:
+        """Measure transfer timings of document by direct connection."""
+        return await _async_measure_transfer(self._session, url, self._policy)
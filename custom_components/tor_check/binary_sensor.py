@@ -3,21 +3,26 @@ from __future__ import annotations
 
 from collections.abc import Mapping
 from typing import Any
+from urllib.parse import urlparse
 
 from homeassistant.components.binary_sensor import (
     BinarySensorDeviceClass,
     BinarySensorEntity,
     BinarySensorEntityDescription,
 )
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.helpers.restore_state import RestoreEntity
 
-from .const import ATTR_REAL_IP, ATTR_TOR_IP, DOMAIN
+from .const import ATTR_ERROR, ATTR_LATENCY, ATTR_REAL_IP, ATTR_TOR_IP, ATTR_URL, DOMAIN
 from .coordinator import (
     KEY_MY_IP,
     KEY_MY_TOR_IP,
+    KEY_ONION_SERVICES,
     KEY_TOR_CONNECTED,
     TorCheckDataUpdateCoordinator,
 )
-from .entity import TorCheckEntity
+from .entity import TorCheckDaemonEntity, TorCheckEntity
+from .fleet import TorFleetDataUpdateCoordinator
 
 ENTITY_DESCRIPTIONS = (
     BinarySensorEntityDescription(
@@ -31,6 +36,13 @@ ENTITY_DESCRIPTIONS = (
 async def async_setup_entry(hass, entry, async_add_devices):
     """Set up the binary_sensor platform."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    if isinstance(coordinator, TorFleetDataUpdateCoordinator):
+        async_add_devices(
+            TorCheckDaemonBinarySensor(coordinator=coordinator, daemon=daemon)
+            for daemon in coordinator.clients
+        )
+        return
+
     async_add_devices(
         TorCheckBinarySensor(
             coordinator=coordinator,
@@ -38,10 +50,22 @@ async def async_setup_entry(hass, entry, async_add_devices):
         )
         for entity_description in ENTITY_DESCRIPTIONS
     )
+    if coordinator.onion_monitor is not None:
+        async_add_devices(
+            TorCheckOnionBinarySensor(coordinator=coordinator, url=url)
+            for url in coordinator.onion_monitor.services
+        )
+
 
+class TorCheckBinarySensor(TorCheckEntity, BinarySensorEntity, RestoreEntity):
+    """TOR Check binary sensor class.
 
-class TorCheckBinarySensor(TorCheckEntity, BinarySensorEntity):
-    """TOR Check binary sensor class."""
+    Until the first refresh completes, state is restored from the last run.
+    """
+
+    _data_keys = (KEY_TOR_CONNECTED, KEY_MY_IP, KEY_MY_TOR_IP)
+    # IP addresses have their own sensors
+    _unrecorded_attributes = frozenset({ATTR_REAL_IP, ATTR_TOR_IP})
 
     def __init__(
         self,
@@ -51,18 +75,99 @@ class TorCheckBinarySensor(TorCheckEntity, BinarySensorEntity):
         """Initialize the binary_sensor class."""
         super().__init__(coordinator)
         self.entity_description = entity_description
+        self._restored_is_on: bool | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Restore last known state."""
+        await super().async_added_to_hass()
+        if (
+            self.coordinator.data is None
+            and (last_state := await self.async_get_last_state()) is not None
+            and last_state.state in (STATE_ON, STATE_OFF)
+        ):
+            self._restored_is_on = last_state.state == STATE_ON
 
     @property
     def is_on(self) -> bool:
         """Return true if the binary_sensor is on."""
-        return self.coordinator.data.get(KEY_TOR_CONNECTED)
+        if self.coordinator.data is None:
+            return self._restored_is_on
+        return self._data.get(KEY_TOR_CONNECTED)
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
         """Return entity specific state attributes."""
         attrs = {
-            ATTR_REAL_IP: self.coordinator.data.get(KEY_MY_IP),
-            ATTR_TOR_IP: self.coordinator.data.get(KEY_MY_TOR_IP),
+            ATTR_REAL_IP: self._data.get(KEY_MY_IP),
+            ATTR_TOR_IP: self._data.get(KEY_MY_TOR_IP),
         }
         attrs.update(super().extra_state_attributes or {})
         return attrs
+
+
+class TorCheckOnionBinarySensor(TorCheckEntity, BinarySensorEntity):
+    """TOR Check onion service reachability binary sensor class."""
+
+    _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
+    _attr_icon = "mdi:web"
+    _unrecorded_attributes = frozenset({ATTR_LATENCY})
+
+    def __init__(self, coordinator: TorCheckDataUpdateCoordinator, url: str) -> None:
+        """Initialize the binary_sensor class."""
+        super().__init__(coordinator)
+        self._url = url
+        self._attr_unique_id = f"{self._attr_unique_id}_onion_{url}"
+        self._attr_name = f"Onion {urlparse(url).hostname}"
+
+    def _get_fingerprint(self) -> Any:
+        """Return reachability of the onion service.
+
+        Latency alone differs on every probe, so it is not written on its own.
+        """
+        if (state := (self._data.get(KEY_ONION_SERVICES) or {}).get(self._url)) is None:
+            return (self.available, None, None)
+        return (self.available, state.reachable, state.error)
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return true if the onion service is reachable."""
+        if (services := self._data.get(KEY_ONION_SERVICES)) is None:
+            return None
+        return services[self._url].reachable
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return entity specific state attributes."""
+        state = (self._data.get(KEY_ONION_SERVICES) or {}).get(self._url)
+        return {
+            ATTR_URL: self._url,
+            ATTR_LATENCY: None
+            if state is None or state.latency is None
+            else round(state.latency, 3),
+            ATTR_ERROR: None if state is None else state.error,
+        }
+
+
+class TorCheckDaemonBinarySensor(TorCheckDaemonEntity, BinarySensorEntity):
+    """TOR Check binary sensor of connection of one TOR daemon of fleet."""
+
+    _attr_device_class = BinarySensorDeviceClass.CONNECTIVITY
+    _data_keys = (KEY_TOR_CONNECTED, KEY_MY_TOR_IP)
+    # TOR IP has its own sensor
+    _unrecorded_attributes = frozenset({ATTR_TOR_IP})
+
+    def __init__(self, coordinator: TorFleetDataUpdateCoordinator, daemon: str) -> None:
+        """Initialize the binary_sensor class."""
+        super().__init__(coordinator, daemon)
+        self._attr_unique_id = f"{self._attr_unique_id}_{daemon}"
+        self._attr_name = f"TOR {daemon}"
+
+    @property
+    def is_on(self) -> bool | None:
+        """Return true if the daemon is connected to TOR network."""
+        return self._data.get(KEY_TOR_CONNECTED)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return entity specific state attributes."""
+        return {ATTR_TOR_IP: self._data.get(KEY_MY_TOR_IP)}
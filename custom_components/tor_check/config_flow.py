@@ -2,30 +2,44 @@
 from __future__ import annotations
 
 from typing import Final, Optional
+from urllib.parse import urlsplit
 
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.helpers.aiohttp_client import async_create_clientsession
+from homeassistant.core import callback
 from homeassistant.helpers.selector import (
     NumberSelector,
     NumberSelectorConfig,
     NumberSelectorMode,
+    SelectSelector,
+    SelectSelectorConfig,
+    SelectSelectorMode,
     TextSelector,
+    TextSelectorConfig,
+    TextSelectorType,
 )
 
-from . import async_create_proxy_clientsession
-from .api import (
-    TorCheckApiClient,
-    TorCheckApiClientAuthenticationError,
-    TorCheckApiClientCommunicationError,
-    TorCheckApiClientError,
-)
 from .const import (
+    CONF_CIRCUIT_SAMPLES,
+    CONF_CONTROL_PASSWORD,
+    CONF_CONTROL_PORT,
+    CONF_FLEET,
+    CONF_GEOIP_DATABASES,
+    CONF_HTTP_FILTER,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_ONION_SERVICES,
     CONF_TOR_HOST,
     CONF_TOR_PORT,
+    CONF_TRANSFER_PROBE_URL,
     DEFAULT_CONFIG,
+    DEFAULT_OPTIONS,
     DOMAIN,
+    HTTP_FILTER_LOG,
+    HTTP_FILTER_OFF,
+    HTTP_FILTER_REJECT,
+    HTTP_FILTER_TAG,
     LOGGER,
     ConfigType,
 )
@@ -34,6 +48,31 @@ PORT_SELECTOR = vol.All(
     NumberSelector(NumberSelectorConfig(mode=NumberSelectorMode.BOX, min=1, max=65535)),
     vol.Coerce(int),
 )
+INTERVAL_SELECTOR = vol.All(
+    NumberSelector(
+        NumberSelectorConfig(
+            mode=NumberSelectorMode.BOX, min=10, max=86400, unit_of_measurement="s"
+        )
+    ),
+    vol.Coerce(int),
+)
+
+
+def _is_http_url(url: str) -> bool:
+    """Return true if URL is absolute HTTP(S) one."""
+    try:
+        parsed = urlsplit(url)
+    except ValueError:
+        return False
+    return parsed.scheme in ("http", "https") and bool(parsed.hostname)
+
+
+def _validate_geoip_databases(paths: list[str]) -> None:
+    """Check GeoIP databases can be opened."""
+    import maxminddb  # pylint: disable=import-outside-toplevel
+
+    for path in paths:
+        maxminddb.open_database(path, maxminddb.MODE_MMAP).close()
 
 
 class TorCheckFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
@@ -42,6 +81,14 @@ class TorCheckFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
     CONNECTION_CLASS: Final = config_entries.CONN_CLASS_CLOUD_POLL
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(
+        config_entry: config_entries.ConfigEntry,
+    ) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return TorCheckOptionsFlowHandler(config_entry)
+
     async def async_step_import(
         self, platform_config: ConfigType
     ) -> config_entries.FlowResult:
@@ -61,9 +108,22 @@ class TorCheckFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
         self, user_input: Optional[ConfigType] = None
     ) -> config_entries.FlowResult:
         """Handle a flow initialized by the user."""
+        return self.async_show_menu(step_id="user", menu_options=["daemon", "fleet"])
+
+    async def async_step_daemon(
+        self, user_input: ConfigType | None = None
+    ) -> config_entries.FlowResult:
+        """Handle configuration of single TOR daemon."""
         _errors = {}
 
         if user_input is not None:
+            # pylint: disable-next=import-outside-toplevel
+            from .api import (
+                TorCheckApiClientAuthenticationError,
+                TorCheckApiClientCommunicationError,
+                TorCheckApiClientError,
+            )
+
             try:
                 await self._test_credentials(
                     tor_host=user_input[CONF_TOR_HOST],
@@ -78,14 +138,29 @@ class TorCheckFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
             except TorCheckApiClientError as exception:
                 LOGGER.exception(exception)
                 _errors["base"] = "unknown"
-            else:
+
+            if not _errors and user_input.get(CONF_CONTROL_PORT) is not None:
+                try:
+                    await self._test_control(
+                        tor_host=user_input[CONF_TOR_HOST],
+                        control_port=user_input[CONF_CONTROL_PORT],
+                        password=user_input.get(CONF_CONTROL_PASSWORD),
+                    )
+                except TorCheckApiClientAuthenticationError as exception:
+                    LOGGER.warning(exception)
+                    _errors["base"] = "control_auth"
+                except TorCheckApiClientError as exception:
+                    LOGGER.error(exception)
+                    _errors["base"] = "control_connection"
+
+            if not _errors:
                 return self.async_create_entry(
                     title=user_input[CONF_TOR_HOST],
                     data=user_input,
                 )
 
         return self.async_show_form(
-            step_id="user",
+            step_id="daemon",
             data_schema=vol.Schema(
                 {
                     vol.Required(
@@ -96,6 +171,51 @@ class TorCheckFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
                         CONF_TOR_PORT,
                         default=(user_input or DEFAULT_CONFIG).get(CONF_TOR_PORT),
                     ): PORT_SELECTOR,
+                    vol.Optional(
+                        CONF_CONTROL_PORT,
+                        description={
+                            "suggested_value": (user_input or {}).get(CONF_CONTROL_PORT)
+                        },
+                    ): PORT_SELECTOR,
+                    vol.Optional(CONF_CONTROL_PASSWORD): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.PASSWORD)
+                    ),
+                }
+            ),
+            errors=_errors,
+        )
+
+    async def async_step_fleet(
+        self, user_input: ConfigType | None = None
+    ) -> config_entries.FlowResult:
+        """Handle configuration of fleet of TOR daemons."""
+        _errors = {}
+
+        if user_input is not None:
+            # pylint: disable-next=import-outside-toplevel
+            from .fleet import parse_endpoints
+
+            try:
+                endpoints = parse_endpoints(user_input[CONF_FLEET])
+            except ValueError as exception:
+                LOGGER.warning(exception)
+                _errors[CONF_FLEET] = "endpoints"
+            else:
+                if not endpoints:
+                    _errors[CONF_FLEET] = "endpoints"
+                else:
+                    return self.async_create_entry(
+                        title=f"Fleet of {len(endpoints)} TOR daemons",
+                        data=user_input,
+                    )
+
+        return self.async_show_form(
+            step_id="fleet",
+            data_schema=vol.Schema(
+                {
+                    vol.Required(
+                        CONF_FLEET, default=(user_input or {}).get(CONF_FLEET, [])
+                    ): TextSelector(TextSelectorConfig(multiple=True)),
                 }
             ),
             errors=_errors,
@@ -103,9 +223,141 @@ class TorCheckFlowHandler(config_entries.ConfigFlow, domain=DOMAIN):
 
     async def _test_credentials(self, tor_host: str, tor_port: int) -> None:
         """Validate credentials."""
+        # pylint: disable=import-outside-toplevel
+        from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+        from .api import TorCheckApiClient
+        from .proxy import (
+            async_acquire_proxy_clientsession,
+            async_get_single_flight,
+            async_release_proxy_clientsession,
+        )
+
         proxy_url = f"socks5://{tor_host}:{tor_port}"
-        client = TorCheckApiClient(
-            session=async_create_clientsession(self.hass),
-            tor_session=async_create_proxy_clientsession(self.hass, proxy_url),
+        tor_session = async_acquire_proxy_clientsession(self.hass, proxy_url)
+        try:
+            client = TorCheckApiClient(
+                session=async_get_clientsession(self.hass),
+                tor_session=tor_session,
+                proxy_url=proxy_url,
+                flights=async_get_single_flight(self.hass),
+            )
+            await client.async_get_my_tor_ip()
+        finally:
+            async_release_proxy_clientsession(self.hass, tor_session)
+
+    async def _test_control(
+        self, tor_host: str, control_port: int, password: str | None
+    ) -> None:
+        """Validate TOR control port connection."""
+        # pylint: disable-next=import-outside-toplevel
+        from .control import TorControlClient
+
+        control = TorControlClient(tor_host, control_port, password)
+        try:
+            await control.async_connect()
+        finally:
+            await control.async_close()
+
+
+class TorCheckOptionsFlowHandler(config_entries.OptionsFlow):
+    """Options flow for TOR Check custom component."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize."""
+        self.config_entry = config_entry
+
+    async def async_step_init(
+        self, user_input: ConfigType | None = None
+    ) -> config_entries.FlowResult:
+        """Manage options."""
+        _errors = {}
+
+        if user_input is not None:
+            # pylint: disable-next=import-outside-toplevel
+            from .onion import is_onion_url
+
+            if (
+                user_input[CONF_MIN_UPDATE_INTERVAL]
+                > user_input[CONF_MAX_UPDATE_INTERVAL]
+            ):
+                _errors["base"] = "intervals"
+            elif not all(map(is_onion_url, user_input.get(CONF_ONION_SERVICES, []))):
+                _errors[CONF_ONION_SERVICES] = "onion_url"
+            elif (url := user_input.get(CONF_TRANSFER_PROBE_URL)) and not _is_http_url(
+                url
+            ):
+                _errors[CONF_TRANSFER_PROBE_URL] = "transfer_url"
+            else:
+                try:
+                    await self.hass.async_add_executor_job(
+                        _validate_geoip_databases,
+                        user_input.get(CONF_GEOIP_DATABASES, []),
+                    )
+                except (OSError, ValueError) as exception:
+                    LOGGER.warning("Can't open GeoIP database: %s", exception)
+                    _errors[CONF_GEOIP_DATABASES] = "geoip_database"
+                else:
+                    return self.async_create_entry(title="", data=user_input)
+
+        options = {**DEFAULT_OPTIONS, **self.config_entry.options, **(user_input or {})}
+        schema = {
+            vol.Required(
+                CONF_MIN_UPDATE_INTERVAL,
+                default=options[CONF_MIN_UPDATE_INTERVAL],
+            ): INTERVAL_SELECTOR,
+            vol.Required(
+                CONF_MAX_UPDATE_INTERVAL,
+                default=options[CONF_MAX_UPDATE_INTERVAL],
+            ): INTERVAL_SELECTOR,
+        }
+        if CONF_FLEET not in self.config_entry.data:
+            schema.update(
+                {
+                    vol.Required(
+                        CONF_HTTP_FILTER,
+                        default=options[CONF_HTTP_FILTER],
+                    ): SelectSelector(
+                        SelectSelectorConfig(
+                            options=[
+                                HTTP_FILTER_OFF,
+                                HTTP_FILTER_TAG,
+                                HTTP_FILTER_LOG,
+                                HTTP_FILTER_REJECT,
+                            ],
+                            mode=SelectSelectorMode.DROPDOWN,
+                            translation_key=CONF_HTTP_FILTER,
+                        )
+                    ),
+                    vol.Optional(
+                        CONF_GEOIP_DATABASES,
+                        default=options[CONF_GEOIP_DATABASES],
+                    ): TextSelector(TextSelectorConfig(multiple=True)),
+                    vol.Required(
+                        CONF_CIRCUIT_SAMPLES,
+                        default=options[CONF_CIRCUIT_SAMPLES],
+                    ): vol.All(
+                        NumberSelector(
+                            NumberSelectorConfig(
+                                mode=NumberSelectorMode.BOX, min=0, max=32
+                            )
+                        ),
+                        vol.Coerce(int),
+                    ),
+                    vol.Optional(
+                        CONF_ONION_SERVICES,
+                        default=options[CONF_ONION_SERVICES],
+                    ): TextSelector(
+                        TextSelectorConfig(type=TextSelectorType.URL, multiple=True)
+                    ),
+                    vol.Optional(
+                        CONF_TRANSFER_PROBE_URL,
+                        default=options[CONF_TRANSFER_PROBE_URL],
+                    ): TextSelector(TextSelectorConfig(type=TextSelectorType.URL)),
+                }
+            )
+        return self.async_show_form(
+            step_id="init",
+            data_schema=vol.Schema(schema),
+            errors=_errors,
         )
-        await client.async_get_my_tor_ip()
@@ -0,0 +1,120 @@
+"""TOR consensus parser for TOR Check custom component.
+
+Router status entries format is described at
+https://spec.torproject.org/dir-spec/consensus-formats.html
+"""
+from __future__ import annotations
+
+from collections import Counter
+from typing import Final
+
+from .exit_nodes import TorExitNodes
+
+_REJECT_ALL: Final = "reject 1-65535"
+
+
+class TorConsensusParser:
+    """Streaming parser of router status entries.
+
+    Lines are fed one by one, only exit relays addresses are kept.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self.exits: dict[str, tuple[str, ...]] = {}
+        self._identity: str | None = None
+        self._addresses: list[str] = []
+        self._exit_flag = False
+        self._bad_exit = False
+        self._policy: str | None = None
+
+    def _flush(self) -> None:
+        """Finish current router entry."""
+        if (
+            self._identity is not None
+            # Relay excluded from exit position by authorities, whatever its policy
+            and not self._bad_exit
+            and (
+                self._exit_flag if self._policy is None else self._policy != _REJECT_ALL
+            )
+        ):
+            self.exits[self._identity] = tuple(self._addresses)
+        self._identity = None
+
+    def feed_line(self, line: str) -> None:
+        """Parse next line of consensus document."""
+        keyword, _, args = line.partition(" ")
+        if keyword == "r":
+            self._flush()
+            # r nickname identity [digest] date time IP ORPort DirPort
+            if len(fields := args.split()) >= 7:
+                self._identity = fields[1]
+                self._addresses = [fields[-3]]
+                self._exit_flag = self._bad_exit = False
+                self._policy = None
+        elif self._identity is None:
+            return
+        elif keyword == "a":
+            # a [IPv6]:port
+            address = args.rpartition(":")[0]
+            if address.startswith("[") and address.endswith("]"):
+                self._addresses.append(address[1:-1])
+        elif keyword == "s":
+            flags = args.split()
+            self._exit_flag = "Exit" in flags
+            self._bad_exit = "BadExit" in flags
+        elif keyword == "p":
+            self._policy = args.strip()
+
+    def finish(self) -> dict[str, tuple[str, ...]]:
+        """Return exit relays addresses by relay identity."""
+        self._flush()
+        return self.exits
+
+
+class TorConsensusExitNodes:
+    """Exit nodes index maintained from successive TOR consensus documents.
+
+    Only relays added or removed since previous consensus are applied to
+    the index, unchanged relays are not parsed into addresses again.
+
+    Note that addresses are OR addresses of exit relays, multihomed relays may
+    actually exit from another address.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._relays: dict[str, tuple[str, ...]] = {}
+        # Number of exit relays on each address
+        self._addresses: Counter[str] = Counter()
+        self.exit_nodes = TorExitNodes()
+
+    def apply(self, parser: TorConsensusParser) -> tuple[int, int]:
+        """Apply parsed consensus, return numbers of added and removed addresses."""
+        relays = parser.finish()
+        added: list[str] = []
+        removed: list[str] = []
+        for identity, addresses in self._relays.items():
+            if relays.get(identity) != addresses:
+                for address in addresses:
+                    self._addresses[address] -= 1
+                    if not self._addresses[address]:
+                        del self._addresses[address]
+                        removed.append(address)
+        for identity, addresses in relays.items():
+            if self._relays.get(identity) != addresses:
+                for address in addresses:
+                    self._addresses[address] += 1
+                    if self._addresses[address] == 1:
+                        added.append(address)
+        self._relays = relays
+
+        # Address can move between relays, it is neither added nor removed then
+        moved = set(added).intersection(removed)
+        added = [address for address in added if address not in moved]
+        removed = [address for address in removed if address not in moved]
+        if added or removed:
+            self.exit_nodes = self.exit_nodes.with_changes(
+                TorExitNodes.from_strings(added), TorExitNodes.from_strings(removed)
+            )
+        return len(added), len(removed)
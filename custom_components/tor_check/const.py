@@ -22,14 +22,63 @@ If you have ANY issues with this you need to open an issue here:
 
 CONF_TOR_HOST: Final = "tor_host"
 CONF_TOR_PORT: Final = "tor_port"
+CONF_CONTROL_PORT: Final = "control_port"
+CONF_CONTROL_PASSWORD: Final = "control_password"
+CONF_MIN_UPDATE_INTERVAL: Final = "min_update_interval"
+CONF_MAX_UPDATE_INTERVAL: Final = "max_update_interval"
+CONF_HTTP_FILTER: Final = "http_filter"
+CONF_GEOIP_DATABASES: Final = "geoip_databases"
+CONF_CIRCUIT_SAMPLES: Final = "circuit_samples"
+CONF_ONION_SERVICES: Final = "onion_services"
+CONF_TRANSFER_PROBE_URL: Final = "transfer_probe_url"
+# SOCKS endpoints of TOR daemons fleet, like "host:9050" or "host:9050-9059"
+CONF_FLEET: Final = "fleet"
+
+# Actions on HTTP requests from TOR exit nodes
+HTTP_FILTER_OFF: Final = "off"
+HTTP_FILTER_TAG: Final = "tag"
+HTTP_FILTER_LOG: Final = "log"
+HTTP_FILTER_REJECT: Final = "reject"
+
+SERVICE_LOOKUP: Final = "lookup"
+SERVICE_DEBUG: Final = "debug"
+
+ATTR_ADDRESSES: Final = "addresses"
+ATTR_NETWORKS: Final = "networks"
+ATTR_INVALID: Final = "invalid"
 
 ATTR_REAL_IP = "Real IP"
 ATTR_TOR_IP = "TOR IP"
 ATTR_TOR_CONNECTED = "TOR connected"
+ATTR_EXIT_COUNTRY = "Exit country"
+ATTR_EXIT_ASN = "Exit ASN"
+ATTR_EXIT_AS_ORGANIZATION = "Exit AS organization"
+ATTR_EXITS = "Exits"
+ATTR_UNLISTED_EXITS = "Unlisted exits"
+ATTR_CIRCUIT_LATENCIES = "Circuit latencies"
+ATTR_FAILED_CIRCUITS = "Failed circuits"
+ATTR_URL = "URL"
+ATTR_LATENCY = "Latency"
+ATTR_ERROR = "Error"
+ATTR_P50 = "p50"
+ATTR_P95 = "p95"
+ATTR_P99 = "p99"
+ATTR_SAMPLES = "Samples"
 
 DEFAULT_CONFIG: Final = {
     CONF_TOR_HOST: "localhost",
     CONF_TOR_PORT: 9050,
 }
 
+DEFAULT_OPTIONS: Final = {
+    # Update intervals are in seconds
+    CONF_MIN_UPDATE_INTERVAL: 30,
+    CONF_MAX_UPDATE_INTERVAL: 900,
+    CONF_HTTP_FILTER: HTTP_FILTER_OFF,
+    CONF_GEOIP_DATABASES: [],
+    CONF_CIRCUIT_SAMPLES: 0,
+    CONF_ONION_SERVICES: [],
+    CONF_TRANSFER_PROBE_URL: "",
+}
+
 ConfigType = dict[str, Any]
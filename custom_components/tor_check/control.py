@@ -0,0 +1,244 @@
+"""TOR control protocol client for TOR Check custom component.
+
+See https://spec.torproject.org/control-spec/ for protocol details.
+"""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Callable
+import logging
+from typing import Final
+
+import async_timeout
+
+from .api import (
+    TorCheckApiClientAuthenticationError,
+    TorCheckApiClientCommunicationError,
+    TorCheckApiClientError,
+)
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+EVENT_CIRC: Final = "CIRC"
+EVENT_NEWCONSENSUS: Final = "NEWCONSENSUS"
+EVENT_STATUS_CLIENT: Final = "STATUS_CLIENT"
+
+# Reply codes
+_CODE_ASYNC_EVENT: Final = "650"
+_CODES_AUTH_FAILED: Final = ("514", "515")
+
+_TIMEOUT: Final = 10
+
+
+def _quote(value: str) -> str:
+    """Return value as protocol quoted string."""
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _call_handler(handler: Callable[..., None], *args: str) -> None:
+    """Call handler of received data, so its error does not break connection."""
+    try:
+        handler(*args)
+    except Exception:  # pylint: disable=broad-except
+        _LOGGER.exception("Error handling data from TOR control port")
+
+
+class TorControlClient:
+    """Minimal asyncio client for TOR control port.
+
+    Supports AUTHENTICATE, GETINFO and SETEVENTS commands. Asynchronous events
+    are passed to on_event callback as event name and the rest of event line.
+
+    Large data replies and events can be processed line by line as they are
+    received, without keeping the whole reply in memory.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        password: str | None = None,
+        on_event: Callable[[str, str], None] | None = None,
+        on_disconnect: Callable[[], None] | None = None,
+    ) -> None:
+        """Initialize."""
+        self._host = host
+        self._port = port
+        self._password = password
+        self._on_event = on_event
+        self._on_disconnect = on_disconnect
+        self._reader: asyncio.StreamReader | None = None
+        self._writer: asyncio.StreamWriter | None = None
+        self._reader_task: asyncio.Task | None = None
+        self._pending: deque[
+            tuple[asyncio.Future[tuple[str, list[str]]], Callable[[str], None] | None]
+        ] = deque()
+        self._event_data_handlers: dict[str, Callable[[str], None]] = {}
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self) -> bool:
+        """Return true if connection is open."""
+        return self._writer is not None and not self._writer.is_closing()
+
+    async def async_connect(self) -> None:
+        """Connect to control port and authenticate."""
+        try:
+            async with async_timeout.timeout(_TIMEOUT):
+                self._reader, self._writer = await asyncio.open_connection(
+                    self._host, self._port
+                )
+        except (asyncio.TimeoutError, OSError) as exception:
+            raise TorCheckApiClientCommunicationError(
+                "Error connecting to TOR control port",
+            ) from exception
+
+        self._reader_task = asyncio.create_task(self._async_read_loop())
+        try:
+            await self._async_command(
+                "AUTHENTICATE"
+                if self._password is None
+                else f"AUTHENTICATE {_quote(self._password)}"
+            )
+        except TorCheckApiClientError:
+            await self.async_close()
+            raise
+
+    async def async_close(self) -> None:
+        """Close connection."""
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        self._fail_pending(TorCheckApiClientCommunicationError("Connection closed"))
+
+    async def async_get_info(self, *keys: str) -> dict[str, str]:
+        """Return values of requested keys."""
+        info = {}
+        for line in await self._async_command(f"GETINFO {' '.join(keys)}"):
+            key, sep, value = line.partition("=")
+            if sep:
+                info[key] = value.removeprefix("\n")
+        return info
+
+    async def async_get_info_lines(
+        self, key: str, on_line: Callable[[str], None]
+    ) -> None:
+        """Pass lines of key value to callback one by one as they are received."""
+        await self._async_command(f"GETINFO {key}", on_line)
+
+    def set_event_data_handler(
+        self, event: str, on_line: Callable[[str], None] | None
+    ) -> None:
+        """Set callback to receive data lines of event one by one."""
+        if on_line is None:
+            self._event_data_handlers.pop(event, None)
+        else:
+            self._event_data_handlers[event] = on_line
+
+    async def async_set_events(self, *events: str) -> None:
+        """Subscribe to asynchronous events."""
+        await self._async_command(f"SETEVENTS {' '.join(events)}")
+
+    async def _async_command(
+        self, command: str, on_data: Callable[[str], None] | None = None
+    ) -> list[str]:
+        """Send command and return lines of successful reply."""
+        if not self.connected:
+            raise TorCheckApiClientCommunicationError("Not connected")
+
+        future: asyncio.Future[tuple[str, list[str]]]
+        async with self._lock:
+            future = asyncio.get_running_loop().create_future()
+            self._pending.append((future, on_data))
+            self._writer.write(command.encode() + b"\r\n")
+            try:
+                await self._writer.drain()
+            except OSError as exception:
+                raise TorCheckApiClientCommunicationError(
+                    "Error sending command to TOR control port",
+                ) from exception
+
+        try:
+            async with async_timeout.timeout(_TIMEOUT):
+                code, lines = await future
+        except asyncio.TimeoutError as exception:
+            raise TorCheckApiClientCommunicationError(
+                "Timeout waiting for TOR control port reply",
+            ) from exception
+
+        if code in _CODES_AUTH_FAILED:
+            raise TorCheckApiClientAuthenticationError(lines[-1])
+        if not code.startswith("2"):
+            raise TorCheckApiClientError(f"{code} {lines[-1]}")
+        return lines
+
+    async def _async_read_line(self) -> str:
+        """Read one line of reply."""
+        if not (line := await self._reader.readline()):
+            raise ConnectionResetError("Connection closed by TOR")
+        return line.decode(errors="replace").rstrip("\r\n")
+
+    def _data_handler(
+        self, code: str, lines: list[str], text: str
+    ) -> Callable[[str], None] | None:
+        """Return callback for data lines of reply being read."""
+        if code == _CODE_ASYNC_EVENT:
+            return self._event_data_handlers.get(
+                (lines[0] if lines else text).split()[0]
+            )
+        return self._pending[0][1] if self._pending else None
+
+    async def _async_read_reply(self) -> tuple[str, list[str]]:
+        """Read whole reply, return status code and text of reply lines."""
+        lines = []
+        while True:
+            line = await self._async_read_line()
+            code, sep, text = line[:3], line[3:4], line[4:]
+            if sep == "+":
+                on_data = self._data_handler(code, lines, text)
+                data_lines = []
+                while (data := await self._async_read_line()) != ".":
+                    if on_data is None:
+                        data_lines.append(data.removeprefix("."))
+                    else:
+                        _call_handler(on_data, data.removeprefix("."))
+                if data_lines:
+                    text += "\n" + "\n".join(data_lines)
+            lines.append(text)
+            if sep not in ("-", "+"):
+                return code, lines
+
+    async def _async_read_loop(self) -> None:
+        """Read replies and dispatch them to commands and event callback."""
+        try:
+            while True:
+                code, lines = await self._async_read_reply()
+                if code == _CODE_ASYNC_EVENT:
+                    event, _, args = lines[0].partition(" ")
+                    if self._on_event is not None:
+                        _call_handler(self._on_event, event, args)
+                elif self._pending:
+                    future, _ = self._pending.popleft()
+                    if not future.done():
+                        future.set_result((code, lines))
+        except (OSError, asyncio.IncompleteReadError, ValueError) as exception:
+            _LOGGER.debug("TOR control connection lost: %s", exception)
+            self._reader_task = None
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+            self._fail_pending(
+                TorCheckApiClientCommunicationError("Connection lost"),
+            )
+            if self._on_disconnect is not None:
+                self._on_disconnect()
+
+    def _fail_pending(self, exception: Exception) -> None:
+        """Fail all commands waiting for reply."""
+        while self._pending:
+            if not (future := self._pending.popleft()[0]).done():
+                future.set_exception(exception)
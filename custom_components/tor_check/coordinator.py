@@ -1,23 +1,54 @@
 """DataUpdateCoordinator for TOR Check custom integration."""
 from __future__ import annotations
 
+import asyncio
+from base64 import b64decode, b64encode
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from dataclasses import replace
 from datetime import datetime, timedelta
+from functools import partial
 import logging
-from typing import Final
+import time
+from typing import Any, Final
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 import homeassistant.util.dt as dt_util
 
 from .api import (
+    SINGLE_FLIGHT_FRESHNESS,
     TorCheckApiClient,
     TorCheckApiClientAuthenticationError,
     TorCheckApiClientCommunicationError,
     TorCheckApiClientError,
+    TorExitNodesApiClient,
 )
-from .const import DOMAIN, LOGGER
+from .consensus import TorConsensusExitNodes, TorConsensusParser
+from .const import (
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    DEFAULT_OPTIONS,
+    DOMAIN,
+    LOGGER,
+)
+from .control import (
+    EVENT_CIRC,
+    EVENT_NEWCONSENSUS,
+    EVENT_STATUS_CLIENT,
+    TorControlClient,
+)
+from .exit_nodes import TorExitNodes
+from .geoip import GeoIpReader
+from .onion import OnionServicesMonitor
+from .proxy import async_get_direct_clientsession, async_get_request_policy
+from .sampling import CircuitSample, TorCircuitSampler
+from .scheduler import AdaptiveUpdateInterval
+from .stats import RollingStats
 
 _LOGGER: Final = logging.getLogger(__name__)
 
@@ -26,6 +57,153 @@ KEY_TOR_EXIT_NODES = "tor_exit_nodes"
 KEY_MY_TOR_IP = "my_tor_ip"
 KEY_MY_IP = "my_ip"
 KEY_TOR_CONNECTED = "tor_connected"
+KEY_TOR_GEOIP = "tor_geoip"
+KEY_TOR_CIRCUITS = "tor_circuits"
+KEY_ONION_SERVICES = "onion_services"
+
+# Keys of circuits sampling results
+CIRCUITS_EXITS: Final = "exits"
+CIRCUITS_UNLISTED: Final = "unlisted"
+CIRCUITS_LATENCIES: Final = "latencies"
+CIRCUITS_FAILED: Final = "failed"
+KEY_TOR_TTFB = "tor_ttfb"
+KEY_TOR_THROUGHPUT = "tor_throughput"
+KEY_DIRECT_TTFB = "direct_ttfb"
+KEY_DIRECT_THROUGHPUT = "direct_throughput"
+
+DATA_EXIT_NODES: Final = "exit_nodes"
+
+DEFAULT_MIN_UPDATE_INTERVAL: Final = timedelta(
+    seconds=DEFAULT_OPTIONS[CONF_MIN_UPDATE_INTERVAL]
+)
+DEFAULT_MAX_UPDATE_INTERVAL: Final = timedelta(
+    seconds=DEFAULT_OPTIONS[CONF_MAX_UPDATE_INTERVAL]
+)
+CONTROL_RECONNECT_DELAY: Final = 60
+# Poll for TOR IP while connectivity is pushed by control port, as TOR moves
+# new streams to fresh exit circuit every 10 minutes by default
+CONTROL_POLL_INTERVAL: Final = timedelta(minutes=10)
+
+TRANSFER_PROBE_INTERVAL: Final = timedelta(minutes=15)
+# Number of transfer probes to keep statistics of, one day by default
+TRANSFER_STATS_SIZE: Final = 96
+
+CIRCUIT_SAMPLING_INTERVAL: Final = timedelta(hours=1)
+
+# Number of the last refreshes to keep durations of
+REFRESH_HISTORY_SIZE: Final = 20
+
+# Counters of data cache usage, expired entries are counted as misses too
+CACHE_HITS: Final = "hits"
+CACHE_MISSES: Final = "misses"
+CACHE_EXPIRED: Final = "expired"
+CACHE_STORES: Final = "stores"
+
+STORAGE_KEY: Final = f"{DOMAIN}.cache"
+STORAGE_VERSION: Final = 1
+STORAGE_SAVE_DELAY: Final = 10
+
+
+def _entry_store(hass: HomeAssistant, entry_id: str) -> Store:
+    """Return persistent storage for config entry cache."""
+    return Store(hass, STORAGE_VERSION, f"{STORAGE_KEY}.{entry_id}")
+
+
+async def async_remove_entry_cache(hass: HomeAssistant, entry_id: str) -> None:
+    """Remove persistent cache of config entry."""
+    await _entry_store(hass, entry_id).async_remove()
+
+
+class TorExitNodesService:
+    """Shared list of TOR exit nodes for all config entries.
+
+    List is downloaded once for all callers, concurrent requests are merged into
+    a single download. Every caller gets a reference to the same immutable index.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        client: TorExitNodesApiClient,
+        timeout: timedelta = timedelta(days=1),
+    ) -> None:
+        """Initialize."""
+        self._hass = hass
+        self._client = client
+        self._timeout = timeout
+        self._store: Store = Store(
+            hass, STORAGE_VERSION, f"{STORAGE_KEY}.{DATA_EXIT_NODES}"
+        )
+        self._exit_nodes: TorExitNodes | None = None
+        self._expires: datetime = dt_util.utc_from_timestamp(0)
+        self._loaded = False
+        self._task: asyncio.Task[TorExitNodes] | None = None
+        # Seconds spent on the last download of the list
+        self.fetch_duration: float | None = None
+
+    @property
+    def exit_nodes(self) -> TorExitNodes | None:
+        """Return last known list of exit nodes."""
+        return self._exit_nodes
+
+    def _data_to_store(self) -> list[Any]:
+        """Serialize exit nodes to compact storage format."""
+        return [
+            self._expires.timestamp(),
+            [b64encode(packed).decode() for packed in self._exit_nodes.to_bytes()],
+        ]
+
+    async def async_load(self) -> None:
+        """Restore exit nodes list from persistent storage."""
+        if self._loaded:
+            return
+        self._loaded = True
+        if not (stored := await self._store.async_load()):
+            return
+
+        try:
+            timestamp, data = stored
+            self._expires = dt_util.utc_from_timestamp(timestamp)
+            self._exit_nodes = TorExitNodes.from_bytes(*map(b64decode, data))
+        except (TypeError, ValueError) as exception:
+            _LOGGER.warning("Can't restore cached exit nodes: %s", exception)
+            self._expires = dt_util.utc_from_timestamp(0)
+
+    async def async_get_exit_nodes(self) -> TorExitNodes:
+        """Return fresh list of exit nodes, downloading it if expired."""
+        if self._exit_nodes is not None and dt_util.utcnow() < self._expires:
+            return self._exit_nodes
+
+        if self._task is None:
+            self._task = self._hass.async_create_task(self._async_update())
+        return await asyncio.shield(self._task)
+
+    async def _async_update(self) -> TorExitNodes:
+        """Download list of exit nodes."""
+        start = time.monotonic()
+        try:
+            self._exit_nodes = await self._client.async_get_tor_exit_nodes()
+        finally:
+            self.fetch_duration = time.monotonic() - start
+            self._task = None
+
+        self._expires = dt_util.utcnow() + self._timeout
+        self._store.async_delay_save(self._data_to_store, STORAGE_SAVE_DELAY)
+        return self._exit_nodes
+
+
+@callback
+def async_get_exit_nodes_service(hass: HomeAssistant) -> TorExitNodesService:
+    """Return shared exit nodes service, creating it on first use."""
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (service := domain_data.get(DATA_EXIT_NODES)) is None:
+        service = domain_data[DATA_EXIT_NODES] = TorExitNodesService(
+            hass,
+            TorExitNodesApiClient(
+                async_get_direct_clientsession(hass), async_get_request_policy(hass)
+            ),
+        )
+    return service
 
 
 # https://developers.home-assistant.io/docs/integration_fetching_data#coordinated-single-api-poll-for-data-for-all-entities
@@ -34,29 +212,77 @@ class TorCheckDataUpdateCoordinator(DataUpdateCoordinator):
 
     config_entry: ConfigEntry
 
-    _cache: dict[str : list[datetime, any]] = {}
-
     def __init__(
         self,
         hass: HomeAssistant,
         client: TorCheckApiClient,
+        exit_nodes: TorExitNodesService,
+        min_update_interval: timedelta = DEFAULT_MIN_UPDATE_INTERVAL,
+        max_update_interval: timedelta = DEFAULT_MAX_UPDATE_INTERVAL,
+        geoip: GeoIpReader | None = None,
+        circuit_sampler: TorCircuitSampler | None = None,
+        onion_monitor: OnionServicesMonitor | None = None,
+        transfer_probe_url: str | None = None,
     ) -> None:
-        """Initialize."""
+        """Initialize.
+
+        Transfer timings are measured only if URL of document to download for
+        it is passed.
+        """
         self.client = client
+        self.geoip = geoip
+        self.circuit_sampler = circuit_sampler
+        self.onion_monitor = onion_monitor
+        self._circuit_samples: list[CircuitSample] | None = None
+        self._circuit_sampling_due = dt_util.utc_from_timestamp(0)
+        self.scheduler = AdaptiveUpdateInterval(
+            min_update_interval, max_update_interval
+        )
+        self.exit_nodes = exit_nodes
+        self._cache: dict[str, list[datetime, Any]] = {}
+        self.cache_stats: Counter[str] = Counter()
+        # Seconds spent on the last request of each data source
+        self.fetch_durations: dict[str, float] = {}
+        # Start time, seconds spent and success of the last refreshes
+        self.refresh_history: deque[tuple[datetime, float, bool]] = deque(
+            maxlen=REFRESH_HISTORY_SIZE
+        )
+        # Transfer time to first byte in ms and throughput in kB/s
+        self.transfer_stats: dict[str, RollingStats] = {
+            key: RollingStats(TRANSFER_STATS_SIZE)
+            for key in (
+                KEY_TOR_TTFB,
+                KEY_TOR_THROUGHPUT,
+                KEY_DIRECT_TTFB,
+                KEY_DIRECT_THROUGHPUT,
+            )
+        }
+        self.transfer_probe_url = transfer_probe_url
+        self._transfer_probe_due = dt_util.utc_from_timestamp(0)
+        self._control: TorControlClient | None = None
+        self._circuit_established: bool | None = None
+        self._unsub_control_reconnect: CALLBACK_TYPE | None = None
+        self._consensus: TorConsensusExitNodes | None = None
+        self._consensus_parser: TorConsensusParser | None = None
         super().__init__(
             hass=hass,
             logger=LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(minutes=5),
+            update_interval=min_update_interval,
         )
+        self._store = _entry_store(hass, self.config_entry.entry_id)
 
     def _cache_get(self, key: str, default: any = None) -> any:
         """Get data from cache by key."""
         if key in self._cache:
             if self._cache[key][0] < dt_util.utcnow():
                 del self._cache[key]
+                self.cache_stats[CACHE_EXPIRED] += 1
+                self.cache_stats[CACHE_MISSES] += 1
                 return default
+            self.cache_stats[CACHE_HITS] += 1
             return self._cache[key][1]
+        self.cache_stats[CACHE_MISSES] += 1
         return default
 
     def _cache_set(
@@ -64,47 +290,367 @@ class TorCheckDataUpdateCoordinator(DataUpdateCoordinator):
     ) -> any:
         """Store data to cache by key for some time."""
         self._cache[key] = [dt_util.utcnow() + timeout, data]
+        self.cache_stats[CACHE_STORES] += 1
+        self._store.async_delay_save(self._cache_to_storage, STORAGE_SAVE_DELAY)
         return data
 
+    def _cache_to_storage(self) -> dict[str, list[Any]]:
+        """Serialize cache to compact storage format."""
+        return {
+            key: [expires.timestamp(), data]
+            for key, (expires, data) in self._cache.items()
+        }
+
+    async def async_load_cache(self) -> None:
+        """Restore not expired cache entries from persistent storage."""
+        await self.exit_nodes.async_load()
+        if self._cache or not (stored := await self._store.async_load()):
+            return
+
+        now = dt_util.utcnow()
+        try:
+            for key, (timestamp, data) in stored.items():
+                if (expires := dt_util.utc_from_timestamp(timestamp)) >= now:
+                    self._cache[key] = [expires, data]
+        except (TypeError, ValueError) as exception:
+            _LOGGER.warning("Can't restore cached data: %s", exception)
+            self._cache.clear()
+
+    async def _async_fetch(
+        self,
+        key: str,
+        fetch: Callable[[], Awaitable[Any]],
+        timeout: timedelta = timedelta(minutes=15),
+    ) -> Any:
+        """Get data by key from cache or fetch it and track time spent."""
+        if (data := self._cache_get(key)) is not None:
+            return data
+
+        start = time.monotonic()
+        try:
+            return self._cache_set(key, await fetch(), timeout)
+        finally:
+            self.fetch_durations[key] = time.monotonic() - start
+
+    def _cache_expires_in(self) -> timedelta | None:
+        """Return time left until the first of cached data expires."""
+        if not self._cache:
+            return None
+        return min(expires for expires, _ in self._cache.values()) - dt_util.utcnow()
+
     async def _async_update_data(self):
-        """Update data via library."""
-        data = {
-            KEY_TOR_EXIT_NODES: self._cache_get(KEY_TOR_EXIT_NODES, {}),
-            KEY_MY_TOR_IP: self._cache_get(KEY_MY_TOR_IP),
-            KEY_MY_IP: self._cache_get(KEY_MY_IP),
+        """Update data via library and adapt interval to next update."""
+        started, start = dt_util.utcnow(), time.monotonic()
+        try:
+            data = await self._async_fetch_data()
+        except Exception:
+            self.refresh_history.append((started, time.monotonic() - start, False))
+            self._async_adapt_update_interval(failed=True)
+            raise
+        self.refresh_history.append((started, time.monotonic() - start, True))
+
+        changed = (
+            self.data is not None
+            and self.data.get(KEY_TOR_CONNECTED) != data[KEY_TOR_CONNECTED]
+        )
+        if changed:
+            # Confirm the change by fresh request on recheck
+            self._cache.pop(KEY_MY_TOR_IP, None)
+        self._async_adapt_update_interval(
+            # Data of failed TOR requests is None
+            failed=data[KEY_TOR_EXIT_NODES] is None or data[KEY_MY_TOR_IP] is None,
+            changed=changed,
+        )
+        return data
+
+    @callback
+    def _async_adapt_update_interval(
+        self, failed: bool = False, changed: bool = False
+    ) -> None:
+        """Choose interval to next update by stability of state."""
+        if self._push_updates and not failed:
+            # Circuit changes are pushed, poll only to see rotated exit circuit
+            self.update_interval = CONTROL_POLL_INTERVAL
+            return
+        self.update_interval = self.scheduler.next(
+            failed=failed, changed=changed, expires_in=self._cache_expires_in()
+        )
+        _LOGGER.debug("Next update in %s", self.update_interval)
+
+    async def _async_fetch_data(self) -> dict[str, Any]:
+        """Fetch data from all sources."""
+        # The first refresh may reuse answers just got by config flow validation
+        # or by previous coordinator of reloaded entry
+        max_age = SINGLE_FLIGHT_FRESHNESS if self.data is None else 0
+        results = await asyncio.gather(
+            self._async_get_exit_nodes(),
+            self._async_fetch(
+                KEY_MY_TOR_IP,
+                partial(self.client.async_get_my_tor_ip, max_age=max_age),
+                # Expire before the next poll to see rotated exit circuit
+                CONTROL_POLL_INTERVAL if self._push_updates else timedelta(minutes=15),
+            ),
+            self._async_fetch(
+                KEY_MY_IP, partial(self.client.async_get_my_ip, max_age=max_age)
+            ),
+            self._async_probe_transfer(),
+            self._async_sample_circuits(),
+            self._async_probe_onion_services(),
+            return_exceptions=True,
+        )
+        if self.exit_nodes.fetch_duration is not None:
+            self.fetch_durations[KEY_TOR_EXIT_NODES] = self.exit_nodes.fetch_duration
+
+        data = {}
+        for key, result in zip((KEY_TOR_EXIT_NODES, KEY_MY_TOR_IP, KEY_MY_IP), results):
+            if isinstance(result, TorCheckApiClientAuthenticationError):
+                raise ConfigEntryAuthFailed(result) from result
+            if key != KEY_MY_IP and isinstance(
+                result, TorCheckApiClientCommunicationError
+            ):
+                _LOGGER.debug("Communication error: Can't connect to TOR network.")
+                result = None
+            elif isinstance(result, TorCheckApiClientError):
+                raise UpdateFailed(result) from result
+            elif isinstance(result, BaseException):
+                raise result
+            data[key] = result
+        for result in results[3:-1]:
+            if isinstance(result, BaseException):
+                raise result
+        if isinstance(onion_services := results[-1], BaseException):
+            raise onion_services
+        data[KEY_ONION_SERVICES] = onion_services
+
+        data[KEY_TOR_CONNECTED] = self._is_tor_connected(data)
+        data[KEY_TOR_GEOIP] = (
+            None
+            if self.geoip is None or data[KEY_MY_TOR_IP] is None
+            else await self.geoip.async_lookup(self.hass, data[KEY_MY_TOR_IP])
+        )
+        data[KEY_TOR_CIRCUITS] = (
+            None
+            if self._circuit_samples is None
+            else self._aggregate_circuits(
+                self._circuit_samples, data[KEY_TOR_EXIT_NODES]
+            )
+        )
+        return data
+
+    async def _async_probe_transfer(self) -> None:
+        """Measure transfer timings through TOR and directly from time to time."""
+        if self.transfer_probe_url is None or (
+            (now := dt_util.utcnow()) < self._transfer_probe_due
+        ):
+            return
+        self._transfer_probe_due = now + TRANSFER_PROBE_INTERVAL
+
+        results = await asyncio.gather(
+            self.client.async_measure_tor_transfer(self.transfer_probe_url),
+            self.client.async_measure_transfer(self.transfer_probe_url),
+            return_exceptions=True,
+        )
+        for (ttfb_key, throughput_key), result in zip(
+            (
+                (KEY_TOR_TTFB, KEY_TOR_THROUGHPUT),
+                (KEY_DIRECT_TTFB, KEY_DIRECT_THROUGHPUT),
+            ),
+            results,
+        ):
+            if isinstance(result, TorCheckApiClientError):
+                _LOGGER.debug("Can't measure transfer timings: %s", result)
+            elif isinstance(result, BaseException):
+                raise result
+            else:
+                self.transfer_stats[ttfb_key].add(result.ttfb * 1000)
+                self.transfer_stats[throughput_key].add(result.throughput / 1000)
+
+    async def _async_probe_onion_services(self) -> dict[str, Any] | None:
+        """Check reachability of all onion services at once."""
+        if self.onion_monitor is None:
+            return None
+        services = await self.onion_monitor.async_probe(self.client.async_probe_tor_url)
+        # Snapshot, so that entities see consistent data
+        return {url: replace(state) for url, state in services.items()}
+
+    async def _async_sample_circuits(self) -> None:
+        """Sample exit nodes of several TOR circuits from time to time."""
+        if self.circuit_sampler is None or (
+            (now := dt_util.utcnow()) < self._circuit_sampling_due
+        ):
+            return
+        self._circuit_sampling_due = now + CIRCUIT_SAMPLING_INTERVAL
+        self._circuit_samples = await self.circuit_sampler.async_sample()
+
+    @staticmethod
+    def _aggregate_circuits(
+        samples: list[CircuitSample], exit_nodes: TorExitNodes | None
+    ) -> dict[str, Any]:
+        """Return distinct exit nodes and latencies of sampled circuits."""
+        exits = sorted({sample.exit_ip for sample in samples if sample.exit_ip})
+        return {
+            CIRCUITS_EXITS: exits,
+            # Exit nodes missing from the list of exit nodes
+            CIRCUITS_UNLISTED: []
+            if exit_nodes is None
+            else [exit_ip for exit_ip in exits if exit_ip not in exit_nodes],
+            CIRCUITS_LATENCIES: [
+                round(sample.latency, 3) for sample in samples if sample.exit_ip
+            ],
+            CIRCUITS_FAILED: sum(sample.exit_ip is None for sample in samples),
         }
+
+    @staticmethod
+    def _is_tor_connected(data: dict[str, Any]) -> bool:
+        """Return true if TOR IP is one of exit nodes."""
+        exit_nodes: TorExitNodes | None = data.get(KEY_TOR_EXIT_NODES)
+        return exit_nodes is not None and data.get(KEY_MY_TOR_IP) in exit_nodes
+
+    async def _async_get_exit_nodes(self) -> TorExitNodes:
+        """Return exit nodes from local TOR consensus if available or shared list."""
+        if (
+            self._consensus is not None
+            and self._control is not None
+            and self._control.connected
+        ):
+            return self._consensus.exit_nodes
+        return await self.exit_nodes.async_get_exit_nodes()
+
+    @property
+    def _push_updates(self) -> bool:
+        """Return true if connectivity updates are pushed by TOR control port."""
+        return self._control is not None and self._control.connected
+
+    async def async_connect_control(
+        self, host: str, port: int, password: str | None = None
+    ) -> None:
+        """Get pushed connectivity updates from TOR control port instead of polling.
+
+        Coordinator falls back to polling while control port is not available.
+        """
+        self._control = TorControlClient(
+            host,
+            port,
+            password,
+            on_event=self._handle_control_event,
+            on_disconnect=self._handle_control_disconnect,
+        )
+        await self._async_start_control()
+
+    async def async_close_control(self) -> None:
+        """Close TOR control port connection."""
+        if self._unsub_control_reconnect is not None:
+            self._unsub_control_reconnect()
+            self._unsub_control_reconnect = None
+        if self._control is not None:
+            await self._control.async_close()
+            self._control = None
+
+    async def _async_start_control(self, *_: Any) -> None:
+        """Connect to TOR control port and subscribe to events."""
+        self._unsub_control_reconnect = None
         try:
-            if data[KEY_TOR_EXIT_NODES] == {}:
-                data[KEY_TOR_EXIT_NODES] = self._cache_set(
-                    KEY_TOR_EXIT_NODES,
-                    await self.client.async_get_tor_exit_nodes(),
-                    timedelta(days=1),
-                )
-            if data[KEY_MY_TOR_IP] is None:
-                data[KEY_MY_TOR_IP] = self._cache_set(
-                    KEY_MY_TOR_IP,
-                    await self.client.async_get_my_tor_ip(),
-                )
-        except TorCheckApiClientAuthenticationError as exception:
-            raise ConfigEntryAuthFailed(exception) from exception
-        except TorCheckApiClientCommunicationError:
-            _LOGGER.debug("Communication error: Can't connect to TOR network.")
+            await self._control.async_connect()
+            info = await self._control.async_get_info("status/circuit-established")
+            await self._async_load_consensus()
+            await self._control.async_set_events(
+                EVENT_CIRC, EVENT_STATUS_CLIENT, EVENT_NEWCONSENSUS
+            )
         except TorCheckApiClientError as exception:
-            raise UpdateFailed(exception) from exception
+            _LOGGER.warning("Can't use TOR control port: %s", exception)
+            await self._control.async_close()
+            if not isinstance(exception, TorCheckApiClientAuthenticationError):
+                self._schedule_control_reconnect()
+            return
+
+        self._circuit_established = info.get("status/circuit-established") == "1"
+        self.update_interval = CONTROL_POLL_INTERVAL
 
+    async def _async_load_consensus(self) -> None:
+        """Build exit nodes index from consensus known to local TOR."""
+        parser = TorConsensusParser()
         try:
-            if data[KEY_MY_IP] is None:
-                data[KEY_MY_IP] = self._cache_set(
-                    KEY_MY_IP,
-                    await self.client.async_get_my_ip(),
-                )
-        except TorCheckApiClientAuthenticationError as exception:
-            raise ConfigEntryAuthFailed(exception) from exception
+            await self._control.async_get_info_lines("ns/all", parser.feed_line)
+        except TorCheckApiClientCommunicationError:
+            raise
         except TorCheckApiClientError as exception:
-            raise UpdateFailed(exception) from exception
+            _LOGGER.debug("Can't get consensus from TOR: %s", exception)
+            return
 
-        data[KEY_TOR_CONNECTED] = data.get(KEY_MY_TOR_IP) in data.get(
-            KEY_TOR_EXIT_NODES
+        if self._consensus is None:
+            self._consensus = TorConsensusExitNodes()
+        self._consensus.apply(parser)
+        self._control.set_event_data_handler(
+            EVENT_NEWCONSENSUS, self._handle_consensus_line
         )
 
-        return data
+    @callback
+    def _handle_consensus_line(self, line: str) -> None:
+        """Parse next line of new consensus."""
+        if self._consensus_parser is None:
+            self._consensus_parser = TorConsensusParser()
+        self._consensus_parser.feed_line(line)
+
+    @callback
+    def _async_apply_consensus(self) -> None:
+        """Apply changes of new consensus to exit nodes index."""
+        parser, self._consensus_parser = self._consensus_parser, None
+        if parser is None or self._consensus is None:
+            return
+
+        added, removed = self._consensus.apply(parser)
+        _LOGGER.debug("New consensus: %d exit nodes added, %d removed", added, removed)
+        if (added or removed) and self.data is not None:
+            data = {**self.data, KEY_TOR_EXIT_NODES: self._consensus.exit_nodes}
+            data[KEY_TOR_CONNECTED] = self._is_tor_connected(data)
+            self.async_set_updated_data(data)
+
+    @callback
+    def _schedule_control_reconnect(self) -> None:
+        """Schedule next attempt to connect to TOR control port."""
+        self._unsub_control_reconnect = async_call_later(
+            self.hass, CONTROL_RECONNECT_DELAY, self._async_start_control
+        )
+
+    @callback
+    def _handle_control_disconnect(self) -> None:
+        """Fall back to polling when TOR control connection is lost."""
+        _LOGGER.warning("TOR control connection lost, falling back to polling")
+        self.update_interval = self.scheduler.min_interval
+        self.hass.async_create_task(self.async_request_refresh())
+        self._schedule_control_reconnect()
+
+    @callback
+    def _handle_control_event(self, event: str, args: str) -> None:
+        """Handle asynchronous event from TOR control port."""
+        if event == EVENT_STATUS_CLIENT:
+            action = (args.split()[1:2] or [""])[0]
+            if action == "CIRCUIT_ESTABLISHED":
+                self._async_set_circuit_established(True)
+            elif action == "CIRCUIT_NOT_ESTABLISHED":
+                self._async_set_circuit_established(False)
+        elif event == EVENT_CIRC and args.split()[1:2] == ["BUILT"]:
+            self._async_set_circuit_established(True)
+        elif event == EVENT_NEWCONSENSUS:
+            self._async_apply_consensus()
+
+    @callback
+    def _async_set_circuit_established(self, established: bool) -> None:
+        """Push connectivity change to entities."""
+        if established == self._circuit_established:
+            return
+        self._circuit_established = established
+        self._cache.pop(KEY_MY_TOR_IP, None)
+
+        if established:
+            # Check new exit node
+            self.hass.async_create_task(self.async_request_refresh())
+        elif self.data is not None:
+            self.async_set_updated_data(
+                {
+                    **self.data,
+                    KEY_MY_TOR_IP: None,
+                    KEY_TOR_CONNECTED: False,
+                    KEY_TOR_GEOIP: None,
+                }
+            )
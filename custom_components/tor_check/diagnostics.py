@@ -0,0 +1,130 @@
+"""Diagnostics support for TOR Check custom component."""
+from __future__ import annotations
+
+import time
+from typing import Any, Final
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+import homeassistant.util.dt as dt_util
+
+from .api import CircuitBreaker, RequestPolicy
+from .const import CONF_CONTROL_PASSWORD, DOMAIN
+from .coordinator import KEY_TOR_EXIT_NODES, TorCheckDataUpdateCoordinator
+from .exit_nodes import TorExitNodes
+from .proxy import DATA_REQUEST_POLICIES, DATA_REQUEST_TRACER
+from .tracing import RequestTracer
+
+TO_REDACT: Final = {CONF_CONTROL_PASSWORD}
+
+
+def _round(seconds: float | None) -> float | None:
+    """Round seconds to tenths of millisecond."""
+    return None if seconds is None else round(seconds, 4)
+
+
+def _coordinator_diagnostics(coordinator: DataUpdateCoordinator) -> dict[str, Any]:
+    """Return state of coordinator and durations of its last refreshes."""
+    exit_nodes: TorExitNodes | None = (coordinator.data or {}).get(KEY_TOR_EXIT_NODES)
+    result: dict[str, Any] = {
+        "last_update_success": coordinator.last_update_success,
+        "update_interval": None
+        if coordinator.update_interval is None
+        else coordinator.update_interval.total_seconds(),
+        "refreshes": [
+            {
+                "started": started.isoformat(),
+                "duration": _round(duration),
+                "success": success,
+            }
+            for started, duration, success in coordinator.refresh_history
+        ],
+        # Index of exit nodes used by the last refresh
+        "exit_nodes": None
+        if exit_nodes is None
+        else {"count": len(exit_nodes), "bytes": exit_nodes.nbytes},
+    }
+    if isinstance(coordinator, TorCheckDataUpdateCoordinator):
+        result["cache"] = dict(coordinator.cache_stats)
+        result["fetch_durations"] = {
+            key: _round(duration)
+            for key, duration in coordinator.fetch_durations.items()
+        }
+    return result
+
+
+def _breaker_diagnostics(breaker: CircuitBreaker) -> dict[str, Any]:
+    """Return failures in a row and seconds left until circuit can be probed."""
+    return {
+        "failures": breaker.failures,
+        "open_for": None
+        if breaker.open_until is None
+        else _round(max(breaker.open_until - time.monotonic(), 0)),
+    }
+
+
+def _policy_diagnostics(policy: RequestPolicy) -> dict[str, Any]:
+    """Return circuit breakers and retry budget of requests through session."""
+    return {
+        "session": _breaker_diagnostics(policy.breaker),
+        "endpoints": {
+            host: _breaker_diagnostics(breaker)
+            for host, breaker in policy.endpoint_breakers.items()
+        },
+        "retry_budget": round(policy.budget.balance, 2),
+    }
+
+
+@callback
+def _async_shared_diagnostics(hass: HomeAssistant) -> dict[str, Any]:
+    """Return circuit breakers and timings of the last requests of all entries."""
+    domain_data = hass.data.get(DOMAIN, {})
+    tracer: RequestTracer | None = domain_data.get(DATA_REQUEST_TRACER)
+    policies: dict[str | None, RequestPolicy] = domain_data.get(
+        DATA_REQUEST_POLICIES, {}
+    )
+    return {
+        "circuits": {
+            proxy_url or "direct": _policy_diagnostics(policy)
+            for proxy_url, policy in policies.items()
+        },
+        "requests": []
+        if tracer is None
+        else [
+            {
+                **(timings := request.as_dict()),
+                "started": dt_util.utc_from_timestamp(timings["started"]).isoformat(),
+            }
+            for request in tracer.history
+        ],
+    }
+
+
+@callback
+def async_get_debug_info(hass: HomeAssistant) -> dict[str, Any]:
+    """Return diagnostics of all loaded config entries."""
+    domain_data = hass.data.get(DOMAIN, {})
+    return {
+        "entries": {
+            entry.entry_id: {
+                "title": entry.title,
+                **_coordinator_diagnostics(domain_data[entry.entry_id]),
+            }
+            for entry in hass.config_entries.async_entries(DOMAIN)
+            if entry.entry_id in domain_data
+        },
+        **_async_shared_diagnostics(hass),
+    }
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    return {
+        "entry": async_redact_data(entry.as_dict(), TO_REDACT),
+        "coordinator": _coordinator_diagnostics(hass.data[DOMAIN][entry.entry_id]),
+        **_async_shared_diagnostics(hass),
+    }
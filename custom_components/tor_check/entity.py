@@ -1,18 +1,75 @@
 """TOR Check custom component entity class."""
 from __future__ import annotations
 
+from typing import Any, Final
+
+from homeassistant.core import callback
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import ATTRIBUTION
 from .coordinator import TorCheckDataUpdateCoordinator
+from .fleet import KEY_DAEMONS, TorFleetDataUpdateCoordinator
+
+_UNSET: Final = object()
 
 
 class TorCheckEntity(CoordinatorEntity):
-    """TOR Check custom component entity class."""
+    """TOR Check custom component entity class.
+
+    Most coordinator updates change nothing, so state is written only when
+    fingerprint of data the entity depends on has changed.
+    """
 
     _attr_attribution = ATTRIBUTION
+    # Keys of coordinator data the entity state depends on
+    _data_keys: tuple[str, ...] = ()
 
     def __init__(self, coordinator: TorCheckDataUpdateCoordinator) -> None:
         """Initialize."""
         super().__init__(coordinator)
         self._attr_unique_id = coordinator.config_entry.entry_id
+        self._fingerprint: Any = _UNSET
+
+    def _get_fingerprint(self) -> Any:
+        """Return cheap fingerprint of data the entity state depends on.
+
+        None means the state must be written on every update.
+        """
+        if not self._data_keys:
+            return None
+        data = self._data
+        return (self.available, *(data.get(key) for key in self._data_keys))
+
+    async def async_added_to_hass(self) -> None:
+        """Remember fingerprint of data the initial state is written from."""
+        await super().async_added_to_hass()
+        self._fingerprint = self._get_fingerprint()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state if data of the entity has changed."""
+        fingerprint = self._get_fingerprint()
+        if fingerprint is not None and fingerprint == self._fingerprint:
+            return
+        self._fingerprint = fingerprint
+        super()._handle_coordinator_update()
+
+    @property
+    def _data(self) -> dict[str, Any]:
+        """Return coordinator data, empty until the first refresh completes."""
+        return self.coordinator.data or {}
+
+
+class TorCheckDaemonEntity(TorCheckEntity):
+    """TOR Check entity of one TOR daemon of fleet."""
+
+    def __init__(self, coordinator: TorFleetDataUpdateCoordinator, daemon: str) -> None:
+        """Initialize."""
+        super().__init__(coordinator)
+        self._daemon = daemon
+
+    @property
+    def _data(self) -> dict[str, Any]:
+        """Return coordinator data of the daemon."""
+        daemons = (self.coordinator.data or {}).get(KEY_DAEMONS) or {}
+        return daemons.get(self._daemon) or {}
@@ -0,0 +1,248 @@
+"""Compact index of TOR exit nodes for TOR Check custom component."""
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Iterator
+from functools import partial
+import ipaddress
+from itertools import chain, groupby
+import socket
+import sys
+from typing import Final
+
+_IPV4_TYPECODE: Final = "I" if array("I").itemsize == 4 else "L"
+
+_inet_pton_ipv4: Final = partial(socket.inet_pton, socket.AF_INET)
+
+
+def _parse_address(address: str) -> tuple[int, int] | None:
+    """Convert textual IP address into (version, integer) pair."""
+    try:
+        return 4, int.from_bytes(socket.inet_pton(socket.AF_INET, address), "big")
+    except (OSError, TypeError, ValueError):
+        pass
+    try:
+        return 6, int.from_bytes(socket.inet_pton(socket.AF_INET6, address), "big")
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def _pack_ipv4(addresses: list[str]) -> tuple[list[str], array]:
+    """Convert IPv4 addresses to integers in bulk.
+
+    Return converted addresses and their integers, malformed addresses are
+    skipped. Addresses are converted one by one only if batch has any of them.
+    """
+    try:
+        packed = b"".join(map(_inet_pton_ipv4, addresses))
+    except (OSError, TypeError, ValueError):
+        valid = []
+        chunks = []
+        for address in addresses:
+            try:
+                chunks.append(_inet_pton_ipv4(address))
+            except (OSError, TypeError, ValueError):
+                continue
+            valid.append(address)
+        addresses, packed = valid, b"".join(chunks)
+    values = array(_IPV4_TYPECODE)
+    values.frombytes(packed)
+    if sys.byteorder == "little":
+        values.byteswap()
+    return addresses, values
+
+
+def _unique_sorted(values: Iterable[int]) -> Iterator[int]:
+    """Return sorted values without duplicates."""
+    return (value for value, _ in groupby(sorted(values)))
+
+
+class TorExitNodes:
+    """Immutable set of TOR exit node IP addresses.
+
+    IPv4 addresses are kept as a sorted array of packed 32-bit integers, IPv6
+    addresses as a sorted tuple of integers. Membership and network prefix
+    queries are binary searches, so they never scan the whole list.
+    """
+
+    __slots__ = ("_ipv4", "_ipv6")
+
+    def __init__(self, ipv4: Iterable[int] = (), ipv6: Iterable[int] = ()) -> None:
+        """Initialize."""
+        self._ipv4 = array(_IPV4_TYPECODE, _unique_sorted(ipv4))
+        self._ipv6 = tuple(_unique_sorted(ipv6))
+
+    @classmethod
+    def from_strings(cls, addresses: Iterable[str]) -> TorExitNodes:
+        """Build index from textual IP addresses, skipping malformed ones."""
+        builder = TorExitNodesBuilder()
+        for address in addresses:
+            builder.add(address)
+        return builder.build()
+
+    @classmethod
+    def from_bytes(cls, ipv4: bytes, ipv6: bytes) -> TorExitNodes:
+        """Build index from packed big-endian addresses."""
+        if len(ipv4) % 4 or len(ipv6) % 16:
+            raise ValueError("Malformed packed addresses")
+        values = array(_IPV4_TYPECODE)
+        values.frombytes(ipv4)
+        if sys.byteorder == "little":
+            values.byteswap()
+        return cls(
+            values,
+            (
+                int.from_bytes(ipv6[pos : pos + 16], "big")
+                for pos in range(0, len(ipv6), 16)
+            ),
+        )
+
+    def to_bytes(self) -> tuple[bytes, bytes]:
+        """Return IPv4 and IPv6 addresses packed as big-endian bytes."""
+        ipv4 = array(_IPV4_TYPECODE, self._ipv4)
+        if sys.byteorder == "little":
+            ipv4.byteswap()
+        return ipv4.tobytes(), b"".join(
+            value.to_bytes(16, "big") for value in self._ipv6
+        )
+
+    def with_changes(self, added: TorExitNodes, removed: TorExitNodes) -> TorExitNodes:
+        """Return new index with some addresses added and removed."""
+        return TorExitNodes(
+            chain(
+                (value for value in self._ipv4 if not removed._has(4, value)),
+                added._ipv4,
+            ),
+            chain(
+                (value for value in self._ipv6 if not removed._has(6, value)),
+                added._ipv6,
+            ),
+        )
+
+    def _values(self, version: int) -> array | tuple[int, ...]:
+        """Return sorted values for IP version."""
+        return self._ipv4 if version == 4 else self._ipv6
+
+    def _has(self, version: int, value: int) -> bool:
+        """Return true if integer address of IP version is in the index."""
+        values = self._values(version)
+        pos = bisect_left(values, value)
+        return pos < len(values) and values[pos] == value
+
+    def __contains__(self, address: object) -> bool:
+        """Return true if address is a TOR exit node."""
+        if not isinstance(address, str) or (parsed := _parse_address(address)) is None:
+            return False
+        return self._has(*parsed)
+
+    def _count_network(self, net: ipaddress.IPv4Network | ipaddress.IPv6Network) -> int:
+        """Return number of exit nodes inside parsed IP network."""
+        values = self._values(net.version)
+        return bisect_right(values, int(net.broadcast_address)) - bisect_left(
+            values, int(net.network_address)
+        )
+
+    def count_network(self, network: str) -> int:
+        """Return number of exit nodes inside IP network (CIDR prefix)."""
+        try:
+            return self._count_network(ipaddress.ip_network(network, strict=False))
+        except ValueError:
+            return 0
+
+    def lookup(self, queries: Iterable[str]) -> dict[str, int | None]:
+        """Return number of exit nodes in each of IP addresses or networks.
+
+        Result is 0 or 1 for address and None for malformed query. IPv4
+        addresses are converted and matched in bulk, without per address
+        Python calls, so large batches are answered in a single pass.
+        """
+        queries = list(queries)
+        results: dict[str, int | None] = {}
+        ipv4 = [
+            query
+            for query in queries
+            if isinstance(query, str) and "/" not in query and ":" not in query
+        ]
+        ipv4, values = _pack_ipv4(ipv4)
+        exits = set(values).intersection(self._ipv4)
+        results.update(zip(ipv4, map(int, map(exits.__contains__, values))))
+
+        # Networks, IPv6 addresses and malformed addresses
+        for query in queries:
+            if query in results:
+                continue
+            if isinstance(query, str) and "/" in query:
+                try:
+                    net = ipaddress.ip_network(query, strict=False)
+                except ValueError:
+                    results[query] = None
+                else:
+                    results[query] = self._count_network(net)
+            elif (parsed := _parse_address(query)) is None:
+                results[query] = None
+            else:
+                results[query] = int(self._has(*parsed))
+        return results
+
+    def __len__(self) -> int:
+        """Return number of exit nodes."""
+        return len(self._ipv4) + len(self._ipv6)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over exit node addresses as strings."""
+        for value in self._ipv4:
+            yield str(ipaddress.IPv4Address(value))
+        for value in self._ipv6:
+            yield str(ipaddress.IPv6Address(value))
+
+    def __eq__(self, other: object) -> bool:
+        """Return true if both indexes contain same addresses."""
+        if not isinstance(other, TorExitNodes):
+            return NotImplemented
+        return self._ipv4 == other._ipv4 and self._ipv6 == other._ipv6
+
+    def __repr__(self) -> str:
+        """Return string representation."""
+        return f"<TorExitNodes ipv4={len(self._ipv4)} ipv6={len(self._ipv6)}>"
+
+    @property
+    def nbytes(self) -> int:
+        """Return approximate memory footprint of stored addresses."""
+        return self._ipv4.itemsize * len(self._ipv4) + 16 * len(self._ipv6)
+
+
+class TorExitNodesBuilder:
+    """Incremental builder of TOR exit nodes index.
+
+    Lines are parsed one by one straight into packed arrays, so the list never
+    has to be kept in memory as a whole text.
+    """
+
+    def __init__(self) -> None:
+        """Initialize."""
+        self._ipv4 = array(_IPV4_TYPECODE)
+        self._ipv6: list[int] = []
+
+    def add(self, line: str | bytes) -> bool:
+        """Add address from line, return false for comments and malformed lines."""
+        if isinstance(line, bytes):
+            line = line.decode("ascii", "replace")
+        if (
+            not (address := line.split("#", 1)[0].strip())
+            or (parsed := _parse_address(address)) is None
+        ):
+            return False
+        if parsed[0] == 4:
+            self._ipv4.append(parsed[1])
+        else:
+            self._ipv6.append(parsed[1])
+        return True
+
+    def __len__(self) -> int:
+        """Return number of added addresses."""
+        return len(self._ipv4) + len(self._ipv6)
+
+    def build(self) -> TorExitNodes:
+        """Return index of added addresses."""
+        return TorExitNodes(self._ipv4, self._ipv6)
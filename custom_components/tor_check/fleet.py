@@ -0,0 +1,208 @@
+"""Fleet of TOR daemons for TOR Check custom component."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Iterable, Mapping
+from datetime import datetime, timedelta
+import logging
+import time
+from typing import Any, Final
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+import homeassistant.util.dt as dt_util
+
+from .api import (
+    TorCheckApiClient,
+    TorCheckApiClientCommunicationError,
+    TorCheckApiClientError,
+)
+from .const import DOMAIN, LOGGER
+from .coordinator import (
+    DEFAULT_MAX_UPDATE_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    KEY_MY_TOR_IP,
+    KEY_TOR_CONNECTED,
+    KEY_TOR_EXIT_NODES,
+    REFRESH_HISTORY_SIZE,
+    TorExitNodesService,
+)
+from .exit_nodes import TorExitNodes
+from .scheduler import AdaptiveUpdateInterval
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+KEY_DAEMONS: Final = "daemons"
+
+# Maximum number of daemons to probe at once
+FLEET_PARALLEL: Final = 16
+# Maximum number of daemons in one fleet
+FLEET_MAX_SIZE: Final = 256
+
+
+def format_endpoint(host: str, port: int) -> str:
+    """Return SOCKS endpoint as "host:port" string."""
+    return f"[{host}]:{port}" if ":" in host else f"{host}:{port}"
+
+
+def parse_endpoints(specs: Iterable[str]) -> list[tuple[str, int]]:
+    """Return SOCKS endpoints from specs like "host:9050" or "host:9050-9059".
+
+    Raise ValueError if any of specs is invalid or there are too many endpoints.
+    """
+    endpoints: dict[tuple[str, int], None] = {}
+    for spec in specs:
+        host, _, ports = spec.strip().rpartition(":")
+        host = host.strip("[]")
+        first, _, last = ports.partition("-")
+        first_port = int(first)
+        last_port = int(last or first)
+        if not host or not 0 < first_port <= last_port <= 65535:
+            raise ValueError(f"Invalid SOCKS endpoint: {spec}")
+        endpoints.update(
+            ((host, port), None) for port in range(first_port, last_port + 1)
+        )
+        if len(endpoints) > FLEET_MAX_SIZE:
+            raise ValueError(f"Fleet can't have more than {FLEET_MAX_SIZE} daemons")
+    return list(endpoints)
+
+
+class TorFleetDataUpdateCoordinator(DataUpdateCoordinator):
+    """Check connection of many TOR daemons by a single update loop.
+
+    Due daemons are probed concurrently, with limited number of simultaneous
+    probes, and are checked against the shared list of exit nodes. Every
+    daemon backs off on its own, so an unreachable one doesn't slow down
+    rechecks of the rest of the fleet.
+    """
+
+    config_entry: ConfigEntry
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        clients: Mapping[str, TorCheckApiClient],
+        exit_nodes: TorExitNodesService,
+        min_update_interval: timedelta = DEFAULT_MIN_UPDATE_INTERVAL,
+        max_update_interval: timedelta = DEFAULT_MAX_UPDATE_INTERVAL,
+        parallel: int = FLEET_PARALLEL,
+    ) -> None:
+        """Initialize."""
+        self.clients = clients
+        self.exit_nodes = exit_nodes
+        self.scheduler = AdaptiveUpdateInterval(
+            min_update_interval, max_update_interval
+        )
+        self.daemon_schedulers = {
+            daemon: AdaptiveUpdateInterval(min_update_interval, max_update_interval)
+            for daemon in clients
+        }
+        # When every daemon is due to be probed again
+        self._next_probe: dict[str, datetime] = {}
+        self._parallel = parallel
+        # Start time, seconds spent and success of the last refreshes
+        self.refresh_history: deque[tuple[datetime, float, bool]] = deque(
+            maxlen=REFRESH_HISTORY_SIZE
+        )
+        super().__init__(
+            hass=hass,
+            logger=LOGGER,
+            name=DOMAIN,
+            update_interval=min_update_interval,
+        )
+
+    async def _async_probe(
+        self, daemon: str, semaphore: asyncio.Semaphore
+    ) -> str | None:
+        """Get TOR IP of daemon, None if it can't be reached."""
+        async with semaphore:
+            try:
+                return await self.clients[daemon].async_get_my_tor_ip()
+            except TorCheckApiClientError as exception:
+                _LOGGER.debug("Can't check TOR daemon %s: %s", daemon, exception)
+                return None
+
+    async def _async_update_data(self) -> dict[str, Any]:
+        """Probe all daemons and track time spent."""
+        started, start = dt_util.utcnow(), time.monotonic()
+        try:
+            data = await self._async_probe_fleet()
+        except Exception:
+            self.refresh_history.append((started, time.monotonic() - start, False))
+            raise
+        self.refresh_history.append((started, time.monotonic() - start, True))
+        return data
+
+    async def _async_probe_fleet(self) -> dict[str, Any]:
+        """Probe due daemons and adapt interval to next update."""
+        now = dt_util.utcnow()
+        previous = (self.data or {}).get(KEY_DAEMONS) or {}
+        due = [
+            daemon
+            for daemon in self.clients
+            if daemon not in previous or self._next_probe.get(daemon, now) <= now
+        ]
+        semaphore = asyncio.Semaphore(self._parallel)
+        exit_nodes, *tor_ips = await asyncio.gather(
+            self.exit_nodes.async_get_exit_nodes(),
+            *(self._async_probe(daemon, semaphore) for daemon in due),
+            return_exceptions=True,
+        )
+        if isinstance(exit_nodes, TorCheckApiClientCommunicationError):
+            _LOGGER.debug("Communication error: Can't get TOR exit nodes.")
+            exit_nodes = None
+        elif isinstance(exit_nodes, BaseException):
+            self._async_adapt_update_interval(now, failed=True)
+            if isinstance(exit_nodes, TorCheckApiClientError):
+                raise UpdateFailed(exit_nodes) from exit_nodes
+            raise exit_nodes
+        for tor_ip in tor_ips:
+            if isinstance(tor_ip, BaseException):
+                raise tor_ip
+
+        probed = dict(zip(due, tor_ips))
+        daemons = {}
+        for daemon in self.clients:
+            if daemon not in probed:
+                # Keep TOR IP until the daemon is due again
+                tor_ip = previous[daemon][KEY_MY_TOR_IP]
+            else:
+                tor_ip = probed[daemon]
+            connected = self._is_tor_connected(exit_nodes, tor_ip)
+            daemons[daemon] = {KEY_MY_TOR_IP: tor_ip, KEY_TOR_CONNECTED: connected}
+            if daemon in probed:
+                self._next_probe[daemon] = now + self.daemon_schedulers[daemon].next(
+                    failed=tor_ip is None,
+                    changed=daemon in previous
+                    and previous[daemon][KEY_TOR_CONNECTED] != connected,
+                )
+        self._async_adapt_update_interval(
+            now,
+            failed=exit_nodes is None
+            or all(data[KEY_MY_TOR_IP] is None for data in daemons.values()),
+        )
+        return {KEY_TOR_EXIT_NODES: exit_nodes, KEY_DAEMONS: daemons}
+
+    @callback
+    def _async_adapt_update_interval(self, now: datetime, failed: bool) -> None:
+        """Choose interval to next update by the earliest due daemon.
+
+        Shared list of exit nodes or all daemons failing backs off the fleet.
+        """
+        interval = (
+            min(self._next_probe.values(), default=now + self.scheduler.max_interval)
+            - now
+        )
+        if failed:
+            interval = min(interval, self.scheduler.next(failed=True))
+        else:
+            self.scheduler.next()
+        self.update_interval = max(interval, self.scheduler.min_interval)
+        _LOGGER.debug("Next update in %s", self.update_interval)
+
+    @staticmethod
+    def _is_tor_connected(exit_nodes: TorExitNodes | None, tor_ip: str | None) -> bool:
+        """Return true if TOR IP is one of exit nodes."""
+        return exit_nodes is not None and tor_ip is not None and tor_ip in exit_nodes
@@ -0,0 +1,95 @@
+"""Offline GeoIP enrichment for TOR Check custom component.
+
+Uses local databases in MaxMind DB format (e.g. GeoLite2 Country, GeoLite2 ASN
+or DB-IP Lite). Databases are memory-mapped, so they are not loaded into memory.
+"""
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterable
+import logging
+from typing import Any, Final
+
+import maxminddb
+
+from homeassistant.core import HomeAssistant
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+GEOIP_COUNTRY: Final = "country"
+GEOIP_COUNTRY_NAME: Final = "country_name"
+GEOIP_ASN: Final = "asn"
+GEOIP_AS_ORGANIZATION: Final = "as_organization"
+
+# Number of recent IP addresses to remember GeoIP data of
+CACHE_SIZE: Final = 128
+
+
+def _extract(record: dict[str, Any]) -> dict[str, Any]:
+    """Return GeoIP data from database record."""
+    data = {}
+    if country := record.get("country") or record.get("registered_country"):
+        data[GEOIP_COUNTRY] = country.get("iso_code")
+        data[GEOIP_COUNTRY_NAME] = country.get("names", {}).get("en")
+    if (asn := record.get("autonomous_system_number")) is not None:
+        data[GEOIP_ASN] = asn
+        data[GEOIP_AS_ORGANIZATION] = record.get("autonomous_system_organization")
+    return data
+
+
+class GeoIpReader:
+    """Reader of country and ASN of IP addresses from local databases."""
+
+    def __init__(self, readers: Iterable[maxminddb.Reader]) -> None:
+        """Initialize."""
+        self._readers = list(readers)
+        self._cache: OrderedDict[str, dict[str, Any]] = OrderedDict()
+
+    @classmethod
+    def open(cls, paths: Iterable[str]) -> GeoIpReader:
+        """Open memory-mapped databases, skipping ones which can't be opened.
+
+        This method does blocking I/O, so it must be run in the executor.
+        """
+        readers = []
+        for path in paths:
+            try:
+                readers.append(maxminddb.open_database(path, maxminddb.MODE_MMAP))
+            except (OSError, ValueError) as exception:
+                _LOGGER.warning("Can't open GeoIP database %s: %s", path, exception)
+        return cls(readers)
+
+    def close(self) -> None:
+        """Close databases."""
+        for reader in self._readers:
+            reader.close()
+        self._readers.clear()
+        self._cache.clear()
+
+    def lookup(self, address: str) -> dict[str, Any]:
+        """Return GeoIP data of IP address from all databases.
+
+        Reading memory-mapped file may block, so it must be run in the executor.
+        """
+        data: dict[str, Any] = {}
+        for reader in self._readers:
+            try:
+                record = reader.get(address)
+            except ValueError:
+                return {}
+            if isinstance(record, dict):
+                data.update(_extract(record))
+        return data
+
+    async def async_lookup(self, hass: HomeAssistant, address: str) -> dict[str, Any]:
+        """Return GeoIP data of IP address, reading databases on cache miss."""
+        if (data := self._cache.get(address)) is not None:
+            self._cache.move_to_end(address)
+            return data
+
+        data = self._cache[address] = await hass.async_add_executor_job(
+            self.lookup, address
+        )
+        if len(self._cache) > CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return data
@@ -0,0 +1,116 @@
+"""HTTP middleware to filter requests from TOR exit nodes."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+import logging
+from typing import Final
+
+from aiohttp import web
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN,
+    HTTP_FILTER_LOG,
+    HTTP_FILTER_OFF,
+    HTTP_FILTER_REJECT,
+)
+from .exit_nodes import TorExitNodes
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+DATA_HTTP_FILTER: Final = "http_filter"
+
+# Request key set to true for requests from TOR exit nodes
+KEY_TOR_EXIT: Final = "tor_check_exit_node"
+
+# Number of recent client IPs to remember classification of
+LRU_SIZE: Final = 256
+
+
+class TorExitFilter:
+    """Classifier of HTTP clients by list of TOR exit nodes.
+
+    Recent client IPs are kept in a small LRU cache, so usual requests are
+    answered by one dict lookup. Exit nodes index and its cache are replaced
+    together by a single assignment, so requests never see them mismatched.
+    """
+
+    def __init__(self, size: int = LRU_SIZE) -> None:
+        """Initialize."""
+        self._size = size
+        self._state: tuple[TorExitNodes, OrderedDict[str, bool]] = (
+            TorExitNodes(),
+            OrderedDict(),
+        )
+        self.action = HTTP_FILTER_OFF
+        # Config entry which set the action
+        self.owner: str | None = None
+
+    @property
+    def exit_nodes(self) -> TorExitNodes:
+        """Return current exit nodes index."""
+        return self._state[0]
+
+    def set_exit_nodes(self, exit_nodes: TorExitNodes) -> None:
+        """Swap exit nodes index."""
+        if exit_nodes is not self._state[0]:
+            self._state = (exit_nodes, OrderedDict())
+
+    def is_tor_exit(self, address: str) -> bool:
+        """Return true if address is a TOR exit node."""
+        exit_nodes, cache = self._state
+        if (result := cache.get(address)) is not None:
+            cache.move_to_end(address)
+            return result
+
+        result = cache[address] = address in exit_nodes
+        if len(cache) > self._size:
+            cache.popitem(last=False)
+        return result
+
+    @web.middleware
+    async def middleware(
+        self,
+        request: web.Request,
+        handler: Callable[[web.Request], Awaitable[web.StreamResponse]],
+    ) -> web.StreamResponse:
+        """Tag, log or reject requests from TOR exit nodes."""
+        if (
+            self.action == HTTP_FILTER_OFF
+            or request.remote is None
+            or not self.is_tor_exit(request.remote)
+        ):
+            return await handler(request)
+
+        request[KEY_TOR_EXIT] = True
+        if self.action == HTTP_FILTER_LOG:
+            _LOGGER.warning(
+                "Request from TOR exit node %s to %s", request.remote, request.path
+            )
+        elif self.action == HTTP_FILTER_REJECT:
+            _LOGGER.debug("Rejected request from TOR exit node %s", request.remote)
+            raise web.HTTPForbidden
+        return await handler(request)
+
+
+@callback
+def async_get_http_filter(hass: HomeAssistant) -> TorExitFilter | None:
+    """Return TOR exit nodes filter of HTTP server, installing it on first use.
+
+    Middleware can't be added once server is started, so None is returned
+    if it wasn't installed on Home Assistant startup.
+
+    This method must be run in the event loop.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (http_filter := domain_data.get(DATA_HTTP_FILTER)) is not None:
+        return http_filter
+
+    if (http := getattr(hass, "http", None)) is None or http.app.frozen:
+        return None
+
+    http_filter = domain_data[DATA_HTTP_FILTER] = TorExitFilter()
+    http.app.middlewares.append(http_filter.middleware)
+    return http_filter
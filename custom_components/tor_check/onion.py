@@ -0,0 +1,112 @@
+"""Onion services reachability monitor for TOR Check custom component."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import dataclass
+import logging
+import time
+from typing import Final
+from urllib.parse import urlparse
+
+from .api import TorCheckApiClientError
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+# Maximum number of onion services to probe at once
+ONION_PROBE_PARALLEL: Final = 4
+# Seconds to wait for answer of onion service
+ONION_PROBE_TIMEOUT: Final = 30
+# Seconds to wait before the first retry of unreachable service, doubled after
+# every next failure up to maximum
+ONION_BACKOFF_MIN: Final = 60
+ONION_BACKOFF_MAX: Final = 30 * 60
+
+
+def is_onion_url(url: str) -> bool:
+    """Return true if URL points to onion service."""
+    try:
+        parsed = urlparse(url)
+    except ValueError:
+        return False
+    hostname = parsed.hostname or ""
+    return parsed.scheme in ("http", "https") and hostname.endswith(".onion")
+
+
+@dataclass
+class OnionServiceState:
+    """Last known state of onion service."""
+
+    reachable: bool | None = None
+    # Seconds to get answer from service
+    latency: float | None = None
+    error: str | None = None
+    # Number of failed probes in a row
+    failures: int = 0
+    # Monotonic time of the next probe
+    next_probe: float = 0
+
+
+class OnionServicesMonitor:
+    """Reachability monitor of several onion services.
+
+    All services due to check are probed concurrently by one call, with limited
+    number of simultaneous probes. Unreachable services are retried with
+    exponential backoff.
+    """
+
+    def __init__(
+        self,
+        urls: Iterable[str],
+        parallel: int = ONION_PROBE_PARALLEL,
+        timeout: float = ONION_PROBE_TIMEOUT,
+    ) -> None:
+        """Initialize."""
+        self.services: dict[str, OnionServiceState] = {
+            url: OnionServiceState() for url in urls
+        }
+        self._parallel = parallel
+        self._timeout = timeout
+
+    async def _async_probe(
+        self,
+        url: str,
+        probe: Callable[[str, float], Awaitable[float]],
+        semaphore: asyncio.Semaphore,
+    ) -> None:
+        """Probe single onion service and update its state."""
+        state = self.services[url]
+        async with semaphore:
+            try:
+                state.latency = await probe(url, self._timeout)
+            except TorCheckApiClientError as exception:
+                _LOGGER.debug("Onion service %s is unreachable: %s", url, exception)
+                state.reachable = False
+                state.latency = None
+                state.error = str(exception) or type(exception).__name__
+                state.failures += 1
+                state.next_probe = time.monotonic() + min(
+                    ONION_BACKOFF_MIN * 2 ** min(state.failures - 1, 10),
+                    ONION_BACKOFF_MAX,
+                )
+                return
+
+        state.reachable = True
+        state.error = None
+        state.failures = 0
+        state.next_probe = 0
+
+    async def async_probe(
+        self, probe: Callable[[str, float], Awaitable[float]]
+    ) -> dict[str, OnionServiceState]:
+        """Probe all services due to check, return states of all services."""
+        semaphore = asyncio.Semaphore(self._parallel)
+        now = time.monotonic()
+        await asyncio.gather(
+            *(
+                self._async_probe(url, probe, semaphore)
+                for url, state in self.services.items()
+                if state.next_probe <= now
+            )
+        )
+        return self.services
@@ -0,0 +1,280 @@
+"""Client sessions shared between users of TOR Check custom component."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime
+from ssl import SSLContext
+from types import MappingProxyType
+from typing import Final
+
+import aiohttp
+from aiohttp.hdrs import USER_AGENT
+from aiohttp_socks import ProxyConnector
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import (
+    ENABLE_CLEANUP_CLOSED,
+    MAXIMUM_CONNECTIONS,
+    MAXIMUM_CONNECTIONS_PER_HOST,
+    SERVER_SOFTWARE,
+    WARN_CLOSE_MSG,
+    HassClientResponse,
+    async_create_clientsession,
+)
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.frame import warn_use
+from homeassistant.helpers.json import json_dumps
+from homeassistant.loader import bind_hass
+from homeassistant.util import ssl as ssl_util
+
+from .api import RequestPolicy, SingleFlight
+from .const import DOMAIN
+from .tracing import RequestTracer
+
+DATA_PROXY_SESSIONS: Final = "proxy_sessions"
+DATA_SINGLE_FLIGHT: Final = "single_flight"
+DATA_REQUEST_TRACER: Final = "request_tracer"
+DATA_DIRECT_SESSION: Final = "direct_session"
+DATA_REQUEST_POLICIES: Final = "request_policies"
+
+# Seconds to keep unused proxy session open for reuse
+PROXY_SESSION_LINGER: Final = 60
+
+
+@dataclass
+class _SharedProxySession:
+    """ClientSession for proxy server shared between its users."""
+
+    key: tuple[str, bool]
+    session: aiohttp.ClientSession
+    users: int = 0
+    cancel_close: CALLBACK_TYPE | None = None
+
+
+@callback
+def _async_get_proxy_connector(
+    hass: HomeAssistant, proxy_url: str, verify_ssl: bool = True
+) -> aiohttp.BaseConnector:
+    """Return the connector pool for aiohttp.
+
+    This method must be run in the event loop.
+    """
+    if verify_ssl:
+        ssl_context: bool | SSLContext = ssl_util.get_default_context()
+    else:
+        ssl_context = ssl_util.get_default_no_verify_context()
+
+    return ProxyConnector.from_url(
+        url=proxy_url,
+        rdns=True,
+        enable_cleanup_closed=ENABLE_CLEANUP_CLOSED,
+        ssl=ssl_context,
+        limit=MAXIMUM_CONNECTIONS,
+        limit_per_host=MAXIMUM_CONNECTIONS_PER_HOST,
+    )
+
+
+@callback
+def _async_create_proxy_clientsession(
+    hass: HomeAssistant,
+    proxy_url: str,
+    verify_ssl: bool = True,
+) -> aiohttp.ClientSession:
+    """Create a new ClientSession for proxy server.
+
+    This method must be run in the event loop.
+    """
+    clientsession = aiohttp.ClientSession(
+        connector=_async_get_proxy_connector(hass, proxy_url, verify_ssl),
+        json_serialize=json_dumps,
+        response_class=HassClientResponse,
+        trace_configs=[async_get_request_tracer(hass).trace_config(proxy_url)],
+    )
+    # Prevent packages accidentally overriding our default headers
+    # It's important that we identify as Home Assistant
+    # If a package requires a different user agent, override it by passing a headers
+    # dictionary to the request method.
+    # pylint: disable-next=protected-access
+    clientsession._default_headers = MappingProxyType(  # type: ignore[assignment]
+        {USER_AGENT: SERVER_SOFTWARE},
+    )
+
+    clientsession.close = warn_use(  # type: ignore[method-assign]
+        clientsession.close,
+        WARN_CLOSE_MSG,
+    )
+
+    return clientsession
+
+
+async def _async_close_proxy_clientsession(shared: _SharedProxySession) -> None:
+    """Close shared ClientSession and its connector pool."""
+    if shared.cancel_close:
+        shared.cancel_close()
+        shared.cancel_close = None
+    connector = shared.session.connector
+    shared.session.detach()
+    if connector is not None:
+        await connector.close()
+
+
+@callback
+def _async_get_proxy_sessions(
+    hass: HomeAssistant,
+) -> dict[tuple[str, bool], _SharedProxySession]:
+    """Return registry of shared proxy sessions.
+
+    This method must be run in the event loop.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (sessions := domain_data.get(DATA_PROXY_SESSIONS)) is None:
+        sessions = domain_data[DATA_PROXY_SESSIONS] = {}
+
+        async def _async_close_sessions(event: Event) -> None:
+            """Close all proxy sessions."""
+            for shared in list(sessions.values()):
+                await _async_close_proxy_clientsession(shared)
+            sessions.clear()
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_sessions)
+
+    return sessions
+
+
+@callback
+@bind_hass
+def async_acquire_proxy_clientsession(
+    hass: HomeAssistant,
+    proxy_url: str,
+    verify_ssl: bool = True,
+) -> aiohttp.ClientSession:
+    """Return ClientSession shared between all users of same proxy server.
+
+    Every call must be paired with async_release_proxy_clientsession() when
+    the session is no longer used. Connections pool is kept open while there
+    are any users of it.
+
+    This method must be run in the event loop.
+    """
+    sessions = _async_get_proxy_sessions(hass)
+    key = (proxy_url, verify_ssl)
+    if (shared := sessions.get(key)) is None:
+        shared = sessions[key] = _SharedProxySession(
+            key, _async_create_proxy_clientsession(hass, proxy_url, verify_ssl)
+        )
+    if shared.cancel_close:
+        shared.cancel_close()
+        shared.cancel_close = None
+    shared.users += 1
+    return shared.session
+
+
+@callback
+@bind_hass
+def async_release_proxy_clientsession(
+    hass: HomeAssistant, clientsession: aiohttp.ClientSession
+) -> None:
+    """Release ClientSession returned by async_acquire_proxy_clientsession().
+
+    Session of last user is closed after short delay, so that it can be reused
+    when config flow is followed by config entry setup.
+
+    This method must be run in the event loop.
+    """
+    sessions = _async_get_proxy_sessions(hass)
+    if (
+        shared := next(
+            (item for item in sessions.values() if item.session is clientsession),
+            None,
+        )
+    ) is None:
+        return
+
+    shared.users -= 1
+    if shared.users > 0:
+        return
+
+    async def _async_close(_now: datetime) -> None:
+        """Close unused proxy session."""
+        shared.cancel_close = None
+        if sessions.get(shared.key) is shared and shared.users <= 0:
+            del sessions[shared.key]
+            await _async_close_proxy_clientsession(shared)
+
+    shared.cancel_close = async_call_later(hass, PROXY_SESSION_LINGER, _async_close)
+
+
+@callback
+@bind_hass
+def async_get_single_flight(hass: HomeAssistant) -> SingleFlight:
+    """Return single-flight layer shared by all API clients.
+
+    This method must be run in the event loop.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (flights := domain_data.get(DATA_SINGLE_FLIGHT)) is None:
+        flights = domain_data[DATA_SINGLE_FLIGHT] = SingleFlight()
+    return flights
+
+
+@callback
+@bind_hass
+def async_get_request_policy(
+    hass: HomeAssistant, proxy_url: str | None = None
+) -> RequestPolicy:
+    """Return request policy shared by all API clients of proxy server.
+
+    Policy of direct requests is returned when proxy URL is None. Sharing it
+    lets failures seen by one config entry suspend requests of the others.
+
+    This method must be run in the event loop.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    policies = domain_data.setdefault(DATA_REQUEST_POLICIES, {})
+    if (policy := policies.get(proxy_url)) is None:
+        policy = policies[proxy_url] = RequestPolicy()
+    return policy
+
+
+@callback
+@bind_hass
+def async_get_request_tracer(hass: HomeAssistant) -> RequestTracer:
+    """Return tracer of requests of all client sessions of integration.
+
+    This method must be run in the event loop.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (tracer := domain_data.get(DATA_REQUEST_TRACER)) is None:
+        tracer = domain_data[DATA_REQUEST_TRACER] = RequestTracer()
+    return tracer
+
+
+@callback
+@bind_hass
+def async_get_direct_clientsession(hass: HomeAssistant) -> aiohttp.ClientSession:
+    """Return traced ClientSession for direct requests of all config entries.
+
+    Shared session of Home Assistant can't be traced, so integration has its
+    own one. It isn't bound to config entry that happened to create it, and
+    is detached from the shared connector pool on Home Assistant close.
+
+    This method must be run in the event loop.
+    """
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    if (session := domain_data.get(DATA_DIRECT_SESSION)) is None:
+        session = domain_data[DATA_DIRECT_SESSION] = async_create_clientsession(
+            hass,
+            auto_cleanup=False,
+            trace_configs=[async_get_request_tracer(hass).trace_config("direct")],
+        )
+
+        @callback
+        def _async_close_session(event: Event) -> None:
+            """Close direct session."""
+            session.detach()
+            domain_data.pop(DATA_DIRECT_SESSION, None)
+
+        hass.bus.async_listen_once(EVENT_HOMEASSISTANT_CLOSE, _async_close_session)
+
+    return session
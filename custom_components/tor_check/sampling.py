@@ -0,0 +1,90 @@
+"""Sampling of TOR circuits for TOR Check custom component."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Sequence
+from dataclasses import dataclass
+import secrets
+import time
+from typing import Final
+
+import aiohttp
+from aiohttp.hdrs import USER_AGENT
+from aiohttp_socks import ProxyConnector
+
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+
+from .api import (
+    IP_ECHO_PROVIDERS,
+    HedgedIpEcho,
+    IpEchoProvider,
+    TorCheckApiClientError,
+)
+
+# Maximum number of circuits to build at once
+SAMPLING_PARALLEL: Final = 4
+
+
+@dataclass(frozen=True)
+class CircuitSample:
+    """Result of request through single TOR circuit."""
+
+    exit_ip: str | None
+    # Seconds to get answer, including building the circuit
+    latency: float
+
+
+class TorCircuitSampler:
+    """Sample exit nodes of several TOR circuits at once.
+
+    Every request uses distinct SOCKS username and password, so TOR with
+    IsolateSOCKSAuth flag on SOCKS port (default) builds a separate circuit
+    for each of them. Credentials are new on every run to get fresh circuits.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        count: int,
+        providers: Sequence[IpEchoProvider] = IP_ECHO_PROVIDERS,
+        parallel: int = SAMPLING_PARALLEL,
+    ) -> None:
+        """Initialize."""
+        self._host = host
+        self._port = port
+        self.count = count
+        self._providers = providers
+        self._parallel = parallel
+
+    async def _async_sample(
+        self, username: str, password: str, semaphore: asyncio.Semaphore
+    ) -> CircuitSample:
+        """Get exit IP address through isolated circuit."""
+        async with semaphore:
+            start = time.monotonic()
+            async with aiohttp.ClientSession(
+                connector=ProxyConnector.from_url(
+                    f"socks5://{username}:{password}@{self._host}:{self._port}",
+                    rdns=True,
+                ),
+                headers={USER_AGENT: SERVER_SOFTWARE},
+            ) as session:
+                try:
+                    exit_ip = await HedgedIpEcho(
+                        session, self._providers
+                    ).async_get_ip()
+                except TorCheckApiClientError:
+                    exit_ip = None
+            return CircuitSample(exit_ip, time.monotonic() - start)
+
+    async def async_sample(self) -> list[CircuitSample]:
+        """Get exit IP addresses through isolated circuits concurrently."""
+        semaphore = asyncio.Semaphore(self._parallel)
+        run = secrets.token_hex(4)
+        return await asyncio.gather(
+            *(
+                self._async_sample(f"tor_check-{run}-{i}", run, semaphore)
+                for i in range(self.count)
+            )
+        )
@@ -0,0 +1,65 @@
+"""Adaptive update interval for TOR Check custom component."""
+from __future__ import annotations
+
+from datetime import timedelta
+import random
+from typing import Final
+
+# Relative spread of randomized intervals
+_JITTER: Final = 0.2
+# Limit of interval doublings, enough to reach any sane maximum
+_MAX_DOUBLINGS: Final = 20
+
+
+class AdaptiveUpdateInterval:
+    """Update interval that adapts to stability of the observed state.
+
+    While state is stable, the interval is doubled up to the maximum and is
+    aligned to cache expiration. After an error or state change, rechecks
+    restart from the minimum interval with jittered exponential backoff.
+    """
+
+    def __init__(self, min_interval: timedelta, max_interval: timedelta) -> None:
+        """Initialize."""
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self._failures = 0
+        self._stable = 0
+
+    def _backoff(self, attempt: int) -> timedelta:
+        """Return interval for attempt number, capped by maximum."""
+        return min(
+            self.min_interval * 2 ** min(attempt, _MAX_DOUBLINGS), self.max_interval
+        )
+
+    def _jitter(self, interval: timedelta) -> timedelta:
+        """Return randomized interval within bounds."""
+        return min(
+            max(interval * random.uniform(1 - _JITTER, 1 + _JITTER), self.min_interval),
+            self.max_interval,
+        )
+
+    def next(
+        self,
+        *,
+        failed: bool = False,
+        changed: bool = False,
+        expires_in: timedelta | None = None,
+    ) -> timedelta:
+        """Return interval to next update after the last one."""
+        if failed:
+            self._stable = 0
+            self._failures += 1
+            return self._jitter(self._backoff(self._failures - 1))
+
+        self._failures = 0
+        if changed:
+            self._stable = 0
+            return self._jitter(self.min_interval)
+
+        self._stable += 1
+        interval = self._backoff(self._stable)
+        if expires_in is not None:
+            # Recheck right when cached data expires
+            interval = min(interval, max(expires_in, self.min_interval))
+        return interval
@@ -4,16 +4,56 @@ from __future__ import annotations
 from collections.abc import Mapping
 from typing import Any
 
-from homeassistant.components.sensor import SensorEntity, SensorEntityDescription
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.const import (
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    EntityCategory,
+    UnitOfDataRate,
+    UnitOfTime,
+)
+from homeassistant.helpers.restore_state import RestoreEntity
 
-from .const import ATTR_REAL_IP, ATTR_TOR_CONNECTED, DOMAIN
+from .const import (
+    ATTR_CIRCUIT_LATENCIES,
+    ATTR_EXIT_AS_ORGANIZATION,
+    ATTR_EXIT_ASN,
+    ATTR_EXIT_COUNTRY,
+    ATTR_EXITS,
+    ATTR_FAILED_CIRCUITS,
+    ATTR_P50,
+    ATTR_P95,
+    ATTR_P99,
+    ATTR_REAL_IP,
+    ATTR_SAMPLES,
+    ATTR_TOR_CONNECTED,
+    ATTR_UNLISTED_EXITS,
+    DOMAIN,
+)
 from .coordinator import (
+    CIRCUITS_EXITS,
+    CIRCUITS_FAILED,
+    CIRCUITS_LATENCIES,
+    CIRCUITS_UNLISTED,
+    KEY_DIRECT_THROUGHPUT,
+    KEY_DIRECT_TTFB,
     KEY_MY_IP,
     KEY_MY_TOR_IP,
+    KEY_TOR_CIRCUITS,
     KEY_TOR_CONNECTED,
+    KEY_TOR_GEOIP,
+    KEY_TOR_THROUGHPUT,
+    KEY_TOR_TTFB,
     TorCheckDataUpdateCoordinator,
 )
-from .entity import TorCheckEntity
+from .entity import TorCheckDaemonEntity, TorCheckEntity
+from .fleet import TorFleetDataUpdateCoordinator
+from .geoip import GEOIP_AS_ORGANIZATION, GEOIP_ASN, GEOIP_COUNTRY
 
 ENTITY_DESCRIPTIONS = (
     SensorEntityDescription(
@@ -23,10 +63,67 @@ ENTITY_DESCRIPTIONS = (
     ),
 )
 
+REAL_IP_ENTITY_DESCRIPTION = SensorEntityDescription(
+    key=KEY_MY_IP,
+    name="Real IP",
+    icon="mdi:ip",
+    entity_category=EntityCategory.DIAGNOSTIC,
+)
+
+TRANSFER_ENTITY_DESCRIPTIONS = (
+    SensorEntityDescription(
+        key=KEY_TOR_TTFB,
+        name="TOR time to first byte",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    SensorEntityDescription(
+        key=KEY_DIRECT_TTFB,
+        name="Direct time to first byte",
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    SensorEntityDescription(
+        key=KEY_TOR_THROUGHPUT,
+        name="TOR throughput",
+        device_class=SensorDeviceClass.DATA_RATE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfDataRate.KILOBYTES_PER_SECOND,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+    SensorEntityDescription(
+        key=KEY_DIRECT_THROUGHPUT,
+        name="Direct throughput",
+        device_class=SensorDeviceClass.DATA_RATE,
+        state_class=SensorStateClass.MEASUREMENT,
+        native_unit_of_measurement=UnitOfDataRate.KILOBYTES_PER_SECOND,
+        entity_category=EntityCategory.DIAGNOSTIC,
+    ),
+)
+
+CIRCUITS_ENTITY_DESCRIPTION = SensorEntityDescription(
+    key=KEY_TOR_CIRCUITS,
+    name="TOR circuit exits",
+    icon="mdi:call-split",
+    state_class=SensorStateClass.MEASUREMENT,
+    entity_category=EntityCategory.DIAGNOSTIC,
+)
+
 
 async def async_setup_entry(hass, entry, async_add_devices):
     """Set up the sensor platform."""
     coordinator = hass.data[DOMAIN][entry.entry_id]
+    if isinstance(coordinator, TorFleetDataUpdateCoordinator):
+        async_add_devices(
+            TorCheckDaemonSensor(coordinator=coordinator, daemon=daemon)
+            for daemon in coordinator.clients
+        )
+        return
+
     async_add_devices(
         TorCheckSensor(
             coordinator=coordinator,
@@ -34,10 +131,42 @@ async def async_setup_entry(hass, entry, async_add_devices):
         )
         for entity_description in ENTITY_DESCRIPTIONS
     )
+    async_add_devices(
+        [
+            TorCheckRealIpSensor(
+                coordinator=coordinator,
+                entity_description=REAL_IP_ENTITY_DESCRIPTION,
+            )
+        ]
+    )
+    if coordinator.transfer_probe_url is not None:
+        async_add_devices(
+            TorCheckTransferSensor(
+                coordinator=coordinator,
+                entity_description=entity_description,
+            )
+            for entity_description in TRANSFER_ENTITY_DESCRIPTIONS
+        )
+    if coordinator.circuit_sampler is not None:
+        async_add_devices(
+            [
+                TorCheckCircuitsSensor(
+                    coordinator=coordinator,
+                    entity_description=CIRCUITS_ENTITY_DESCRIPTION,
+                )
+            ]
+        )
+
 
+class TorCheckSensor(TorCheckEntity, SensorEntity, RestoreEntity):
+    """TOR Check Sensor class.
 
-class TorCheckSensor(TorCheckEntity, SensorEntity):
-    """TOR Check Sensor class."""
+    Until the first refresh completes, state is restored from the last run.
+    """
+
+    _data_keys = (KEY_MY_TOR_IP, KEY_MY_IP, KEY_TOR_CONNECTED, KEY_TOR_GEOIP)
+    # Real IP has its own sensor, TOR connection state has binary sensor
+    _unrecorded_attributes = frozenset({ATTR_REAL_IP, ATTR_TOR_CONNECTED})
 
     def __init__(
         self,
@@ -47,18 +176,167 @@ class TorCheckSensor(TorCheckEntity, SensorEntity):
         """Initialize the sensor class."""
         super().__init__(coordinator)
         self.entity_description = entity_description
+        self._restored_value: str | None = None
+
+    async def async_added_to_hass(self) -> None:
+        """Restore last known state."""
+        await super().async_added_to_hass()
+        if (
+            self.coordinator.data is None
+            and (last_state := await self.async_get_last_state()) is not None
+            and last_state.state not in (STATE_UNKNOWN, STATE_UNAVAILABLE)
+        ):
+            self._restored_value = last_state.state
 
     @property
     def native_value(self) -> str:
         """Return the native value of the sensor."""
-        return self.coordinator.data.get(KEY_MY_TOR_IP)
+        if self.coordinator.data is None:
+            return self._restored_value
+        return self._data.get(KEY_MY_TOR_IP)
 
     @property
     def extra_state_attributes(self) -> Mapping[str, Any] | None:
         """Return entity specific state attributes."""
         attrs = {
-            ATTR_REAL_IP: self.coordinator.data.get(KEY_MY_IP),
-            ATTR_TOR_CONNECTED: self.coordinator.data.get(KEY_TOR_CONNECTED),
+            ATTR_REAL_IP: self._data.get(KEY_MY_IP),
+            ATTR_TOR_CONNECTED: self._data.get(KEY_TOR_CONNECTED),
         }
+        if geoip := self._data.get(KEY_TOR_GEOIP):
+            attrs.update(
+                {
+                    ATTR_EXIT_COUNTRY: geoip.get(GEOIP_COUNTRY),
+                    ATTR_EXIT_ASN: geoip.get(GEOIP_ASN),
+                    ATTR_EXIT_AS_ORGANIZATION: geoip.get(GEOIP_AS_ORGANIZATION),
+                }
+            )
         attrs.update(super().extra_state_attributes or {})
         return attrs
+
+
+class TorCheckRealIpSensor(TorCheckEntity, SensorEntity):
+    """TOR Check sensor of real IP address."""
+
+    _data_keys = (KEY_MY_IP,)
+
+    def __init__(
+        self,
+        coordinator: TorCheckDataUpdateCoordinator,
+        entity_description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator)
+        self.entity_description = entity_description
+        self._attr_unique_id = f"{self._attr_unique_id}_{entity_description.key}"
+
+    @property
+    def native_value(self) -> str | None:
+        """Return the native value of the sensor."""
+        return self._data.get(KEY_MY_IP)
+
+
+class TorCheckTransferSensor(TorCheckEntity, SensorEntity):
+    """TOR Check transfer timings sensor class.
+
+    State is the median of recent measurements.
+    """
+
+    _unrecorded_attributes = frozenset({ATTR_SAMPLES})
+
+    def __init__(
+        self,
+        coordinator: TorCheckDataUpdateCoordinator,
+        entity_description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator)
+        self.entity_description = entity_description
+        self._attr_unique_id = f"{self._attr_unique_id}_{entity_description.key}"
+
+    def _get_fingerprint(self) -> Any:
+        """Return number of measurements, state changes on new ones only."""
+        return (
+            self.available,
+            self.coordinator.transfer_stats[self.entity_description.key].total,
+        )
+
+    def _percentile(self, percent: float) -> float | None:
+        """Return rounded percentile of measurements."""
+        value = self.coordinator.transfer_stats[self.entity_description.key].percentile(
+            percent
+        )
+        return None if value is None else round(value, 1)
+
+    @property
+    def native_value(self) -> float | None:
+        """Return the native value of the sensor."""
+        return self._percentile(50)
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return entity specific state attributes."""
+        return {
+            ATTR_P50: self._percentile(50),
+            ATTR_P95: self._percentile(95),
+            ATTR_P99: self._percentile(99),
+            ATTR_SAMPLES: len(
+                self.coordinator.transfer_stats[self.entity_description.key]
+            ),
+        }
+
+
+class TorCheckCircuitsSensor(TorCheckEntity, SensorEntity):
+    """TOR Check sensor of exit nodes of sampled circuits.
+
+    State is the number of distinct exit nodes.
+    """
+
+    _data_keys = (KEY_TOR_CIRCUITS,)
+    _unrecorded_attributes = frozenset({ATTR_CIRCUIT_LATENCIES})
+
+    def __init__(
+        self,
+        coordinator: TorCheckDataUpdateCoordinator,
+        entity_description: SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator)
+        self.entity_description = entity_description
+        self._attr_unique_id = f"{self._attr_unique_id}_{entity_description.key}"
+
+    @property
+    def native_value(self) -> int | None:
+        """Return the native value of the sensor."""
+        if (circuits := self._data.get(KEY_TOR_CIRCUITS)) is None:
+            return None
+        return len(circuits[CIRCUITS_EXITS])
+
+    @property
+    def extra_state_attributes(self) -> Mapping[str, Any] | None:
+        """Return entity specific state attributes."""
+        if (circuits := self._data.get(KEY_TOR_CIRCUITS)) is None:
+            return None
+        return {
+            ATTR_EXITS: circuits[CIRCUITS_EXITS],
+            ATTR_UNLISTED_EXITS: circuits[CIRCUITS_UNLISTED],
+            ATTR_CIRCUIT_LATENCIES: circuits[CIRCUITS_LATENCIES],
+            ATTR_FAILED_CIRCUITS: circuits[CIRCUITS_FAILED],
+        }
+
+
+class TorCheckDaemonSensor(TorCheckDaemonEntity, SensorEntity):
+    """TOR Check sensor of exit node IP of one TOR daemon of fleet."""
+
+    _attr_icon = "mdi:ip"
+    _data_keys = (KEY_MY_TOR_IP,)
+
+    def __init__(self, coordinator: TorFleetDataUpdateCoordinator, daemon: str) -> None:
+        """Initialize the sensor class."""
+        super().__init__(coordinator, daemon)
+        self._attr_unique_id = f"{self._attr_unique_id}_{daemon}_tor_ip"
+        self._attr_name = f"TOR IP {daemon}"
+
+    @property
+    def native_value(self) -> str | None:
+        """Return the native value of the sensor."""
+        return self._data.get(KEY_MY_TOR_IP)
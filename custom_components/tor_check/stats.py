@@ -0,0 +1,47 @@
+"""Rolling statistics for TOR Check custom component."""
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Iterator
+import math
+
+
+class RollingStats:
+    """Fixed-size window of latest samples with percentiles.
+
+    Memory use is bounded by window size however many samples are added.
+    """
+
+    __slots__ = ("_samples", "total")
+
+    def __init__(self, size: int = 100) -> None:
+        """Initialize."""
+        self._samples: deque[float] = deque(maxlen=size)
+        # Number of samples ever added
+        self.total = 0
+
+    def add(self, value: float) -> None:
+        """Add sample, dropping the oldest one if window is full."""
+        self._samples.append(value)
+        self.total += 1
+
+    def percentile(self, percent: float) -> float | None:
+        """Return nearest-rank percentile of samples or None if there are none."""
+        if not self._samples:
+            return None
+        samples = sorted(self._samples)
+        rank = max(math.ceil(percent / 100 * len(samples)), 1)
+        return samples[rank - 1]
+
+    @property
+    def last(self) -> float | None:
+        """Return the latest sample."""
+        return self._samples[-1] if self._samples else None
+
+    def __len__(self) -> int:
+        """Return number of samples in window."""
+        return len(self._samples)
+
+    def __iter__(self) -> Iterator[float]:
+        """Iterate samples from oldest to latest."""
+        return iter(self._samples)
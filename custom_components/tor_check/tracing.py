@@ -0,0 +1,160 @@
+"""Tracing of HTTP requests for TOR Check custom component."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+import time
+from types import SimpleNamespace
+from typing import Any, Final
+
+import aiohttp
+
+# Number of the last traced requests to keep
+TRACE_HISTORY_SIZE: Final = 50
+
+
+@dataclass
+class RequestTimings:
+    """Timings of phases of single HTTP request, in seconds.
+
+    Phases are filled by request tracer only when session is traced, so timings
+    of untraced requests have just total time and error.
+    """
+
+    url: str
+    # Session request went through: "direct" or URL of proxy
+    via: str | None = None
+    # Wall clock and monotonic time of request start
+    started: float = field(default_factory=time.time)
+    start: float = field(default_factory=time.monotonic)
+    # Waiting for free connection in pool
+    queue: float | None = None
+    # Resolving host name, done by TOR itself for requests through it
+    dns: float | None = None
+    # Creating new connection, including DNS, SOCKS negotiation and TLS handshake
+    connect: float | None = None
+    reused: bool = False
+    # From start of request to receiving response headers
+    headers: float | None = None
+    # From start of request to reading and parsing the whole response
+    total: float | None = None
+    error: str | None = None
+
+    def finish(self, error: BaseException | None = None) -> None:
+        """Mark request as done."""
+        self.total = time.monotonic() - self.start
+        if error is not None and self.error is None:
+            self.error = str(error.__cause__ or error) or type(error).__name__
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return timings with derived server and body phases."""
+        server = body = None
+        if self.headers is not None:
+            server = self.headers - (self.queue or 0) - (self.connect or 0)
+            if self.total is not None:
+                body = self.total - self.headers
+        return {
+            "url": self.url,
+            "via": self.via,
+            "started": self.started,
+            "reused": self.reused,
+            **{
+                name: None if value is None else round(value, 4)
+                for name, value in (
+                    ("queue", self.queue),
+                    ("dns", self.dns),
+                    ("connect", self.connect),
+                    ("server", server),
+                    ("body", body),
+                    ("total", self.total),
+                )
+            },
+            "error": self.error,
+        }
+
+
+class RequestTracer:
+    """Collector of phase timings of the last HTTP requests.
+
+    Requests are traced by aiohttp hooks of sessions created with trace config
+    of the tracer. Timings object must be passed as trace request context.
+    """
+
+    def __init__(self, size: int = TRACE_HISTORY_SIZE) -> None:
+        """Initialize."""
+        self.history: deque[RequestTimings] = deque(maxlen=size)
+
+    def trace_config(self, via: str) -> aiohttp.TraceConfig:
+        """Return trace config for session requests go through."""
+        config = aiohttp.TraceConfig()
+
+        async def _on_request_start(
+            _session: aiohttp.ClientSession, context: SimpleNamespace, _params: Any
+        ) -> None:
+            if isinstance(timings := context.trace_request_ctx, RequestTimings):
+                timings.via = via
+                self.history.append(timings)
+            context.phases = {}
+
+        config.on_request_start.append(_on_request_start)
+        config.on_connection_queued_start.append(self._phase_start("queue"))
+        config.on_connection_queued_end.append(self._phase_end("queue"))
+        config.on_dns_resolvehost_start.append(self._phase_start("dns"))
+        config.on_dns_resolvehost_end.append(self._phase_end("dns"))
+        config.on_connection_create_start.append(self._phase_start("connect"))
+        config.on_connection_create_end.append(self._phase_end("connect"))
+        config.on_connection_reuseconn.append(self._async_on_reuseconn)
+        config.on_request_end.append(self._async_on_request_end)
+        config.on_request_exception.append(self._async_on_request_exception)
+        return config
+
+    @staticmethod
+    def _phase_start(phase: str):
+        """Return hook to mark start of request phase."""
+
+        async def _on_start(
+            _session: aiohttp.ClientSession, context: SimpleNamespace, _params: Any
+        ) -> None:
+            context.phases[phase] = time.monotonic()
+
+        return _on_start
+
+    @staticmethod
+    def _phase_end(phase: str):
+        """Return hook to store duration of request phase."""
+
+        async def _on_end(
+            _session: aiohttp.ClientSession, context: SimpleNamespace, _params: Any
+        ) -> None:
+            if isinstance(timings := context.trace_request_ctx, RequestTimings) and (
+                start := context.phases.get(phase)
+            ):
+                setattr(timings, phase, time.monotonic() - start)
+
+        return _on_end
+
+    @staticmethod
+    async def _async_on_reuseconn(
+        _session: aiohttp.ClientSession, context: SimpleNamespace, _params: Any
+    ) -> None:
+        """Mark request as sent by reused connection."""
+        if isinstance(timings := context.trace_request_ctx, RequestTimings):
+            timings.reused = True
+
+    @staticmethod
+    async def _async_on_request_end(
+        _session: aiohttp.ClientSession, context: SimpleNamespace, _params: Any
+    ) -> None:
+        """Store time to response headers."""
+        if isinstance(timings := context.trace_request_ctx, RequestTimings):
+            timings.headers = time.monotonic() - timings.start
+
+    @staticmethod
+    async def _async_on_request_exception(
+        _session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestExceptionParams,
+    ) -> None:
+        """Store error of request."""
+        if isinstance(timings := context.trace_request_ctx, RequestTimings):
+            timings.error = str(params.exception) or type(params.exception).__name__
@@ -0,0 +1,213 @@
+# pylint: disable=protected-access
+"""Offline benchmark harness for TOR Check custom component.
+
+TOR SOCKS port, IP echo, exit list and transfer probe servers are replaced by
+local stand-ins with injected latency and failures, so results don't depend on
+network. Every scenario drives API client and data update coordinator through
+a number of refreshes and reports refresh latency, memory allocated and
+requests sent per refresh.
+"""
+from __future__ import annotations
+
+from contextlib import AsyncExitStack
+from dataclasses import asdict, dataclass
+import json
+import platform
+import time
+import tracemalloc
+from typing import Any, Final
+from unittest.mock import patch
+
+import aiohttp
+from aiohttp_socks import ProxyConnector
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tor_check import api
+from custom_components.tor_check.api import (
+    IpEchoProvider,
+    TorCheckApiClient,
+    TorExitNodesApiClient,
+)
+from custom_components.tor_check.const import DOMAIN
+from custom_components.tor_check.coordinator import (
+    KEY_TOR_CONNECTED,
+    TorCheckDataUpdateCoordinator,
+    TorExitNodesService,
+)
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+import homeassistant.util.dt as dt_util
+
+from .common import FakeHttpServer, FakeSocksServer
+from .const import MOCK_CONFIG
+
+REPORT_VERSION: Final = 1
+
+TOR_EXIT: Final = "10.0.0.1"
+REAL_IP: Final = "198.51.100.1"
+# Number of addresses in exit list, close to the real one
+EXIT_LIST_SIZE: Final = 2000
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Conditions of benchmark run."""
+
+    name: str
+    # Seconds for TOR to answer
+    tor_delay: float = 0.02
+    # Share of TOR connections failing
+    tor_failure_rate: float = 0
+    # Seconds for servers to answer direct requests
+    http_delay: float = 0
+    # Drop cached data before every refresh
+    cold: bool = True
+
+
+SCENARIOS: Final = (
+    Scenario("healthy"),
+    Scenario("warm_cache", cold=False),
+    Scenario("slow_tor", tor_delay=0.2),
+    Scenario("flaky_tor", tor_failure_rate=0.3),
+    Scenario("tor_down", tor_failure_rate=1),
+    Scenario("slow_servers", http_delay=0.2),
+)
+
+
+def _summary(values: list[float]) -> dict[str, float]:
+    """Return mean, median, 95th percentile and maximum of values."""
+    ordered = sorted(values)
+    return {
+        "mean": sum(ordered) / len(ordered),
+        "p50": ordered[(len(ordered) - 1) // 2],
+        "p95": ordered[min(round(len(ordered) * 0.95), len(ordered)) - 1],
+        "max": ordered[-1],
+    }
+
+
+class _Counters:
+    """Requests received by fake servers."""
+
+    def __init__(self, socks: FakeSocksServer, http: FakeHttpServer) -> None:
+        """Initialize."""
+        self._socks = socks
+        self._http = http
+
+    def snapshot(self) -> dict[str, int]:
+        """Return numbers of requests received so far."""
+        return {
+            "tor": len(self._socks.usernames) + self._socks.failures,
+            "ip": self._http.requests["/ip"],
+            "exit_list": self._http.requests["/exit-addresses"],
+            "transfer": self._http.requests["/transfer"],
+        }
+
+
+async def _async_refresh(
+    coordinator: TorCheckDataUpdateCoordinator, scenario: Scenario
+) -> bool:
+    """Refresh coordinator, return true on success."""
+    if scenario.cold:
+        coordinator._cache.clear()
+        # Exit list is revalidated by conditional GET
+        coordinator.exit_nodes._expires = dt_util.utc_from_timestamp(0)
+    await coordinator.async_refresh()
+    return coordinator.last_update_success
+
+
+async def async_run_scenario(
+    hass: HomeAssistant, scenario: Scenario, refreshes: int
+) -> dict[str, Any]:
+    """Run benchmark scenario, return its results."""
+    socks = FakeSocksServer([TOR_EXIT], scenario.tor_delay, scenario.tor_failure_rate)
+    http = FakeHttpServer(
+        REAL_IP,
+        [TOR_EXIT] + [f"10.1.{i // 256}.{i % 256}" for i in range(EXIT_LIST_SIZE - 1)],
+        scenario.http_delay,
+    )
+    counters = _Counters(socks, http)
+
+    async with AsyncExitStack() as stack:
+        await socks.start()
+        stack.push_async_callback(socks.stop)
+        await http.start()
+        stack.push_async_callback(http.stop)
+        stack.enter_context(
+            patch.object(api, "TOR_CHECK_URL", f"{http.url}/exit-addresses")
+        )
+        session = await stack.enter_async_context(aiohttp.ClientSession())
+        tor_session = await stack.enter_async_context(
+            aiohttp.ClientSession(
+                connector=ProxyConnector.from_url(f"socks5://127.0.0.1:{socks.port}")
+            )
+        )
+
+        entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+        entry.add_to_hass(hass)
+        token = config_entries.current_entry.set(entry)
+        coordinator = TorCheckDataUpdateCoordinator(
+            hass,
+            TorCheckApiClient(
+                session,
+                tor_session,
+                providers=[IpEchoProvider("echo", f"{http.url}/ip")],
+            ),
+            TorExitNodesService(hass, TorExitNodesApiClient(session)),
+            transfer_probe_url=f"{http.url}/transfer",
+        )
+        config_entries.current_entry.reset(token)
+
+        # The first refresh downloads exit list and measures transfer
+        await _async_refresh(coordinator, scenario)
+
+        latencies: list[float] = []
+        failed = 0
+        before = counters.snapshot()
+        for _ in range(refreshes):
+            start = time.perf_counter()
+            failed += not await _async_refresh(coordinator, scenario)
+            latencies.append(time.perf_counter() - start)
+        after = counters.snapshot()
+
+        # Allocations are traced separately as tracing slows everything down
+        peaks: list[float] = []
+        tracemalloc.start()
+        try:
+            retained = tracemalloc.get_traced_memory()[0]
+            for _ in range(refreshes):
+                tracemalloc.reset_peak()
+                current = tracemalloc.get_traced_memory()[0]
+                await _async_refresh(coordinator, scenario)
+                peaks.append(tracemalloc.get_traced_memory()[1] - current)
+            retained = tracemalloc.get_traced_memory()[0] - retained
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "name": scenario.name,
+        "scenario": asdict(scenario),
+        "refreshes": refreshes,
+        "failed": failed,
+        "tor_connected": bool(coordinator.data and coordinator.data[KEY_TOR_CONNECTED]),
+        "latency": _summary(latencies),
+        "requests_per_refresh": {
+            key: (after[key] - before[key]) / refreshes for key in after
+        },
+        "allocations": {
+            "peak_bytes": _summary(peaks),
+            "retained_bytes": retained / refreshes,
+        },
+    }
+
+
+def write_report(path: str, results: list[dict[str, Any]]) -> None:
+    """Write results of benchmark scenarios to JSON file."""
+    report = {
+        "version": REPORT_VERSION,
+        "python": platform.python_version(),
+        "aiohttp": aiohttp.__version__,
+        "scenarios": results,
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(report, file, indent=2)
+        file.write("\n")
@@ -0,0 +1,274 @@
+"""Common helpers for tests."""
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+import random
+import zlib
+
+from aiohttp import web
+
+
+class FakeTorControlServer:
+    """Local stand-in for TOR control port."""
+
+    def __init__(self, password: str | None = None) -> None:
+        """Initialize."""
+        self.password = password
+        self.info: dict[str, str] = {"status/circuit-established": "1"}
+        self.commands: list[str] = []
+        self.events: set[str] = set()
+        self._server: asyncio.Server | None = None
+        self._writers: list[asyncio.StreamWriter] = []
+
+    @property
+    def port(self) -> int:
+        """Return port server is listening on."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        """Start server."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        """Stop server and drop all connections."""
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def disconnect(self) -> None:
+        """Drop all client connections."""
+        for writer in self._writers:
+            writer.close()
+        self._writers.clear()
+        await asyncio.sleep(0)
+
+    async def push_event(self, event: str, data: str | None = None) -> None:
+        """Send asynchronous event to subscribed clients."""
+        if event.split()[0] not in self.events:
+            return
+        if data is None:
+            message = f"650 {event}\r\n"
+        else:
+            message = f"650+{event}\n{data}\n.\n650 OK\n".replace("\n", "\r\n")
+        for writer in self._writers:
+            writer.write(message.encode())
+            await writer.drain()
+
+    def _reply(self, command: str) -> str:
+        """Return reply to command."""
+        name, _, args = command.partition(" ")
+        if name == "AUTHENTICATE":
+            if self.password is not None and args != f'"{self.password}"':
+                return "515 Authentication failed: Password did not match\r\n"
+            return "250 OK\r\n"
+        if name == "GETINFO":
+            reply = ""
+            for key in args.split():
+                if key not in self.info:
+                    return f'552 Unrecognized key "{key}"\r\n'
+                if "\n" in (value := self.info[key]):
+                    reply += f"250+{key}=\n{value}\n.\n".replace("\n", "\r\n")
+                else:
+                    reply += f"250-{key}={value}\r\n"
+            return reply + "250 OK\r\n"
+        if name == "SETEVENTS":
+            self.events = set(args.split())
+            return "250 OK\r\n"
+        return f'510 Unrecognized command "{name}"\r\n'
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Handle client connection."""
+        self._writers.append(writer)
+        while line := await reader.readline():
+            command = line.decode().strip()
+            self.commands.append(command)
+            writer.write(self._reply(command).encode())
+            await writer.drain()
+        writer.close()
+
+
+class FakeSocksServer:
+    """Local stand-in for TOR SOCKS5 port.
+
+    Instead of connecting to requested host, it answers HTTP request itself
+    with IP address of exit node chosen by SOCKS credentials, like TOR with
+    IsolateSOCKSAuth flag does.
+    """
+
+    def __init__(
+        self,
+        exits: list[str],
+        delay: float = 0,
+        failure_rate: float = 0,
+        seed: int = 0,
+    ) -> None:
+        """Initialize."""
+        self.exits = exits
+        self.delay = delay
+        # Share of connections to answer with "general failure" error
+        self.failure_rate = failure_rate
+        # Hosts to answer with "host unreachable" error
+        self.unreachable: set[str] = set()
+        self.failures = 0
+        self.usernames: list[str] = []
+        self.active = 0
+        self.max_active = 0
+        self._random = random.Random(seed)
+        self._server: asyncio.Server | None = None
+
+    @property
+    def port(self) -> int:
+        """Return port server is listening on."""
+        return self._server.sockets[0].getsockname()[1]
+
+    async def start(self) -> None:
+        """Start server."""
+        self._server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+
+    async def stop(self) -> None:
+        """Stop server."""
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _handshake(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> str | None:
+        """Negotiate SOCKS5 connection, return username or None if refused."""
+        _, count = await reader.readexactly(2)
+        methods = await reader.readexactly(count)
+        username = ""
+        if 2 in methods:
+            # Username/password authentication, RFC 1929
+            writer.write(b"\x05\x02")
+            _, size = await reader.readexactly(2)
+            username = (await reader.readexactly(size)).decode()
+            await reader.readexactly((await reader.readexactly(1))[0])
+            writer.write(b"\x01\x00")
+        else:
+            writer.write(b"\x05\x00")
+
+        _, _, _, address_type = await reader.readexactly(4)
+        host = ""
+        if address_type == 1:
+            await reader.readexactly(4)
+        elif address_type == 3:
+            host = (await reader.readexactly((await reader.readexactly(1))[0])).decode()
+        else:
+            await reader.readexactly(16)
+        await reader.readexactly(2)
+        if host in self.unreachable:
+            writer.write(b"\x05\x04\x00\x01" + bytes(6))
+            return None
+        if self._random.random() < self.failure_rate:
+            self.failures += 1
+            await asyncio.sleep(self.delay)
+            writer.write(b"\x05\x01\x00\x01" + bytes(6))
+            return None
+        writer.write(b"\x05\x00\x00\x01" + bytes(6))
+        return username
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        """Serve single proxied HTTP request."""
+        try:
+            if (username := await self._handshake(reader, writer)) is None:
+                await writer.drain()
+                writer.close()
+                return
+            await reader.readuntil(b"\r\n\r\n")
+        except (asyncio.IncompleteReadError, ConnectionError):
+            writer.close()
+            return
+
+        self.usernames.append(username)
+        self.active += 1
+        self.max_active = max(self.max_active, self.active)
+        try:
+            await asyncio.sleep(self.delay)
+        finally:
+            self.active -= 1
+
+        body = self.exits[zlib.crc32(username.encode()) % len(self.exits)].encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/plain\r\nConnection: close\r\n"
+            + f"Content-Length: {len(body)}\r\n\r\n".encode()
+            + body
+        )
+        await writer.drain()
+        writer.close()
+
+
+class FakeHttpServer:
+    """Local stand-in for IP echo, TOR exit list and transfer probe servers.
+
+    Exit list supports conditional GET by ETag, like the real one.
+    """
+
+    def __init__(
+        self,
+        ip_address: str,
+        exit_nodes: list[str],
+        delay: float = 0,
+        transfer_size: int = 262144,
+    ) -> None:
+        """Initialize."""
+        self.ip_address = ip_address
+        self.exit_list = "".join(f"{address}\n" for address in exit_nodes).encode()
+        self.etag = f'"{zlib.crc32(self.exit_list):x}"'
+        self.delay = delay
+        self.transfer_size = transfer_size
+        # Number of requests by path
+        self.requests: Counter[str] = Counter()
+        self._runner: web.AppRunner | None = None
+        self._port = 0
+
+    @property
+    def url(self) -> str:
+        """Return base URL of server."""
+        return f"http://127.0.0.1:{self._port}"
+
+    async def start(self) -> None:
+        """Start server."""
+        app = web.Application()
+        app.router.add_get("/ip", self._handle_ip)
+        app.router.add_get("/exit-addresses", self._handle_exit_list)
+        app.router.add_get("/transfer", self._handle_transfer)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self._port = self._runner.addresses[0][1]
+
+    async def stop(self) -> None:
+        """Stop server."""
+        await self._runner.cleanup()
+
+    async def _answer(self, request: web.Request) -> None:
+        """Count request and wait before answering it."""
+        self.requests[request.path] += 1
+        await asyncio.sleep(self.delay)
+
+    async def _handle_ip(self, request: web.Request) -> web.Response:
+        """Answer with IP address of client."""
+        await self._answer(request)
+        return web.Response(text=self.ip_address)
+
+    async def _handle_exit_list(self, request: web.Request) -> web.Response:
+        """Answer with list of exit nodes if it is not cached by client."""
+        await self._answer(request)
+        if request.headers.get("If-None-Match") == self.etag:
+            return web.Response(status=304, headers={"ETag": self.etag})
+        return web.Response(
+            body=self.exit_list, content_type="text/plain", headers={"ETag": self.etag}
+        )
+
+    async def _handle_transfer(self, request: web.Request) -> web.Response:
+        """Answer with document of known size."""
+        await self._answer(request)
+        return web.Response(body=bytes(self.transfer_size))
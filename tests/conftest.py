@@ -24,6 +24,36 @@ from custom_components.tor_check import api
 pytest_plugins = "pytest_homeassistant_custom_component"  # pylint: disable=invalid-name
 
 
+def pytest_addoption(parser: pytest.Parser) -> None:
+    """Add options of offline benchmarks."""
+    group = parser.getgroup("tor_check benchmarks")
+    group.addoption(
+        "--bench-report",
+        metavar="PATH",
+        help="write JSON report of benchmark scenarios to PATH",
+    )
+    group.addoption(
+        "--bench-refreshes",
+        type=int,
+        default=3,
+        help="number of measured refreshes per benchmark scenario (default: 3)",
+    )
+
+
+def pytest_terminal_summary(terminalreporter) -> None:
+    """Report measurements recorded by benchmark tests with record_property."""
+    measurements = [
+        (report.nodeid, name, value)
+        for report in terminalreporter.getreports("passed")
+        for name, value in report.user_properties
+    ]
+    if not measurements:
+        return
+    terminalreporter.section("tor_check measurements")
+    for nodeid, name, value in measurements:
+        terminalreporter.write_line(f"{nodeid}: {name} = {value}")
+
+
 # This fixture enables loading custom integrations in all tests.
 # Remove to enable selective use of this fixture
 @pytest.fixture(autouse=True)
@@ -1,7 +1,234 @@
 # pylint: disable=protected-access,redefined-outer-name
 """Test tor_check setup process."""
+import asyncio
+from contextlib import contextmanager
+from datetime import timedelta
+import time
+from unittest.mock import patch
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+    mock_restore_cache,
+)
+
+from custom_components.tor_check import api
+from custom_components.tor_check.api import (
+    TorCheckApiClient,
+    TorCheckApiClientCommunicationError,
+    TransferTimings,
+)
+from custom_components.tor_check.const import (
+    CONF_TOR_PORT,
+    DOMAIN,
+    SERVICE_LOOKUP,
+)
+from custom_components.tor_check.coordinator import (
+    KEY_TOR_EXIT_NODES,
+    TorExitNodesService,
+    async_get_exit_nodes_service,
+)
+from custom_components.tor_check.exit_nodes import TorExitNodes
+from custom_components.tor_check.proxy import (
+    DATA_DIRECT_SESSION,
+    PROXY_SESSION_LINGER,
+    async_acquire_proxy_clientsession,
+    async_release_proxy_clientsession,
+)
+from homeassistant.const import (
+    EVENT_HOMEASSISTANT_CLOSE,
+    EVENT_HOMEASSISTANT_STARTED,
+    STATE_ON,
+    STATE_UNKNOWN,
+)
+from homeassistant.core import CoreState, HomeAssistant, State
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.setup import async_setup_component
+import homeassistant.util.dt as dt_util
+
+from .common import FakeHttpServer
+from .const import MOCK_CONFIG
+
+# Seconds to get TOR IP address in setup tests
+PROBE_DELAY = 0.5
 
 
 def test_example():
     """Dumb test."""
     assert int(2) == 2
+
+
+async def test_proxy_sessions_shared(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+):
+    """Test proxy sessions are shared and closed after last user."""
+    proxy_url = "socks5://localhost:9050"
+
+    session = async_acquire_proxy_clientsession(hass, proxy_url)
+    assert async_acquire_proxy_clientsession(hass, proxy_url) is session
+    assert async_acquire_proxy_clientsession(hass, proxy_url, False) is not session
+    assert async_acquire_proxy_clientsession(hass, "socks5://tor:9050") is not session
+
+    connector = session.connector
+    async_release_proxy_clientsession(hass, session)
+    async_release_proxy_clientsession(hass, session)
+
+    # Released session is reused until it is closed after delay
+    assert async_acquire_proxy_clientsession(hass, proxy_url) is session
+    async_release_proxy_clientsession(hass, session)
+    assert not connector.closed
+
+    freezer.tick(timedelta(seconds=PROXY_SESSION_LINGER + 1))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+
+    assert connector.closed
+    assert async_acquire_proxy_clientsession(hass, proxy_url) is not session
+
+
+async def test_direct_session_shared(hass: HomeAssistant, socket_enabled):
+    """Test direct session outlives config entry that created it."""
+    server = FakeHttpServer("198.51.100.1", ["10.0.0.1"])
+    await server.start()
+    first = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="first")
+    second = MockConfigEntry(
+        domain=DOMAIN, data={**MOCK_CONFIG, CONF_TOR_PORT: 9051}, entry_id="second"
+    )
+    try:
+        with patch.object(
+            api, "TOR_CHECK_URL", f"{server.url}/exit-addresses"
+        ), patch.object(
+            TorCheckApiClient, "async_get_my_tor_ip", return_value="10.0.0.1"
+        ), patch.object(
+            TorCheckApiClient, "async_get_my_ip", return_value="192.168.1.1"
+        ):
+            for entry in (first, second):
+                entry.add_to_hass(hass)
+                assert await hass.config_entries.async_setup(entry.entry_id)
+            session = hass.data[DOMAIN][DATA_DIRECT_SESSION]
+
+            assert await hass.config_entries.async_unload(first.entry_id)
+            await hass.async_block_till_done()
+            assert not session.closed
+
+            # Expired exit list is downloaded again by the remaining entry
+            async_get_exit_nodes_service(hass)._expires = dt_util.utcnow()
+            coordinator = hass.data[DOMAIN][second.entry_id]
+            await coordinator.async_refresh()
+            assert coordinator.last_update_success
+            assert "10.0.0.1" in coordinator.data[KEY_TOR_EXIT_NODES]
+            assert server.requests["/exit-addresses"] == 2
+
+            assert await hass.config_entries.async_unload(second.entry_id)
+            await hass.async_block_till_done()
+    finally:
+        await server.stop()
+
+    hass.bus.async_fire(EVENT_HOMEASSISTANT_CLOSE)
+    await hass.async_block_till_done()
+    assert session.closed
+    assert DATA_DIRECT_SESSION not in hass.data[DOMAIN]
+
+
+async def test_lookup_service(hass: HomeAssistant):
+    """Test bulk lookup of TOR exit nodes."""
+    assert await async_setup_component(hass, DOMAIN, {})
+    exit_nodes = TorExitNodes.from_strings(["10.0.0.1", "10.0.0.2", "2001:db8::1"])
+
+    with patch.object(
+        TorExitNodesService, "async_get_exit_nodes", return_value=exit_nodes
+    ):
+        response = await hass.services.async_call(
+            DOMAIN,
+            SERVICE_LOOKUP,
+            {
+                "addresses": "10.0.0.1, 10.0.0.3, 2001:db8::1, 10.0.0.0/24, "
+                "2001:db8::/32, 192.168.0.0/16, bogus, 10.0.0.0/33"
+            },
+            blocking=True,
+            return_response=True,
+        )
+
+    assert response == {
+        "addresses": {"10.0.0.1": True, "10.0.0.3": False, "2001:db8::1": True},
+        "networks": {"10.0.0.0/24": 2, "2001:db8::/32": 1, "192.168.0.0/16": 0},
+        "invalid": ["bogus", "10.0.0.0/33"],
+    }
+
+    with patch.object(
+        TorExitNodesService,
+        "async_get_exit_nodes",
+        side_effect=TorCheckApiClientCommunicationError,
+    ), pytest.raises(HomeAssistantError):
+        await hass.services.async_call(
+            DOMAIN,
+            SERVICE_LOOKUP,
+            {"addresses": ["10.0.0.1"]},
+            blocking=True,
+            return_response=True,
+        )
+
+
+@contextmanager
+def _patch_client():
+    """Answer API requests with delay of TOR probe."""
+
+    async def _get_my_tor_ip(self, max_age: float = 0) -> str:
+        await asyncio.sleep(PROBE_DELAY)
+        return "10.0.0.1"
+
+    timings = TransferTimings(0.1, 1000)
+    with patch.object(
+        TorExitNodesService,
+        "async_get_exit_nodes",
+        return_value=TorExitNodes.from_strings(["10.0.0.1"]),
+    ), patch.object(
+        TorCheckApiClient, "async_get_my_tor_ip", _get_my_tor_ip
+    ), patch.object(
+        TorCheckApiClient, "async_get_my_ip", return_value="192.168.1.1"
+    ), patch.object(
+        TorCheckApiClient, "async_measure_tor_transfer", return_value=timings
+    ), patch.object(
+        TorCheckApiClient, "async_measure_transfer", return_value=timings
+    ):
+        yield
+
+
+async def _async_timed_setup(hass: HomeAssistant) -> float:
+    """Set up config entry, return seconds spent."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+    start = time.monotonic()
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    return time.monotonic() - start
+
+
+async def test_setup_running(hass: HomeAssistant):
+    """Test setup after startup waits for the first refresh."""
+    with _patch_client():
+        assert await _async_timed_setup(hass) >= PROBE_DELAY
+        assert hass.states.get("sensor.tor_ip").state == "10.0.0.1"
+        # Transfer is not measured by default
+        assert hass.states.get("sensor.tor_throughput") is None
+        assert await hass.config_entries.async_unload("test")
+
+
+async def test_setup_during_startup(hass: HomeAssistant):
+    """Test setup does not delay startup by TOR probes."""
+    hass.set_state(CoreState.not_running)
+    mock_restore_cache(hass, [State("sensor.tor_ip", "10.0.0.9")])
+
+    with _patch_client():
+        assert await _async_timed_setup(hass) < PROBE_DELAY / 2
+        assert hass.states.get("sensor.tor_ip").state == "10.0.0.9"
+        assert hass.states.get("binary_sensor.tor").state == STATE_UNKNOWN
+
+        hass.set_state(CoreState.running)
+        hass.bus.async_fire(EVENT_HOMEASSISTANT_STARTED)
+        await hass.async_block_till_done()
+
+        assert hass.states.get("sensor.tor_ip").state == "10.0.0.1"
+        assert hass.states.get("binary_sensor.tor").state == STATE_ON
+        assert await hass.config_entries.async_unload("test")
@@ -0,0 +1,523 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check API client."""
+import asyncio
+import socket
+import time
+import tracemalloc
+from unittest.mock import patch
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+from aiohttp_socks import ProxyConnector
+import pytest
+
+from custom_components.tor_check import api
+from custom_components.tor_check.api import (
+    TorCheckApiClientCircuitOpenError,
+    TorCheckApiClientCommunicationError,
+    TorCheckApiClientError,
+    TorCheckApiClientProxyError,
+    TorExitNodesApiClient,
+)
+from custom_components.tor_check.exit_nodes import TorExitNodes, TorExitNodesBuilder
+
+from .common import FakeSocksServer
+
+EXIT_LIST = "\n".join(f"10.0.{i // 250}.{i % 250 + 1}" for i in range(1000)) + "\n"
+ETAG_VALUE = '"exit-list-v1"'
+
+
+@pytest.fixture
+async def exit_list_server(socket_enabled):
+    """Run local stand-in for the bulk exit list server."""
+    stats = {"requests": 0, "bytes": 0}
+
+    async def handler(request: web.Request) -> web.Response:
+        stats["requests"] += 1
+        if request.headers.get("If-None-Match") == ETAG_VALUE:
+            return web.Response(status=304, headers={"ETag": ETAG_VALUE})
+        body = EXIT_LIST.encode()
+        stats["bytes"] += len(body)
+        return web.Response(
+            body=body,
+            headers={
+                "ETag": ETAG_VALUE,
+                "Last-Modified": "Mon, 02 Oct 2023 10:00:00 GMT",
+            },
+        )
+
+    app = web.Application()
+
+    async def stream_handler(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(b"# Comment line\n")
+        for pos in range(0, len(EXIT_LIST), 1000):
+            await response.write(EXIT_LIST[pos : pos + 1000].encode())
+        await response.write(b"malformed line\n10.255.0.1  # inline comment\n")
+        await response.write_eof()
+        return response
+
+    async def stalled_handler(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        await response.prepare(request)
+        await response.write(EXIT_LIST.encode())
+        # Never finish the body, until client disconnects
+        await asyncio.sleep(3600)
+        return response
+
+    app.router.add_get("/exit-list", handler)
+    app.router.add_get("/exit-list-stream", stream_handler)
+    app.router.add_get("/exit-list-stalled", stalled_handler)
+    server = TestServer(app)
+    await server.start_server()
+    server.stats = stats
+    yield server
+    await server.close()
+
+
+async def test_exit_nodes_conditional_get(exit_list_server):
+    """Test exit list is revalidated instead of downloaded again."""
+    async with ClientSession() as session:
+        client = TorExitNodesApiClient(session)
+
+        with patch.object(
+            api, "TOR_CHECK_URL", str(exit_list_server.make_url("/exit-list"))
+        ), patch.object(
+            TorExitNodesBuilder,
+            "build",
+            autospec=True,
+            side_effect=TorExitNodesBuilder.build,
+        ) as parser:
+            first = await client.async_get_tor_exit_nodes()
+            second = await client.async_get_tor_exit_nodes()
+            third = await client.async_get_tor_exit_nodes()
+
+    assert len(first) == 1000
+    assert second is first
+    assert third is first
+    assert exit_list_server.stats["requests"] == 3
+    assert exit_list_server.stats["bytes"] == len(EXIT_LIST)
+    assert parser.call_count == 1
+    assert sorted(client._exit_nodes_validators.values()) == [
+        ETAG_VALUE,
+        "Mon, 02 Oct 2023 10:00:00 GMT",
+    ]
+
+
+async def test_get_data_unconditional(exit_list_server):
+    """Test plain requests never return not modified."""
+    async with ClientSession() as session:
+        url = str(exit_list_server.make_url("/exit-list"))
+
+        assert await api._async_get_data(session, url) == EXIT_LIST
+        assert await api._async_get_data(session, url) == EXIT_LIST
+
+    assert exit_list_server.stats["bytes"] == 2 * len(EXIT_LIST)
+
+
+async def test_exit_nodes_streaming(exit_list_server):
+    """Test exit list is parsed from chunked stream."""
+    async with ClientSession() as session:
+        client = TorExitNodesApiClient(session)
+
+        with patch.object(
+            api, "TOR_CHECK_URL", str(exit_list_server.make_url("/exit-list-stream"))
+        ):
+            nodes = await client.async_get_tor_exit_nodes()
+
+            assert len(nodes) == 1001
+            assert "10.0.3.250" in nodes
+            assert "10.255.0.1" in nodes
+
+            with patch.object(api, "EXIT_NODES_MAX_SIZE", 5000), pytest.raises(
+                TorCheckApiClientError, match="too large"
+            ):
+                await TorExitNodesApiClient(session).async_get_tor_exit_nodes()
+
+
+async def test_exit_nodes_too_large(exit_list_server):
+    """Test connection is released when oversized exit list is not read."""
+    async with ClientSession() as session:
+        with patch.object(
+            api, "TOR_CHECK_URL", str(exit_list_server.make_url("/exit-list-stalled"))
+        ), patch.object(api, "EXIT_NODES_MAX_SIZE", 5000), pytest.raises(
+            TorCheckApiClientError, match="too large"
+        ) as error:
+            await TorExitNodesApiClient(session).async_get_tor_exit_nodes()
+
+        # Not left to garbage collection of response referenced by traceback
+        assert error.value.__traceback__ is not None
+        assert not session.connector._acquired
+
+
+async def test_exit_nodes_parser_memory(record_property):
+    """Test streaming parser peak memory against reading whole text."""
+    count = 50000
+    lines = [
+        f"{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}.1\n".encode() for i in range(count)
+    ]
+
+    class _Content:
+        """Response stream stand-in, yielding chunks as they are received."""
+
+        def __init__(self):
+            self.iter = iter(lines)
+
+        def __aiter__(self):
+            return self
+
+        async def __anext__(self):
+            try:
+                return bytes(next(self.iter))
+            except StopIteration:
+                raise StopAsyncIteration from None
+
+        async def read(self):
+            return b"".join(bytes(line) for line in self.iter)
+
+    tracemalloc.start()
+    try:
+        nodes = await api._async_parse_exit_nodes(_Content())
+        _, streaming_peak = tracemalloc.get_traced_memory()
+        del nodes
+
+        tracemalloc.reset_peak()
+        text = (await _Content().read()).decode()
+        nodes = TorExitNodes.from_strings(text.split())
+        _, text_peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    record_property("streaming_peak_bytes", streaming_peak)
+    record_property("text_peak_bytes", text_peak)
+    assert len(nodes) == count
+    assert streaming_peak * 2 < text_peak
+
+
+@pytest.fixture
+async def ip_echo_server(socket_enabled):
+    """Run local stand-in for IP echo providers."""
+    stats = {"requests": [], "cancelled": []}
+
+    def echo(answer: str, delay: float = 0):
+        async def handler(request: web.Request) -> web.Response:
+            stats["requests"].append(request.path)
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                stats["cancelled"].append(request.path)
+                raise
+            return web.Response(text=answer)
+
+        return handler
+
+    app = web.Application()
+    app.router.add_get("/fast", echo("10.0.0.1\n"))
+    app.router.add_get("/slow", echo("10.0.0.2\n", delay=2))
+    app.router.add_get("/bad", echo("<html>Oops</html>"))
+    app.router.add_get("/json", echo('{"IsTor":true,"IP":"10.0.0.3"}'))
+
+    async def blob(request: web.Request) -> web.StreamResponse:
+        response = web.StreamResponse()
+        await response.prepare(request)
+        for _ in range(4):
+            await asyncio.sleep(0.05)
+            await response.write(bytes(64 * 1024))
+        await response.write_eof()
+        return response
+
+    app.router.add_get("/blob", blob)
+    server = TestServer(app)
+    await server.start_server()
+    server.stats = stats
+    yield server
+    await server.close()
+
+
+def _providers(server: TestServer, *paths: str) -> list[api.IpEchoProvider]:
+    """Return IP echo providers for paths of local server."""
+    return [
+        api.IpEchoProvider(
+            path,
+            str(server.make_url(f"/{path}")),
+            api._parse_tor_check_ip if path == "json" else str.strip,
+        )
+        for path in paths
+    ]
+
+
+@patch.object(api, "HEDGE_DELAY_DEFAULT", 0.1)
+async def test_hedged_ip_echo(ip_echo_server):
+    """Test the first valid answer wins and slow provider is demoted."""
+    async with ClientSession() as session:
+        echo = api.HedgedIpEcho(session, _providers(ip_echo_server, "slow", "fast"))
+
+        start = time.monotonic()
+        assert await echo.async_get_ip() == "10.0.0.1"
+        assert time.monotonic() - start < 1
+        await asyncio.sleep(0.05)
+        assert ip_echo_server.stats["cancelled"] == ["/slow"]
+        assert echo.health["fast"].score < echo.health["slow"].score
+
+        ip_echo_server.stats["requests"].clear()
+        assert await echo.async_get_ip() == "10.0.0.1"
+        assert ip_echo_server.stats["requests"] == ["/fast"]
+
+
+async def test_hedged_ip_echo_failures(ip_echo_server):
+    """Test invalid answers are skipped without waiting for hedge delay."""
+    async with ClientSession() as session:
+        echo = api.HedgedIpEcho(session, _providers(ip_echo_server, "bad", "json"))
+
+        start = time.monotonic()
+        assert await echo.async_get_ip() == "10.0.0.3"
+        assert time.monotonic() - start < api.HEDGE_DELAY_DEFAULT
+        assert echo.health["bad"].failures == 1
+        assert echo.health["json"].failures == 0
+
+        # Failing provider is asked last
+        ip_echo_server.stats["requests"].clear()
+        await echo.async_get_ip()
+        assert ip_echo_server.stats["requests"] == ["/json"]
+
+        echo = api.HedgedIpEcho(session, _providers(ip_echo_server, "bad"))
+        with pytest.raises(TorCheckApiClientError, match="Invalid answer"):
+            await echo.async_get_ip()
+
+
+def test_hedged_ip_echo_censored():
+    """Test cancelled request is a latency sample only if it is slow."""
+    health = api.IpEchoProviderHealth()
+    health.add_censored(0.01)
+    assert len(health.latencies) == 0
+    health.add_censored(api.HEDGE_DELAY_DEFAULT * 2)
+    assert len(health.latencies) == 1
+
+    for _ in range(4):
+        health.latencies.add(0.5)
+    health.add_censored(0.1)
+    assert len(health.latencies) == 5
+    health.add_censored(0.6)
+    assert len(health.latencies) == 6
+
+
+@patch.object(api, "HEDGE_DELAY_DEFAULT", 0.01)
+async def test_hedged_ip_echo_finished_together():
+    """Test all requests finished together are accounted."""
+    answered = asyncio.Event()
+
+    async def _request(provider: api.IpEchoProvider) -> str:
+        await answered.wait()
+        if provider.name == "bad":
+            raise TorCheckApiClientError
+        return "10.0.0.9"
+
+    echo = api.HedgedIpEcho(
+        None, [api.IpEchoProvider(name, name) for name in ("bad", "good", "other")]
+    )
+    with patch.object(echo, "_async_request", _request):
+        asyncio.get_running_loop().call_later(0.05, answered.set)
+        assert await echo.async_get_ip() == "10.0.0.9"
+
+    assert echo.health["bad"].failures == 1
+    assert len(echo.health["good"].latencies) == 1
+    assert len(echo.health["other"].latencies) == 1
+
+
+async def test_measure_transfer(ip_echo_server):
+    """Test transfer timings are measured."""
+    async with ClientSession() as session:
+        timings = await api._async_measure_transfer(
+            session, str(ip_echo_server.make_url("/blob"))
+        )
+
+    assert 0 < timings.ttfb < 0.15
+    # 256 kB in about 0.15-0.2 seconds
+    assert 1_000_000 < timings.throughput < 2_000_000
+
+
+async def test_single_flight():
+    """Test concurrent identical requests are sent once."""
+    calls = []
+
+    async def _request(value: str):
+        calls.append(value)
+        await asyncio.sleep(0.05)
+        if value == "error":
+            raise TorCheckApiClientError
+        return value
+
+    flights = api.SingleFlight(freshness=0.15)
+    results = await asyncio.gather(
+        *(flights.async_do("key", lambda: _request("a")) for _ in range(5)),
+        flights.async_do("other", lambda: _request("b")),
+    )
+    assert results == ["a"] * 5 + ["b"]
+    assert calls == ["a", "b"]
+
+    # Finished request is repeated unless caller allows reuse of fresh result
+    assert await flights.async_do("key", lambda: _request("c")) == "c"
+    assert await flights.async_do("key", lambda: _request("d"), max_age=5) == "c"
+    assert calls == ["a", "b", "c"]
+    await asyncio.sleep(0.2)
+    assert await flights.async_do("key", lambda: _request("e"), 30) == "e"
+
+    # Errors are shared but not reused
+    for _ in range(2):
+        with pytest.raises(TorCheckApiClientError):
+            await asyncio.gather(
+                flights.async_do("error", lambda: _request("error"), 5),
+                flights.async_do("error", lambda: _request("error"), 5),
+            )
+    assert calls.count("error") == 2
+
+
+async def test_single_flight_cancel():
+    """Test cancelled caller does not cancel request of others."""
+    flights = api.SingleFlight()
+
+    async def _request():
+        await asyncio.sleep(0.05)
+        return "a"
+
+    first = asyncio.create_task(flights.async_do("key", _request))
+    second = asyncio.create_task(flights.async_do("key", _request))
+    await asyncio.sleep(0)
+    first.cancel()
+    assert await second == "a"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+
+async def test_validation_reused(ip_echo_server):
+    """Test setup reuses TOR IP address just got by config flow validation."""
+    flights = api.SingleFlight()
+    async with ClientSession() as session:
+        for max_age in (0, api.SINGLE_FLIGHT_FRESHNESS):
+            client = api.TorCheckApiClient(
+                session,
+                session,
+                _providers(ip_echo_server, "fast"),
+                proxy_url="socks5://127.0.0.1:9050",
+                flights=flights,
+            )
+            assert await client.async_get_my_tor_ip(max_age) == "10.0.0.1"
+
+    assert ip_echo_server.stats["requests"] == ["/fast"]
+
+
+async def test_circuit_breaker():
+    """Test circuit opens after failures and is probed by single request."""
+    breaker = api.CircuitBreaker(failures=2, reset_min=0.05, reset_max=0.08)
+    for _ in range(2):
+        breaker.acquire()
+        breaker.release(False)
+    with pytest.raises(TorCheckApiClientCircuitOpenError):
+        breaker.acquire()
+
+    await asyncio.sleep(0.05)
+    breaker.acquire()
+    # Only one probe at once
+    with pytest.raises(TorCheckApiClientCircuitOpenError):
+        breaker.acquire()
+    breaker.release(False)
+
+    # Failed probe opens circuit for longer time
+    await asyncio.sleep(0.05)
+    with pytest.raises(TorCheckApiClientCircuitOpenError):
+        breaker.acquire()
+    await asyncio.sleep(0.03)
+    breaker.acquire()
+    breaker.release(True)
+    assert breaker.failures == 0
+    assert breaker.open_until is None
+    breaker.acquire()
+    breaker.release(None)
+
+
+async def test_request_policy():
+    """Test proxy errors are retried and trip circuit of the whole session."""
+    policy = api.RequestPolicy(attempts=2, backoff_min=0.01)
+    calls = []
+
+    async def _request(timeout: float):
+        calls.append(timeout)
+        if len(calls) < 3:
+            raise TorCheckApiClientProxyError
+        return "ok"
+
+    assert await policy.async_request("http://a.test/ip", _request) == "ok"
+    assert calls == [api.REQUEST_TIMEOUT] * 3
+    assert policy.budget.balance < api.RETRY_BUDGET_MAX - 1
+
+    # Retries are limited by budget
+    async def _fail(timeout: float):
+        calls.append(timeout)
+        raise TorCheckApiClientProxyError
+
+    calls.clear()
+    policy.budget.balance = 0
+    for _ in range(api.BREAKER_FAILURES):
+        with pytest.raises(TorCheckApiClientProxyError):
+            await policy.async_request("http://a.test/ip", _fail)
+    assert len(calls) == api.BREAKER_FAILURES
+
+    # Any endpoint fails fast when proxy is down
+    with pytest.raises(TorCheckApiClientCircuitOpenError):
+        await policy.async_request("http://b.test/ip", _request)
+    assert len(calls) == api.BREAKER_FAILURES
+
+
+async def test_request_policy_endpoints():
+    """Test failing endpoint does not suspend requests to the others."""
+    policy = api.RequestPolicy({"http://slow.test/": 0.05})
+
+    async def _request(timeout: float):
+        if timeout < api.REQUEST_TIMEOUT:
+            raise TorCheckApiClientCommunicationError
+        return timeout
+
+    for _ in range(api.BREAKER_FAILURES):
+        with pytest.raises(TorCheckApiClientCommunicationError):
+            await policy.async_request("http://slow.test/", _request)
+    with pytest.raises(TorCheckApiClientCircuitOpenError):
+        await policy.async_request("http://slow.test/other", _request)
+    assert await policy.async_request("http://fast.test/", _request) == (
+        api.REQUEST_TIMEOUT
+    )
+    assert policy.breaker.failures == 0
+
+
+async def test_proxy_errors(ip_echo_server):
+    """Test errors of proxy are told apart from errors behind it."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        closed_port = sock.getsockname()[1]
+    async with ClientSession(
+        connector=ProxyConnector.from_url(f"socks5://127.0.0.1:{closed_port}")
+    ) as session:
+        with pytest.raises(TorCheckApiClientProxyError):
+            await api._async_get_data(session, "http://echo.test/")
+
+    socks_server = FakeSocksServer(["10.0.0.1"], failure_rate=1)
+    await socks_server.start()
+    try:
+        async with ClientSession(
+            connector=ProxyConnector.from_url(f"socks5://127.0.0.1:{socks_server.port}")
+        ) as session:
+            with pytest.raises(TorCheckApiClientCommunicationError) as error:
+                await api._async_get_data(session, "http://echo.test/")
+            assert not isinstance(error.value, TorCheckApiClientProxyError)
+    finally:
+        await socks_server.stop()
+
+    # Per endpoint timeout
+    url = str(ip_echo_server.make_url("/slow"))
+    async with ClientSession() as session:
+        start = time.monotonic()
+        with pytest.raises(TorCheckApiClientCommunicationError, match="Timeout"):
+            await api._async_get_data(
+                session, url, policy=api.RequestPolicy({url: 0.1})
+            )
+        assert time.monotonic() - start < 1
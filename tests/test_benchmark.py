@@ -0,0 +1,59 @@
+# pylint: disable=redefined-outer-name
+"""Run offline benchmarks of tor_check.
+
+Run `scripts/benchmark` to get report of all scenarios in JSON format.
+"""
+from typing import Any
+
+import pytest
+
+from homeassistant.core import HomeAssistant
+
+from .benchmark import SCENARIOS, Scenario, async_run_scenario, write_report
+
+
+@pytest.fixture(scope="module")
+def bench_results(request: pytest.FixtureRequest):
+    """Collect results of scenarios and write report after the last one."""
+    results: list[dict[str, Any]] = []
+    yield results
+    if path := request.config.getoption("bench_report"):
+        write_report(path, results)
+
+
+@pytest.mark.parametrize("scenario", SCENARIOS, ids=lambda scenario: scenario.name)
+async def test_benchmark(
+    hass: HomeAssistant,
+    socket_enabled,
+    request: pytest.FixtureRequest,
+    bench_results: list[dict[str, Any]],
+    scenario: Scenario,
+):
+    """Test scenario runs and gives sane results."""
+    refreshes = request.config.getoption("bench_refreshes")
+    result = await async_run_scenario(hass, scenario, refreshes)
+    bench_results.append(result)
+
+    requests = result["requests_per_refresh"]
+    assert result["refreshes"] == refreshes
+    assert result["latency"]["max"] >= result["latency"]["p50"] > 0
+    assert result["allocations"]["peak_bytes"]["max"] > 0
+    # Transfer is measured only by the first refresh
+    assert requests["transfer"] == 0
+    if scenario.cold:
+        assert requests["exit_list"] == 1
+    else:
+        assert requests == {"tor": 0, "ip": 0, "exit_list": 0, "transfer": 0}
+    if scenario.tor_failure_rate == 0:
+        assert result["failed"] == 0
+        assert result["tor_connected"]
+        assert requests["ip"] == scenario.cold
+    if scenario.cold and scenario.tor_failure_rate < 1:
+        assert requests["tor"] >= 1
+    if scenario.tor_failure_rate == 1:
+        # TOR is reported down, and is not asked again until circuit resets
+        assert result["failed"] == 0
+        assert not result["tor_connected"]
+        assert requests["tor"] < 1
+    if scenario.tor_delay >= 0.2 or scenario.http_delay >= 0.2:
+        assert result["latency"]["p50"] >= 0.2
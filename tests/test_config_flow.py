@@ -0,0 +1,126 @@
+"""Test tor_check config flow."""
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tor_check.const import (
+    CONF_CIRCUIT_SAMPLES,
+    CONF_GEOIP_DATABASES,
+    CONF_HTTP_FILTER,
+    CONF_MAX_UPDATE_INTERVAL,
+    CONF_MIN_UPDATE_INTERVAL,
+    CONF_ONION_SERVICES,
+    CONF_TRANSFER_PROBE_URL,
+    DOMAIN,
+    HTTP_FILTER_OFF,
+)
+from homeassistant import data_entry_flow
+from homeassistant.core import HomeAssistant
+
+from .const import MOCK_CONFIG
+
+
+async def test_options_flow(hass: HomeAssistant):
+    """Test update intervals are configured by options flow."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["step_id"] == "init"
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={CONF_MIN_UPDATE_INTERVAL: 600, CONF_MAX_UPDATE_INTERVAL: 60},
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["errors"] == {"base": "intervals"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={CONF_MIN_UPDATE_INTERVAL: 60, CONF_MAX_UPDATE_INTERVAL: 600},
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert entry.options == {
+        CONF_MIN_UPDATE_INTERVAL: 60,
+        CONF_MAX_UPDATE_INTERVAL: 600,
+        CONF_HTTP_FILTER: HTTP_FILTER_OFF,
+        CONF_GEOIP_DATABASES: [],
+        CONF_CIRCUIT_SAMPLES: 0,
+        CONF_ONION_SERVICES: [],
+        CONF_TRANSFER_PROBE_URL: "",
+    }
+
+
+async def test_options_flow_geoip(hass: HomeAssistant, tmp_path):
+    """Test GeoIP databases are checked by options flow."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_MIN_UPDATE_INTERVAL: 60,
+            CONF_MAX_UPDATE_INTERVAL: 600,
+            CONF_GEOIP_DATABASES: [str(tmp_path / "missing.mmdb")],
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["errors"] == {CONF_GEOIP_DATABASES: "geoip_database"}
+
+
+async def test_options_flow_onion_services(hass: HomeAssistant):
+    """Test only onion URLs are allowed to monitor."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_MIN_UPDATE_INTERVAL: 60,
+            CONF_MAX_UPDATE_INTERVAL: 600,
+            CONF_ONION_SERVICES: ["http://example.onion/", "https://example.com/"],
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["errors"] == {CONF_ONION_SERVICES: "onion_url"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_MIN_UPDATE_INTERVAL: 60,
+            CONF_MAX_UPDATE_INTERVAL: 600,
+            CONF_ONION_SERVICES: ["http://example.onion/"],
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_ONION_SERVICES] == ["http://example.onion/"]
+
+
+async def test_options_flow_transfer_probe(hass: HomeAssistant):
+    """Test transfer speed is measured only with HTTP URL."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+
+    result = await hass.config_entries.options.async_init(entry.entry_id)
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_MIN_UPDATE_INTERVAL: 60,
+            CONF_MAX_UPDATE_INTERVAL: 600,
+            CONF_TRANSFER_PROBE_URL: "ftp://example.com/blob",
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["errors"] == {CONF_TRANSFER_PROBE_URL: "transfer_url"}
+
+    result = await hass.config_entries.options.async_configure(
+        result["flow_id"],
+        user_input={
+            CONF_MIN_UPDATE_INTERVAL: 60,
+            CONF_MAX_UPDATE_INTERVAL: 600,
+            CONF_TRANSFER_PROBE_URL: "https://example.com/blob",
+        },
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+    assert entry.options[CONF_TRANSFER_PROBE_URL] == "https://example.com/blob"
@@ -0,0 +1,107 @@
+"""Test tor_check TOR consensus parser."""
+from pathlib import Path
+import time
+
+from custom_components.tor_check.consensus import (
+    TorConsensusExitNodes,
+    TorConsensusParser,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+CONSENSUS = (FIXTURES / "consensus.txt").read_text()
+# Router status entries of real consensus cropped to 35 relays, from CollecTor
+REAL_CONSENSUS = (FIXTURES / "consensus-2018-06-01.txt").read_text()
+
+
+def _parse(text: str) -> TorConsensusParser:
+    """Feed consensus document to parser line by line."""
+    parser = TorConsensusParser()
+    for line in text.splitlines():
+        parser.feed_line(line)
+    return parser
+
+
+def _synthetic_consensus(relays: int, offset: int = 0) -> str:
+    """Scale recorded consensus up to given number of relays."""
+    entries = CONSENSUS.split("\nr ")
+    lines = []
+    for num in range(offset, offset + relays):
+        entry = entries[num % len(entries)].removeprefix("r ")
+        fields = entry.split(" ", 8)
+        fields[1] = f"{num:027d}"
+        fields[5] = f"10.{num >> 16 & 255}.{num >> 8 & 255}.{num & 255}"
+        lines.append("r " + " ".join(fields))
+    return "\n".join(lines)
+
+
+def test_parse_exits():
+    """Test exit relays are detected by policy summary and flags."""
+    assert _parse(CONSENSUS).finish() == {
+        "AAAT2i1RzHtbnYJpSqKFfM4YJX0": ("192.0.2.10", "2001:db8::10"),
+        "AAUwCmm9k7AoXPHUV1bIdo3yKzc": ("192.0.2.11",),
+        "AB3ffONkxq/+Nd2xOPGfu87mqxI": ("198.51.100.7",),
+        "ACbBCd2KexwT9xb2Y3nuoRaTTgc": ("198.51.100.7",),
+        "ADe2LGtMCvI2ZtX2zHw6MLnPNhQ": ("203.0.113.5",),
+    }
+
+
+def test_parse_real_consensus():
+    """Test exit relays are found in real consensus."""
+    assert _parse(REAL_CONSENSUS).finish() == {
+        "ABG9JIWtRdmE7EFZyI/AZuXjMA4": ("162.247.72.201",),
+        "AHe8unJE2z5qXtJ0boYXAGZoSIc": ("199.249.223.62",),
+        "APOGQHPkrE9LUkBQNFmcuqC6T5c": ("66.175.211.27",),
+        "ARG6m2BGaeY2/9W1A/OCpLetboA": ("176.10.104.240",),
+        "/+j2mNw7jl4/dtwpaIHbc7XUfgo": ("64.137.221.225",),
+        "/+z+LKro0r7xAPghVNGIpcZf9Zk": ("153.126.210.34",),
+    }
+
+    # Relay flagged BadExit is not an exit, even though its policy accepts ports
+    bad_exit = REAL_CONSENSUS.replace(
+        "s Exit Fast Guard HSDir Running Stable V2Dir Valid",
+        "s BadExit Exit Fast Guard HSDir Running Stable V2Dir Valid",
+        1,
+    )
+    assert "ABG9JIWtRdmE7EFZyI/AZuXjMA4" not in _parse(bad_exit).finish()
+
+
+def test_incremental_update():
+    """Test only changed relays are applied to the index."""
+    consensus = TorConsensusExitNodes()
+
+    assert consensus.apply(_parse(CONSENSUS)) == (5, 0)
+    assert len(consensus.exit_nodes) == 5
+    assert "2001:db8::10" in consensus.exit_nodes
+    assert consensus.apply(_parse(CONSENSUS)) == (0, 0)
+
+    # Relay on shared address changes identity, another relay changes address
+    updated = CONSENSUS.replace(
+        "r SharedIpA AB3ffONkxq/+Nd2xOPGfu87mqxI", "r SharedIpA-gone x"
+    ).replace("192.0.2.11 443 80", "192.0.2.12 443 80")
+    assert consensus.apply(_parse(updated)) == (1, 1)
+    assert "198.51.100.7" in consensus.exit_nodes
+    assert "192.0.2.11" not in consensus.exit_nodes
+    assert "192.0.2.12" in consensus.exit_nodes
+
+
+def test_benchmark_consensus():
+    """Benchmark full and incremental consensus processing."""
+    document = _synthetic_consensus(7000)
+    consensus = TorConsensusExitNodes()
+
+    start = time.perf_counter()
+    added, _ = consensus.apply(_parse(document))
+    full_time = time.perf_counter() - start
+
+    updated = _synthetic_consensus(7000, offset=70)
+    start = time.perf_counter()
+    changes = consensus.apply(_parse(updated))
+    update_time = time.perf_counter() - start
+
+    print(  # noqa: T201
+        f"consensus of {len(document)} bytes: full {full_time * 1000:.1f} ms, "
+        f"incremental {update_time * 1000:.1f} ms, {changes} changes"
+    )
+    assert added == len(consensus.exit_nodes)
+    assert changes[0] == changes[1] > 0
+    assert changes[0] < added // 10
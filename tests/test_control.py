@@ -0,0 +1,221 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check TOR control port client."""
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tor_check.api import (
+    TorCheckApiClientAuthenticationError,
+    TransferTimings,
+)
+from custom_components.tor_check.const import DOMAIN
+from custom_components.tor_check.control import TorControlClient
+from custom_components.tor_check.coordinator import (
+    CONTROL_POLL_INTERVAL,
+    DEFAULT_MIN_UPDATE_INTERVAL,
+    KEY_MY_TOR_IP,
+    KEY_TOR_CONNECTED,
+    KEY_TOR_EXIT_NODES,
+    TorCheckDataUpdateCoordinator,
+    TorExitNodesService,
+)
+from custom_components.tor_check.exit_nodes import TorExitNodes
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+
+from .common import FakeTorControlServer
+from .const import MOCK_CONFIG
+
+
+@pytest.fixture
+async def control_server(socket_enabled):
+    """Run local stand-in for TOR control port."""
+    server = FakeTorControlServer(password="secret")
+    await server.start()
+    yield server
+    await server.stop()
+
+
+async def test_control_client(control_server: FakeTorControlServer):
+    """Test control protocol commands and events."""
+    control_server.info["circuit-status"] = "1 BUILT $AAAA~relay\n.2 EXTENDED"
+    events = []
+    client = TorControlClient(
+        "127.0.0.1",
+        control_server.port,
+        "secret",
+        on_event=lambda event, args: events.append((event, args)),
+    )
+
+    await client.async_connect()
+    assert client.connected
+    assert control_server.commands == ['AUTHENTICATE "secret"']
+
+    assert await client.async_get_info(
+        "status/circuit-established", "circuit-status"
+    ) == {
+        "status/circuit-established": "1",
+        "circuit-status": "1 BUILT $AAAA~relay\n2 EXTENDED",
+    }
+
+    await client.async_set_events("CIRC", "STATUS_CLIENT")
+    await control_server.push_event("CIRC 3 BUILT $BBBB~relay")
+    await control_server.push_event("STATUS_CLIENT NOTICE CIRCUIT_ESTABLISHED")
+    await asyncio.sleep(0.05)
+    assert events == [
+        ("CIRC", "3 BUILT $BBBB~relay"),
+        ("STATUS_CLIENT", "NOTICE CIRCUIT_ESTABLISHED"),
+    ]
+
+    await client.async_close()
+    assert not client.connected
+
+
+async def test_control_client_handler_error(control_server: FakeTorControlServer):
+    """Test error of event handler does not break connection."""
+    events = []
+
+    def _on_event(event: str, args: str) -> None:
+        events.append(event)
+        if len(events) == 1:
+            raise ValueError("Oops")
+
+    client = TorControlClient(
+        "127.0.0.1", control_server.port, "secret", on_event=_on_event
+    )
+    await client.async_connect()
+    await client.async_set_events("CIRC")
+    await control_server.push_event("CIRC 3 BUILT $BBBB~relay")
+    await control_server.push_event("CIRC 4 BUILT $CCCC~relay")
+    await asyncio.sleep(0.05)
+    assert events == ["CIRC", "CIRC"]
+    assert client.connected
+    assert await client.async_get_info("status/circuit-established")
+
+    await client.async_close()
+
+
+async def test_control_client_auth_failed(control_server: FakeTorControlServer):
+    """Test wrong password."""
+    client = TorControlClient("127.0.0.1", control_server.port, "wrong")
+
+    with pytest.raises(TorCheckApiClientAuthenticationError):
+        await client.async_connect()
+    assert not client.connected
+
+
+async def test_coordinator_push_updates(
+    hass: HomeAssistant,
+    control_server: FakeTorControlServer,
+    freezer: FrozenDateTimeFactory,
+):
+    """Test coordinator is updated by control port events instead of polling."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    entry.add_to_hass(hass)
+    client = MagicMock()
+    client.async_get_tor_exit_nodes = AsyncMock(
+        return_value=TorExitNodes.from_strings(["10.0.0.1"])
+    )
+    client.async_get_my_tor_ip = AsyncMock(return_value="10.0.0.1")
+    client.async_get_my_ip = AsyncMock(return_value="192.168.1.1")
+    client.async_measure_tor_transfer = AsyncMock(
+        return_value=TransferTimings(0.5, 100000)
+    )
+    client.async_measure_transfer = AsyncMock(
+        return_value=TransferTimings(0.05, 1000000)
+    )
+    token = config_entries.current_entry.set(entry)
+    coordinator = TorCheckDataUpdateCoordinator(
+        hass, client, TorExitNodesService(hass, client)
+    )
+    config_entries.current_entry.reset(token)
+
+    await coordinator.async_connect_control("127.0.0.1", control_server.port, "secret")
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == CONTROL_POLL_INTERVAL
+    assert coordinator.data[KEY_TOR_CONNECTED] is True
+    assert client.async_get_my_tor_ip.await_count == 1
+
+    await control_server.push_event(
+        "STATUS_CLIENT NOTICE CIRCUIT_NOT_ESTABLISHED REASON=CLOCK_JUMPED"
+    )
+    await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+    assert coordinator.data[KEY_TOR_CONNECTED] is False
+    assert coordinator.data[KEY_MY_TOR_IP] is None
+    assert client.async_get_my_tor_ip.await_count == 1
+
+    await control_server.push_event("STATUS_CLIENT NOTICE CIRCUIT_ESTABLISHED")
+    await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+    assert coordinator.data[KEY_TOR_CONNECTED] is True
+    assert client.async_get_my_tor_ip.await_count == 2
+
+    # Exit circuit rotated by TOR is seen by long poll
+    client.async_get_my_tor_ip.return_value = "10.0.0.2"
+    freezer.tick(CONTROL_POLL_INTERVAL)
+    await coordinator.async_refresh()
+    assert client.async_get_my_tor_ip.await_count == 3
+    assert coordinator.data[KEY_MY_TOR_IP] == "10.0.0.2"
+    assert coordinator.data[KEY_TOR_CONNECTED] is False
+    assert coordinator.update_interval == CONTROL_POLL_INTERVAL
+
+    await control_server.disconnect()
+    await asyncio.sleep(0.05)
+    await hass.async_block_till_done()
+    assert coordinator.update_interval == DEFAULT_MIN_UPDATE_INTERVAL
+
+    await coordinator.async_close_control()
+    await coordinator.async_shutdown()
+
+
+async def test_coordinator_consensus_exit_nodes(
+    hass: HomeAssistant, control_server: FakeTorControlServer
+):
+    """Test exit nodes are taken from local TOR consensus."""
+    consensus = (Path(__file__).parent / "fixtures" / "consensus.txt").read_text()
+    control_server.info["ns/all"] = consensus
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG)
+    entry.add_to_hass(hass)
+    client = MagicMock()
+    client.async_get_tor_exit_nodes = AsyncMock()
+    client.async_get_my_tor_ip = AsyncMock(return_value="192.0.2.11")
+    client.async_get_my_ip = AsyncMock(return_value="192.168.1.1")
+    client.async_measure_tor_transfer = AsyncMock(
+        return_value=TransferTimings(0.5, 100000)
+    )
+    client.async_measure_transfer = AsyncMock(
+        return_value=TransferTimings(0.05, 1000000)
+    )
+    token = config_entries.current_entry.set(entry)
+    coordinator = TorCheckDataUpdateCoordinator(
+        hass, client, TorExitNodesService(hass, client)
+    )
+    config_entries.current_entry.reset(token)
+
+    await coordinator.async_connect_control("127.0.0.1", control_server.port, "secret")
+    await coordinator.async_refresh()
+    assert coordinator.data[KEY_TOR_CONNECTED] is True
+    assert len(coordinator.data[KEY_TOR_EXIT_NODES]) == 5
+    client.async_get_tor_exit_nodes.assert_not_called()
+
+    await control_server.push_event(
+        "NEWCONSENSUS", consensus.replace("192.0.2.11", "192.0.2.12")
+    )
+    await asyncio.sleep(0.05)
+    assert coordinator.data[KEY_TOR_CONNECTED] is False
+    assert "192.0.2.12" in coordinator.data[KEY_TOR_EXIT_NODES]
+
+    # Refresh after control port is closed uses shared list of exit nodes
+    await coordinator.async_close_control()
+    client.async_get_tor_exit_nodes.return_value = TorExitNodes.from_strings(
+        ["192.0.2.11"]
+    )
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.data[KEY_TOR_CONNECTED] is True
+    await coordinator.async_shutdown()
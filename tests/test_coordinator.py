@@ -0,0 +1,307 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check coordinator."""
+import asyncio
+from datetime import timedelta
+import time
+from unittest.mock import AsyncMock, MagicMock
+
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from pytest_homeassistant_custom_component.common import (
+    MockConfigEntry,
+    async_fire_time_changed,
+)
+
+from custom_components.tor_check.api import (
+    TorCheckApiClientCommunicationError,
+    TransferTimings,
+)
+from custom_components.tor_check.const import DOMAIN
+from custom_components.tor_check.coordinator import (
+    KEY_DIRECT_THROUGHPUT,
+    KEY_DIRECT_TTFB,
+    KEY_MY_IP,
+    KEY_MY_TOR_IP,
+    KEY_TOR_CONNECTED,
+    KEY_TOR_EXIT_NODES,
+    KEY_TOR_GEOIP,
+    KEY_TOR_THROUGHPUT,
+    KEY_TOR_TTFB,
+    STORAGE_KEY,
+    STORAGE_VERSION,
+    TRANSFER_PROBE_INTERVAL,
+    TRANSFER_STATS_SIZE,
+    TorCheckDataUpdateCoordinator,
+    TorExitNodesService,
+)
+from custom_components.tor_check.exit_nodes import TorExitNodes
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.update_coordinator import UpdateFailed
+import homeassistant.util.dt as dt_util
+
+from .const import MOCK_CONFIG
+
+
+@pytest.fixture
+def client():
+    """Return mocked API client."""
+    client = MagicMock()
+    client.async_get_tor_exit_nodes = AsyncMock(
+        return_value=TorExitNodes.from_strings(["10.0.0.1", "10.0.0.2"])
+    )
+    client.async_get_my_tor_ip = AsyncMock(return_value="10.0.0.1")
+    client.async_get_my_ip = AsyncMock(return_value="192.168.1.1")
+    client.async_measure_tor_transfer = AsyncMock(
+        return_value=TransferTimings(0.5, 100000)
+    )
+    client.async_measure_transfer = AsyncMock(
+        return_value=TransferTimings(0.05, 1000000)
+    )
+    return client
+
+
+@pytest.fixture(autouse=True)
+def config_entry(hass: HomeAssistant):
+    """Set up config entry to create coordinators for."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+    token = config_entries.current_entry.set(entry)
+    yield entry
+    config_entries.current_entry.reset(token)
+
+
+def _create_coordinator(
+    hass: HomeAssistant,
+    client,
+    exit_nodes: TorExitNodesService | None = None,
+    transfer_probe_url: str | None = None,
+) -> TorCheckDataUpdateCoordinator:
+    """Create coordinator with mocked API client."""
+    return TorCheckDataUpdateCoordinator(
+        hass,
+        client,
+        exit_nodes or TorExitNodesService(hass, client),
+        transfer_probe_url=transfer_probe_url,
+    )
+
+
+async def test_update_data(hass: HomeAssistant, client):
+    """Test data update."""
+    coordinator = _create_coordinator(hass, client)
+
+    data = await coordinator._async_update_data()
+
+    assert data[KEY_MY_TOR_IP] == "10.0.0.1"
+    assert data[KEY_MY_IP] == "192.168.1.1"
+    assert data[KEY_TOR_CONNECTED] is True
+    assert data[KEY_TOR_GEOIP] is None
+
+
+async def test_update_data_geoip(hass: HomeAssistant, client):
+    """Test TOR IP is enriched with GeoIP data."""
+    geoip = MagicMock()
+    geoip.async_lookup = AsyncMock(return_value={"country": "DE"})
+    coordinator = TorCheckDataUpdateCoordinator(
+        hass, client, TorExitNodesService(hass, client), geoip=geoip
+    )
+
+    data = await coordinator._async_update_data()
+
+    assert data[KEY_TOR_GEOIP] == {"country": "DE"}
+    geoip.async_lookup.assert_awaited_once_with(hass, "10.0.0.1")
+
+
+async def test_update_data_concurrently(hass: HomeAssistant, client):
+    """Test data sources are fetched concurrently."""
+
+    def slow(value):
+        async def _fetch(**_kwargs):
+            await asyncio.sleep(0.1)
+            return value
+
+        return _fetch
+
+    client.async_get_tor_exit_nodes = slow(TorExitNodes.from_strings(["10.0.0.1"]))
+    client.async_get_my_tor_ip = slow("10.0.0.1")
+    client.async_get_my_ip = slow("192.168.1.1")
+    coordinator = _create_coordinator(hass, client)
+
+    start = time.monotonic()
+    data = await coordinator._async_update_data()
+
+    assert time.monotonic() - start < 0.25
+    assert data[KEY_TOR_CONNECTED] is True
+    assert set(coordinator.fetch_durations) == {
+        KEY_TOR_EXIT_NODES,
+        KEY_MY_TOR_IP,
+        KEY_MY_IP,
+    }
+    assert all(0.1 <= value < 0.25 for value in coordinator.fetch_durations.values())
+
+
+async def test_update_data_tor_failure(hass: HomeAssistant, client):
+    """Test TOR communication error doesn't break the update."""
+    client.async_get_my_tor_ip.side_effect = TorCheckApiClientCommunicationError
+    coordinator = _create_coordinator(hass, client)
+
+    data = await coordinator._async_update_data()
+
+    assert data[KEY_MY_TOR_IP] is None
+    assert data[KEY_MY_IP] == "192.168.1.1"
+    assert data[KEY_TOR_CONNECTED] is False
+
+
+async def test_update_data_real_ip_failure(hass: HomeAssistant, client):
+    """Test real IP communication error fails the update."""
+    client.async_get_my_ip.side_effect = TorCheckApiClientCommunicationError
+    coordinator = _create_coordinator(hass, client)
+
+    with pytest.raises(UpdateFailed):
+        await coordinator._async_update_data()
+
+
+async def test_transfer_stats(hass: HomeAssistant, client):
+    """Test transfer timings are probed periodically into bounded statistics."""
+    coordinator = _create_coordinator(hass, client)
+    await coordinator._async_update_data()
+    # Transfer is not measured unless URL is set
+    client.async_measure_tor_transfer.assert_not_awaited()
+    client.async_measure_transfer.assert_not_awaited()
+
+    coordinator = _create_coordinator(
+        hass, client, transfer_probe_url="https://example.com/blob"
+    )
+    await coordinator._async_update_data()
+    await coordinator._async_update_data()
+    client.async_measure_tor_transfer.assert_awaited_once_with(
+        "https://example.com/blob"
+    )
+    assert coordinator.transfer_stats[KEY_TOR_TTFB].percentile(50) == 500
+    assert coordinator.transfer_stats[KEY_TOR_THROUGHPUT].percentile(50) == 100
+    assert coordinator.transfer_stats[KEY_DIRECT_TTFB].percentile(50) == 50
+    assert coordinator.transfer_stats[KEY_DIRECT_THROUGHPUT].percentile(50) == 1000
+
+    # Failed probe doesn't fail the update
+    client.async_measure_tor_transfer.side_effect = TorCheckApiClientCommunicationError
+    for _ in range(TRANSFER_STATS_SIZE * 2):
+        coordinator._transfer_probe_due -= TRANSFER_PROBE_INTERVAL
+        data = await coordinator._async_update_data()
+    assert data[KEY_TOR_CONNECTED] is True
+    assert len(coordinator.transfer_stats[KEY_TOR_TTFB]) == 1
+    assert len(coordinator.transfer_stats[KEY_DIRECT_TTFB]) == TRANSFER_STATS_SIZE
+
+
+async def test_adaptive_update_interval(hass: HomeAssistant, client):
+    """Test update interval stretches while stable and drops after failures."""
+    coordinator = TorCheckDataUpdateCoordinator(
+        hass,
+        client,
+        TorExitNodesService(hass, client),
+        min_update_interval=timedelta(seconds=30),
+        max_update_interval=timedelta(hours=1),
+    )
+
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(minutes=1)
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(minutes=2)
+
+    # Stable interval is aligned to cached TOR IP expiration
+    for _ in range(4):
+        await coordinator.async_refresh()
+    assert timedelta(minutes=14) < coordinator.update_interval <= timedelta(minutes=15)
+
+    # TOR failure turns to short rechecks
+    coordinator._cache.pop(KEY_MY_TOR_IP)
+    client.async_get_my_tor_ip.side_effect = TorCheckApiClientCommunicationError
+    await coordinator.async_refresh()
+    assert coordinator.data[KEY_TOR_CONNECTED] is False
+    assert coordinator.update_interval <= timedelta(seconds=36)
+    await coordinator.async_refresh()
+    assert timedelta(seconds=48) <= coordinator.update_interval <= timedelta(seconds=72)
+
+    # Change of connection state is rechecked with fresh request
+    client.async_get_my_tor_ip.side_effect = None
+    await coordinator.async_refresh()
+    assert coordinator.data[KEY_TOR_CONNECTED] is True
+    assert coordinator.update_interval <= timedelta(seconds=36)
+    assert KEY_MY_TOR_IP not in coordinator._cache
+    await coordinator.async_refresh()
+    assert coordinator.update_interval == timedelta(minutes=1)
+    assert client.async_get_my_tor_ip.await_count == 5
+
+    # Failed update is rechecked soon too
+    coordinator._cache.pop(KEY_MY_IP)
+    client.async_get_my_ip.side_effect = TorCheckApiClientCommunicationError
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success is False
+    assert coordinator.update_interval <= timedelta(seconds=36)
+
+
+async def test_exit_nodes_shared(hass: HomeAssistant, client):
+    """Test exit nodes list is downloaded once for all coordinators."""
+
+    async def _fetch():
+        await asyncio.sleep(0.05)
+        return TorExitNodes.from_strings(["10.0.0.1"])
+
+    client.async_get_tor_exit_nodes = AsyncMock(side_effect=_fetch)
+    exit_nodes = TorExitNodesService(hass, client)
+    coordinators = [_create_coordinator(hass, client, exit_nodes) for _ in range(3)]
+
+    results = await asyncio.gather(
+        *(coordinator._async_update_data() for coordinator in coordinators)
+    )
+
+    client.async_get_tor_exit_nodes.assert_awaited_once()
+    assert results[0][KEY_TOR_EXIT_NODES] is results[1][KEY_TOR_EXIT_NODES]
+    assert results[0][KEY_TOR_EXIT_NODES] is results[2][KEY_TOR_EXIT_NODES]
+
+    await coordinators[0]._async_update_data()
+    client.async_get_tor_exit_nodes.assert_awaited_once()
+
+
+async def test_cache_persistence(
+    hass: HomeAssistant, hass_storage, client, freezer: FrozenDateTimeFactory
+):
+    """Test cache is saved to storage and restored on next start."""
+    coordinator = _create_coordinator(hass, client)
+    await coordinator._async_update_data()
+
+    freezer.tick(timedelta(seconds=30))
+    async_fire_time_changed(hass)
+    await hass.async_block_till_done()
+    stored = hass_storage[f"{STORAGE_KEY}.test"]
+    assert stored["version"] == STORAGE_VERSION
+    assert set(stored["data"]) == {KEY_MY_TOR_IP, KEY_MY_IP}
+    assert f"{STORAGE_KEY}.exit_nodes" in hass_storage
+
+    freezer.tick(timedelta(minutes=20))
+    coordinator = _create_coordinator(hass, client)
+    await coordinator.async_load_cache()
+
+    # IP addresses are expired already, exit nodes list is still fresh
+    assert coordinator._cache_get(KEY_MY_TOR_IP) is None
+    assert coordinator.exit_nodes.exit_nodes == TorExitNodes.from_strings(
+        ["10.0.0.1", "10.0.0.2"]
+    )
+
+    client.async_get_tor_exit_nodes.reset_mock()
+    await coordinator._async_update_data()
+    client.async_get_tor_exit_nodes.assert_not_called()
+    assert client.async_get_my_tor_ip.call_count == 2
+
+
+async def test_cache_broken_storage(hass: HomeAssistant, hass_storage, client):
+    """Test broken storage data is ignored."""
+    hass_storage[f"{STORAGE_KEY}.exit_nodes"] = {
+        "version": STORAGE_VERSION,
+        "key": f"{STORAGE_KEY}.exit_nodes",
+        "data": [dt_util.utcnow().timestamp() + 3600, ["not base64!", ""]],
+    }
+    coordinator = _create_coordinator(hass, client)
+
+    await coordinator.async_load_cache()
+
+    assert coordinator.exit_nodes.exit_nodes is None
@@ -0,0 +1,186 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check diagnostics and requests tracing."""
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+from aiohttp_socks import ProxyConnector
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tor_check import api
+from custom_components.tor_check.api import (
+    TorCheckApiClient,
+    TorCheckApiClientError,
+    TransferTimings,
+)
+from custom_components.tor_check.const import (
+    CONF_CONTROL_PASSWORD,
+    DOMAIN,
+    SERVICE_DEBUG,
+)
+from custom_components.tor_check.coordinator import (
+    CACHE_HITS,
+    CACHE_MISSES,
+    CACHE_STORES,
+    TorCheckDataUpdateCoordinator,
+    TorExitNodesService,
+)
+from custom_components.tor_check.diagnostics import (
+    async_get_config_entry_diagnostics,
+)
+from custom_components.tor_check.exit_nodes import TorExitNodes
+from custom_components.tor_check.tracing import RequestTracer
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+
+from .common import FakeHttpServer, FakeSocksServer
+from .const import MOCK_CONFIG
+
+
+@pytest.fixture
+async def http_server(socket_enabled):
+    """Run local stand-in for remote servers."""
+    server = FakeHttpServer("198.51.100.1", ["10.0.0.1"], delay=0.05)
+    await server.start()
+    yield server
+    await server.stop()
+
+
+async def test_trace_direct(http_server: FakeHttpServer):
+    """Test phases of direct requests are traced."""
+    tracer = RequestTracer(size=2)
+    async with aiohttp.ClientSession(
+        trace_configs=[tracer.trace_config("direct")]
+    ) as session:
+        assert await api._async_get_data(session, f"{http_server.url}/ip")
+        assert await api._async_get_data(session, f"{http_server.url}/ip")
+        with pytest.raises(TorCheckApiClientError):
+            await api._async_get_data(session, "http://127.0.0.1:1/ip")
+
+    # Only the last requests are kept
+    first, second = (timings.as_dict() for timings in tracer.history)
+    assert first["via"] == "direct"
+    assert first["connect"] is None
+    assert first["reused"]
+    assert first["server"] >= 0.05
+    assert first["total"] >= first["server"]
+    assert first["error"] is None
+
+    # Connection failed
+    assert second["connect"] is None
+    assert second["server"] is None
+    assert second["total"] is not None
+    assert second["error"]
+
+
+async def test_trace_proxy(socket_enabled):
+    """Test requests through TOR are traced with SOCKS negotiation."""
+    socks_server = FakeSocksServer(["10.0.0.1"], delay=0.05)
+    await socks_server.start()
+    tracer = RequestTracer()
+    proxy_url = f"socks5://127.0.0.1:{socks_server.port}"
+    try:
+        async with aiohttp.ClientSession(
+            connector=ProxyConnector.from_url(proxy_url),
+            trace_configs=[tracer.trace_config(proxy_url)],
+        ) as session:
+            assert await api._async_get_data(session, "http://echo.test/") == (
+                "10.0.0.1"
+            )
+    finally:
+        await socks_server.stop()
+
+    (timings,) = (timings.as_dict() for timings in tracer.history)
+    assert timings["via"] == proxy_url
+    assert timings["url"] == "http://echo.test/"
+    assert timings["connect"] is not None
+    assert timings["server"] >= 0.05
+
+
+async def test_cache_stats(hass: HomeAssistant):
+    """Test cache usage and refresh durations are counted."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+    token = config_entries.current_entry.set(entry)
+    client = MagicMock()
+    client.async_get_my_tor_ip = AsyncMock(return_value="10.0.0.1")
+    client.async_get_my_ip = AsyncMock(side_effect=TorCheckApiClientError)
+    client.async_measure_tor_transfer = AsyncMock(side_effect=TorCheckApiClientError)
+    client.async_measure_transfer = AsyncMock(side_effect=TorCheckApiClientError)
+    exit_nodes = MagicMock()
+    exit_nodes.async_get_exit_nodes = AsyncMock(
+        return_value=TorExitNodes.from_strings(["10.0.0.1"])
+    )
+    coordinator = TorCheckDataUpdateCoordinator(hass, client, exit_nodes)
+    config_entries.current_entry.reset(token)
+
+    with pytest.raises(Exception):
+        await coordinator._async_update_data()
+    client.async_get_my_ip.side_effect = None
+    client.async_get_my_ip.return_value = "192.168.1.1"
+    await coordinator._async_update_data()
+    await coordinator._async_update_data()
+
+    # TOR IP is cached by the first refresh and used by the next ones
+    assert coordinator.cache_stats == {CACHE_HITS: 3, CACHE_MISSES: 3, CACHE_STORES: 2}
+    assert [success for _, _, success in coordinator.refresh_history] == [
+        False,
+        True,
+        True,
+    ]
+
+
+async def test_diagnostics(hass: HomeAssistant, http_server: FakeHttpServer):
+    """Test diagnostics of config entry and debug service."""
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data={**MOCK_CONFIG, CONF_CONTROL_PASSWORD: "secret"},
+        entry_id="test",
+    )
+    entry.add_to_hass(hass)
+
+    async def _get_my_ip(self, max_age: float = 0) -> str:
+        return await api._async_get_data(self._session, f"{http_server.url}/ip")
+
+    timings = TransferTimings(0.1, 1000)
+    with patch.object(
+        TorExitNodesService,
+        "async_get_exit_nodes",
+        return_value=TorExitNodes.from_strings(["10.0.0.1", "10.0.0.2"]),
+    ), patch.object(
+        TorCheckApiClient, "async_get_my_tor_ip", return_value="10.0.0.1"
+    ), patch.object(
+        TorCheckApiClient, "async_get_my_ip", _get_my_ip
+    ), patch.object(
+        TorCheckApiClient, "async_measure_tor_transfer", return_value=timings
+    ), patch.object(
+        TorCheckApiClient, "async_measure_transfer", return_value=timings
+    ):
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        await hass.async_block_till_done()
+
+        diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+        response = await hass.services.async_call(
+            DOMAIN, SERVICE_DEBUG, blocking=True, return_response=True
+        )
+        assert await hass.config_entries.async_unload(entry.entry_id)
+
+    assert diagnostics["entry"]["data"][CONF_CONTROL_PASSWORD] == "**REDACTED**"
+    assert diagnostics["coordinator"]["last_update_success"]
+    assert len(diagnostics["coordinator"]["refreshes"]) == 1
+    assert diagnostics["coordinator"]["cache"][CACHE_STORES] == 2
+    assert diagnostics["coordinator"]["exit_nodes"] == {"count": 2, "bytes": 8}
+    (request,) = diagnostics["requests"]
+    assert request["url"] == f"{http_server.url}/ip"
+    assert request["via"] == "direct"
+    assert request["server"] >= 0.05
+    assert diagnostics["circuits"]["direct"]["session"] == {
+        "failures": 0,
+        "open_for": None,
+    }
+
+    assert response["entries"]["test"]["title"] == entry.title
+    assert response["entries"]["test"]["refreshes"] == (
+        diagnostics["coordinator"]["refreshes"]
+    )
+    assert response["requests"] == diagnostics["requests"]
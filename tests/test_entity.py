@@ -0,0 +1,80 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check entities."""
+from collections import Counter
+from datetime import timedelta
+from unittest.mock import patch
+
+from freezegun.api import FrozenDateTimeFactory
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tor_check.api import TorCheckApiClient, TransferTimings
+from custom_components.tor_check.const import CONF_TRANSFER_PROBE_URL, DOMAIN
+from custom_components.tor_check.coordinator import TorExitNodesService
+from custom_components.tor_check.entity import TorCheckEntity
+from custom_components.tor_check.exit_nodes import TorExitNodes
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity import Entity
+import homeassistant.util.dt as dt_util
+
+from .const import MOCK_CONFIG
+
+POLL_INTERVAL = timedelta(seconds=30)
+
+
+async def test_state_writes_per_day(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+):
+    """Test states are written only when data has changed."""
+    writes: Counter[str] = Counter()
+    write_state = Entity.async_write_ha_state
+
+    def _count_write(self: Entity) -> None:
+        writes[self.entity_id] += 1
+        write_state(self)
+
+    async def _get_my_tor_ip(self, max_age: float = 0) -> str:
+        # TOR exit node changes every hour
+        return f"10.0.0.{dt_util.utcnow().hour + 1}"
+
+    entry = MockConfigEntry(
+        domain=DOMAIN,
+        data=MOCK_CONFIG,
+        options={CONF_TRANSFER_PROBE_URL: "https://example.com/blob"},
+        entry_id="test",
+    )
+    entry.add_to_hass(hass)
+    timings = TransferTimings(0.1, 1000)
+    with patch.object(
+        TorExitNodesService,
+        "async_get_exit_nodes",
+        return_value=TorExitNodes.from_strings(["10.0.0.1"]),
+    ), patch.object(
+        TorCheckApiClient, "async_get_my_tor_ip", _get_my_tor_ip
+    ), patch.object(
+        TorCheckApiClient, "async_get_my_ip", return_value="192.168.1.1"
+    ), patch.object(
+        TorCheckApiClient, "async_measure_tor_transfer", return_value=timings
+    ), patch.object(
+        TorCheckApiClient, "async_measure_transfer", return_value=timings
+    ), patch.object(
+        TorCheckEntity, "async_write_ha_state", _count_write
+    ):
+        freezer.move_to("2023-10-02 00:00:00+00:00")
+        assert await hass.config_entries.async_setup(entry.entry_id)
+        coordinator = hass.data[DOMAIN][entry.entry_id]
+
+        # Poll every 30 seconds for a day
+        for _ in range(timedelta(days=1) // POLL_INTERVAL):
+            freezer.tick(POLL_INTERVAL)
+            await coordinator.async_refresh()
+
+        assert hass.states.get("sensor.tor_ip").state == "10.0.0.24"
+        assert await hass.config_entries.async_unload(entry.entry_id)
+    # Initial state and one write per change of exit node
+    assert writes["sensor.tor_ip"] == 1 + 23
+    assert writes["binary_sensor.tor"] == 1 + 23
+    assert writes["sensor.real_ip"] == 1
+    # Transfer is measured every 15 minutes
+    assert writes["sensor.tor_throughput"] == 1 + 96
+    # Instead of 7 * 2880 writes on every poll
+    assert sum(writes.values()) == 3 + 2 * 23 + 4 * 97
@@ -0,0 +1,137 @@
+# pylint: disable=protected-access
+"""Test tor_check exit nodes index."""
+import random
+import sys
+import timeit
+from unittest.mock import patch
+
+from custom_components.tor_check import exit_nodes
+from custom_components.tor_check.exit_nodes import TorExitNodes
+
+
+def _random_ips(count: int, seed: int = 0) -> list[str]:
+    """Generate list of random IPv4 addresses."""
+    rnd = random.Random(seed)
+    return [".".join(str(rnd.randint(1, 254)) for _ in range(4)) for _ in range(count)]
+
+
+def test_membership():
+    """Test membership checks."""
+    nodes = TorExitNodes.from_strings(
+        ["10.0.0.1", "192.168.1.7", "2001:db8::1", "garbage", "", "1.2.3"]
+    )
+
+    assert len(nodes) == 3
+    assert "10.0.0.1" in nodes
+    assert "192.168.1.7" in nodes
+    assert "2001:db8::1" in nodes
+    assert "2001:0db8:0000::0001" in nodes
+    assert "10.0.0.2" not in nodes
+    assert "garbage" not in nodes
+    assert None not in nodes
+    assert sorted(nodes) == ["10.0.0.1", "192.168.1.7", "2001:db8::1"]
+
+
+def test_count_network():
+    """Test CIDR prefix queries."""
+    nodes = TorExitNodes.from_strings(
+        ["10.0.0.1", "10.0.0.200", "10.0.1.1", "2001:db8::1", "2001:db9::1"]
+    )
+
+    assert nodes.count_network("10.0.0.0/24") == 2
+    assert nodes.count_network("10.0.0.0/16") == 3
+    assert nodes.count_network("10.0.0.1/32") == 1
+    assert nodes.count_network("11.0.0.0/8") == 0
+    assert nodes.count_network("2001:db8::/32") == 1
+    assert nodes.count_network("2001:db8::/16") == 2
+    assert nodes.count_network("not a network") == 0
+
+
+def test_equality():
+    """Test index comparison."""
+    assert TorExitNodes.from_strings(["1.1.1.1", "1.1.1.1"]) == TorExitNodes(
+        [0x01010101]
+    )
+    assert TorExitNodes.from_strings(["1.1.1.1"]) != TorExitNodes()
+    assert not TorExitNodes()
+
+
+def test_benchmark_against_list(record_property):
+    """Compare index with plain list of strings lookup."""
+    exits = _random_ips(2000)
+    probes = _random_ips(200, seed=1) + exits[::10]
+    nodes = TorExitNodes.from_strings(exits)
+
+    assert [ip in nodes for ip in probes] == [ip in exits for ip in probes]
+
+    list_time = min(
+        timeit.repeat(lambda: [ip in exits for ip in probes], number=5, repeat=3)
+    )
+    index_time = min(
+        timeit.repeat(lambda: [ip in nodes for ip in probes], number=5, repeat=3)
+    )
+    list_size = sys.getsizeof(exits) + sum(sys.getsizeof(ip) for ip in exits)
+
+    record_property("list_us_per_lookup", round(list_time * 1e6 / 5 / len(probes), 2))
+    record_property("list_bytes", list_size)
+    record_property("index_us_per_lookup", round(index_time * 1e6 / 5 / len(probes), 2))
+    record_property("index_bytes", nodes.nbytes)
+    assert nodes.nbytes * 4 < list_size
+
+
+def test_packed_roundtrip():
+    """Test packing to bytes and back."""
+    nodes = TorExitNodes.from_strings(["1.2.3.4", "255.0.0.1", "2001:db8::1"])
+
+    ipv4, ipv6 = nodes.to_bytes()
+
+    assert ipv4 == bytes([1, 2, 3, 4, 255, 0, 0, 1])
+    assert len(ipv6) == 16
+    assert TorExitNodes.from_bytes(ipv4, ipv6) == nodes
+
+
+def test_lookup():
+    """Test batch lookup of addresses and networks."""
+    nodes = TorExitNodes.from_strings(["10.0.0.1", "10.0.1.1", "2001:db8::1"])
+
+    assert nodes.lookup(["10.0.0.1", "10.0.0.2", "10.0.0.0/16", "2001:db8::1"]) == {
+        "10.0.0.1": 1,
+        "10.0.0.2": 0,
+        "10.0.0.0/16": 2,
+        "2001:db8::1": 1,
+    }
+    # Malformed address doesn't break bulk matching of others
+    assert nodes.lookup(["10.0.0.1", "10.0.0.256", "10.0.1.1"]) == {
+        "10.0.0.1": 1,
+        "10.0.0.256": None,
+        "10.0.1.1": 1,
+    }
+    assert nodes.lookup([]) == {}
+
+
+def test_benchmark_lookup():
+    """Compare batch lookup of 100k addresses with loop of membership checks."""
+    nodes = TorExitNodes.from_strings(_random_ips(2000))
+    probes = _random_ips(100_000, seed=1)
+
+    results = nodes.lookup(probes)
+    assert [bool(results[ip]) for ip in probes] == [ip in nodes for ip in probes]
+
+    # Only malformed and IPv6 addresses are parsed one by one
+    with patch.object(
+        exit_nodes, "_parse_address", wraps=exit_nodes._parse_address
+    ) as parse:
+        results = nodes.lookup([*probes, "10.0.0.256", "2001:db8::1"])
+    assert parse.call_count == 2
+    assert results["10.0.0.256"] is None
+    assert len(results) == len(set(probes)) + 2
+
+    loop_time = min(
+        timeit.repeat(lambda: [ip in nodes for ip in probes], number=1, repeat=3)
+    )
+    batch_time = min(timeit.repeat(lambda: nodes.lookup(probes), number=1, repeat=3))
+
+    print(  # noqa: T201
+        f"loop: {len(probes) / loop_time:,.0f} addresses/s; "
+        f"batch: {len(probes) / batch_time:,.0f} addresses/s"
+    )
@@ -0,0 +1,224 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check fleet of TOR daemons."""
+import asyncio
+from contextlib import AsyncExitStack
+from datetime import timedelta
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import aiohttp
+from aiohttp_socks import ProxyConnector
+from freezegun.api import FrozenDateTimeFactory
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tor_check.api import (
+    IpEchoProvider,
+    TorCheckApiClient,
+    TorCheckApiClientCommunicationError,
+)
+from custom_components.tor_check.const import CONF_FLEET, DOMAIN
+from custom_components.tor_check.coordinator import (
+    KEY_MY_TOR_IP,
+    KEY_TOR_CONNECTED,
+    TorExitNodesService,
+)
+from custom_components.tor_check.exit_nodes import TorExitNodes
+from custom_components.tor_check.fleet import (
+    FLEET_MAX_SIZE,
+    KEY_DAEMONS,
+    TorFleetDataUpdateCoordinator,
+    parse_endpoints,
+)
+from homeassistant import config_entries, data_entry_flow
+from homeassistant.const import STATE_OFF, STATE_ON
+from homeassistant.core import HomeAssistant
+
+from .common import FakeSocksServer
+
+# Number of daemons in scale test
+FLEET_SIZE = 60
+# Seconds to answer by every daemon in scale test
+PROBE_DELAY = 0.1
+
+
+def test_parse_endpoints():
+    """Test parsing of SOCKS endpoints."""
+    assert parse_endpoints(["tor:9050", " 10.0.0.1:9050-9052", "tor:9050"]) == [
+        ("tor", 9050),
+        ("10.0.0.1", 9050),
+        ("10.0.0.1", 9051),
+        ("10.0.0.1", 9052),
+    ]
+    assert parse_endpoints(["[2001:db8::1]:9050"]) == [("2001:db8::1", 9050)]
+
+    for spec in ("tor", ":9050", "tor:9051-9050", "tor:0", "tor:70000", "tor:a-b"):
+        with pytest.raises(ValueError):
+            parse_endpoints([spec])
+    with pytest.raises(ValueError):
+        parse_endpoints([f"tor:1-{FLEET_MAX_SIZE + 1}"])
+
+
+@pytest.fixture
+async def socks_servers(socket_enabled):
+    """Run local stand-ins for a fleet of TOR daemons, each with own exit."""
+    servers = [
+        FakeSocksServer([f"192.0.2.{i}"], PROBE_DELAY) for i in range(FLEET_SIZE)
+    ]
+    await asyncio.gather(*(server.start() for server in servers))
+    yield servers
+    await asyncio.gather(*(server.stop() for server in servers))
+
+
+async def test_fleet_scale(hass: HomeAssistant, socks_servers: list[FakeSocksServer]):
+    """Test fleet is probed concurrently with bounded parallelism."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_FLEET: []}, entry_id="test")
+    entry.add_to_hass(hass)
+    # Every second daemon exits through listed node
+    exit_nodes = TorExitNodes.from_strings(
+        [f"192.0.2.{i}" for i in range(0, FLEET_SIZE, 2)]
+    )
+    exit_nodes_service = MagicMock()
+    exit_nodes_service.async_get_exit_nodes = AsyncMock(return_value=exit_nodes)
+
+    async with AsyncExitStack() as stack:
+        clients = {}
+        for server in socks_servers:
+            proxy_url = f"socks5://127.0.0.1:{server.port}"
+            session = await stack.enter_async_context(
+                aiohttp.ClientSession(connector=ProxyConnector.from_url(proxy_url))
+            )
+            clients[proxy_url] = TorCheckApiClient(
+                session,
+                session,
+                providers=[IpEchoProvider("echo", "http://echo.test/")],
+                proxy_url=proxy_url,
+            )
+        token = config_entries.current_entry.set(entry)
+        coordinator = TorFleetDataUpdateCoordinator(
+            hass, clients, exit_nodes_service, parallel=16
+        )
+        config_entries.current_entry.reset(token)
+
+        peak = 0
+
+        async def _watch() -> None:
+            nonlocal peak
+            while True:
+                peak = max(peak, sum(server.active for server in socks_servers))
+                await asyncio.sleep(0.005)
+
+        watcher = asyncio.create_task(_watch())
+        start = time.monotonic()
+        data = await coordinator._async_update_data()
+        elapsed = time.monotonic() - start
+        watcher.cancel()
+
+    assert 1 < peak <= 16
+    assert all(len(server.usernames) == 1 for server in socks_servers)
+    assert elapsed < FLEET_SIZE * PROBE_DELAY / 4
+    assert [daemon[KEY_TOR_CONNECTED] for daemon in data[KEY_DAEMONS].values()] == [
+        i % 2 == 0 for i in range(FLEET_SIZE)
+    ]
+
+
+async def test_fleet_daemon_backoff(
+    hass: HomeAssistant, freezer: FrozenDateTimeFactory
+):
+    """Test unreachable daemon backs off alone and healthy ones keep their pace."""
+    entry = MockConfigEntry(domain=DOMAIN, data={CONF_FLEET: []}, entry_id="test")
+    entry.add_to_hass(hass)
+    exit_nodes_service = MagicMock()
+    exit_nodes_service.async_get_exit_nodes = AsyncMock(
+        return_value=TorExitNodes.from_strings(["10.0.0.1", "10.0.0.2"])
+    )
+    clients = {daemon: MagicMock() for daemon in ("tor:9050", "tor:9051", "tor:9052")}
+    clients["tor:9050"].async_get_my_tor_ip = AsyncMock(return_value="10.0.0.1")
+    clients["tor:9051"].async_get_my_tor_ip = AsyncMock(return_value="10.0.0.2")
+    clients["tor:9052"].async_get_my_tor_ip = AsyncMock(
+        side_effect=TorCheckApiClientCommunicationError("unreachable")
+    )
+    token = config_entries.current_entry.set(entry)
+    coordinator = TorFleetDataUpdateCoordinator(
+        hass,
+        clients,
+        exit_nodes_service,
+        min_update_interval=timedelta(seconds=10),
+        max_update_interval=timedelta(seconds=300),
+    )
+    config_entries.current_entry.reset(token)
+
+    # Unreachable daemon doesn't fail the refresh for the healthy ones
+    await coordinator.async_refresh()
+    assert coordinator.last_update_success
+    assert coordinator.scheduler._failures == 0
+    assert coordinator.daemon_schedulers["tor:9050"]._failures == 0
+    assert coordinator.daemon_schedulers["tor:9052"]._failures == 1
+    assert coordinator.update_interval < timedelta(seconds=20)
+
+    # Only the unreachable daemon is due for a recheck
+    freezer.tick(coordinator.update_interval)
+    await coordinator.async_refresh()
+    assert clients["tor:9050"].async_get_my_tor_ip.await_count == 1
+    assert clients["tor:9052"].async_get_my_tor_ip.await_count == 2
+    assert coordinator.daemon_schedulers["tor:9052"]._failures == 2
+    daemons = coordinator.data[KEY_DAEMONS]
+    assert daemons["tor:9050"] == {KEY_MY_TOR_IP: "10.0.0.1", KEY_TOR_CONNECTED: True}
+    assert daemons["tor:9052"] == {KEY_MY_TOR_IP: None, KEY_TOR_CONNECTED: False}
+
+    # Fleet backs off only when every daemon fails
+    for client in clients.values():
+        client.async_get_my_tor_ip = AsyncMock(
+            side_effect=TorCheckApiClientCommunicationError("unreachable")
+        )
+    freezer.tick(timedelta(seconds=300))
+    await coordinator.async_refresh()
+    assert coordinator.scheduler._failures == 1
+    assert not any(
+        daemon[KEY_TOR_CONNECTED] for daemon in coordinator.data[KEY_DAEMONS].values()
+    )
+
+
+async def test_fleet_setup(hass: HomeAssistant):
+    """Test fleet is configured by user and gets entities per daemon."""
+
+    async def _async_get_my_tor_ip(self, max_age=0):
+        # Only first daemon exits through listed node
+        return "10.0.0.1" if self._proxy_url.endswith("9050") else "10.0.0.2"
+
+    result = await hass.config_entries.flow.async_init(
+        DOMAIN, context={"source": config_entries.SOURCE_USER}
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.MENU
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {"next_step_id": "fleet"}
+    )
+    assert result["step_id"] == "fleet"
+
+    result = await hass.config_entries.flow.async_configure(
+        result["flow_id"], {CONF_FLEET: ["127.0.0.1:9052-9050"]}
+    )
+    assert result["type"] == data_entry_flow.FlowResultType.FORM
+    assert result["errors"] == {CONF_FLEET: "endpoints"}
+
+    with patch.object(
+        TorExitNodesService,
+        "async_get_exit_nodes",
+        return_value=TorExitNodes.from_strings(["10.0.0.1"]),
+    ), patch.object(TorCheckApiClient, "async_get_my_tor_ip", _async_get_my_tor_ip):
+        result = await hass.config_entries.flow.async_configure(
+            result["flow_id"], {CONF_FLEET: ["127.0.0.1:9050-9052"]}
+        )
+        await hass.async_block_till_done()
+
+        assert result["type"] == data_entry_flow.FlowResultType.CREATE_ENTRY
+        assert result["title"] == "Fleet of 3 TOR daemons"
+        entry = result["result"]
+        assert entry.state is config_entries.ConfigEntryState.LOADED
+
+        assert hass.states.get("binary_sensor.tor_127_0_0_1_9050").state == STATE_ON
+        assert hass.states.get("binary_sensor.tor_127_0_0_1_9051").state == STATE_OFF
+        assert hass.states.get("sensor.tor_ip_127_0_0_1_9052").state == "10.0.0.2"
+
+        assert await hass.config_entries.async_unload(entry.entry_id)
+        await hass.async_block_till_done()
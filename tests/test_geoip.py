@@ -0,0 +1,79 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check GeoIP enrichment."""
+from pathlib import Path
+from unittest.mock import patch
+
+from mmdb_writer import MMDBWriter
+from netaddr import IPSet
+import pytest
+
+from custom_components.tor_check.geoip import (
+    CACHE_SIZE,
+    GEOIP_AS_ORGANIZATION,
+    GEOIP_ASN,
+    GEOIP_COUNTRY,
+    GEOIP_COUNTRY_NAME,
+    GeoIpReader,
+)
+from homeassistant.core import HomeAssistant
+
+
+@pytest.fixture
+def geoip_databases(tmp_path: Path) -> list[str]:
+    """Write country and ASN databases."""
+    country = MMDBWriter(
+        ip_version=6, ipv4_compatible=True, database_type="GeoLite2-Country"
+    )
+    country.insert_network(
+        IPSet(["192.0.2.0/24"]),
+        {"country": {"iso_code": "DE", "names": {"en": "Germany"}}},
+    )
+    country.to_db_file(str(tmp_path / "country.mmdb"))
+
+    asn = MMDBWriter(ip_version=6, ipv4_compatible=True, database_type="GeoLite2-ASN")
+    asn.insert_network(
+        IPSet(["192.0.0.0/16"]),
+        {
+            "autonomous_system_number": 64496,
+            "autonomous_system_organization": "Example AS",
+        },
+    )
+    asn.to_db_file(str(tmp_path / "asn.mmdb"))
+    return [str(tmp_path / "country.mmdb"), str(tmp_path / "asn.mmdb")]
+
+
+async def test_lookup(hass: HomeAssistant, geoip_databases, tmp_path: Path):
+    """Test data of all databases is merged."""
+    geoip = GeoIpReader.open([*geoip_databases, str(tmp_path / "missing.mmdb")])
+
+    assert await geoip.async_lookup(hass, "192.0.2.1") == {
+        GEOIP_COUNTRY: "DE",
+        GEOIP_COUNTRY_NAME: "Germany",
+        GEOIP_ASN: 64496,
+        GEOIP_AS_ORGANIZATION: "Example AS",
+    }
+    assert await geoip.async_lookup(hass, "192.0.3.1") == {
+        GEOIP_ASN: 64496,
+        GEOIP_AS_ORGANIZATION: "Example AS",
+    }
+    assert await geoip.async_lookup(hass, "10.0.0.1") == {}
+    assert await geoip.async_lookup(hass, "not an address") == {}
+
+    geoip.close()
+
+
+async def test_lookup_cache(hass: HomeAssistant, geoip_databases):
+    """Test databases are read once per recent IP address."""
+    geoip = GeoIpReader.open(geoip_databases)
+
+    with patch.object(geoip, "lookup", wraps=geoip.lookup) as lookup:
+        for _ in range(3):
+            assert (await geoip.async_lookup(hass, "192.0.2.1"))[GEOIP_COUNTRY] == "DE"
+        assert lookup.call_count == 1
+
+        for i in range(CACHE_SIZE + 1):
+            await geoip.async_lookup(hass, f"10.0.{i // 250}.{i % 250 + 1}")
+        assert len(geoip._cache) == CACHE_SIZE
+        assert "192.0.2.1" not in geoip._cache
+
+    geoip.close()
@@ -0,0 +1,82 @@
+"""Test import time of tor_check integration."""
+from pathlib import Path
+import subprocess
+import sys
+
+import pytest
+
+# Modules Home Assistant has loaded before integrations are imported
+PRELOADED = (
+    "homeassistant.core",
+    "homeassistant.config_entries",
+    "homeassistant.helpers.config_validation",
+    "homeassistant.helpers.selector",
+)
+
+# Modules which must not be loaded until config entry is set up
+DEFERRED = (
+    "aiohttp_socks",
+    "python_socks",
+    "maxminddb",
+    "homeassistant.helpers.update_coordinator",
+    "custom_components.tor_check.api",
+    "custom_components.tor_check.control",
+    "custom_components.tor_check.coordinator",
+    "custom_components.tor_check.onion",
+    "custom_components.tor_check.proxy",
+)
+
+# Modules of integration loaded to show config flow
+CONFIG_FLOW_MODULES = {
+    "custom_components.tor_check",
+    "custom_components.tor_check.config_flow",
+    "custom_components.tor_check.const",
+}
+
+
+def _import_times(module: str) -> dict[str, int]:
+    """Return cumulative import times of modules loaded by importing module."""
+    result = subprocess.run(
+        [
+            sys.executable,
+            "-X",
+            "importtime",
+            "-c",
+            f"import {', '.join(PRELOADED)}; import {module}",
+        ],
+        capture_output=True,
+        check=True,
+        cwd=Path(__file__).parents[1],
+        text=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = line.split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+@pytest.mark.parametrize(
+    "module", ["custom_components.tor_check", "custom_components.tor_check.config_flow"]
+)
+def test_deferred_imports(module: str):
+    """Test networking and data sources are not loaded with integration."""
+    times = _import_times(module)
+
+    assert module in times
+    assert not set(DEFERRED) & set(times)
+
+
+def test_config_flow_import_time():
+    """Benchmark import time of config flow."""
+    times = _import_times("custom_components.tor_check.config_flow")
+
+    print(  # noqa: T201
+        "config flow import time: "
+        f"{times['custom_components.tor_check.config_flow']} us"
+    )
+    assert {
+        name for name in times if name.startswith("custom_components.")
+    } == CONFIG_FLOW_MODULES
@@ -0,0 +1,148 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check HTTP middleware."""
+import time
+from unittest.mock import MagicMock
+
+from aiohttp import ClientSession, web
+from aiohttp.test_utils import TestServer
+import pytest
+
+from custom_components.tor_check.const import (
+    DOMAIN,
+    HTTP_FILTER_LOG,
+    HTTP_FILTER_OFF,
+    HTTP_FILTER_REJECT,
+    HTTP_FILTER_TAG,
+)
+from custom_components.tor_check.exit_nodes import TorExitNodes
+from custom_components.tor_check.middleware import (
+    KEY_TOR_EXIT,
+    TorExitFilter,
+    async_get_http_filter,
+)
+from homeassistant.core import HomeAssistant
+
+
+def test_filter_cache():
+    """Test LRU cache of client classifications."""
+    http_filter = TorExitFilter(size=2)
+    exit_nodes = TorExitNodes.from_strings(["10.0.0.1"])
+    http_filter.set_exit_nodes(exit_nodes)
+
+    assert http_filter.is_tor_exit("10.0.0.1") is True
+    assert http_filter.is_tor_exit("10.0.0.2") is False
+    assert http_filter.is_tor_exit("10.0.0.1") is True
+    assert http_filter.is_tor_exit("10.0.0.3") is False
+    assert list(http_filter._state[1]) == ["10.0.0.1", "10.0.0.3"]
+
+    # Same index keeps the cache
+    http_filter.set_exit_nodes(exit_nodes)
+    assert len(http_filter._state[1]) == 2
+
+    # New index comes with empty cache
+    http_filter.set_exit_nodes(TorExitNodes.from_strings(["10.0.0.2"]))
+    assert not http_filter._state[1]
+    assert http_filter.is_tor_exit("10.0.0.1") is False
+    assert http_filter.is_tor_exit("10.0.0.2") is True
+
+
+def test_filter_cache_hit():
+    """Test recent client is classified without lookup in exit nodes index."""
+    http_filter = TorExitFilter()
+    exit_nodes = MagicMock()
+    exit_nodes.__contains__.return_value = True
+    http_filter.set_exit_nodes(exit_nodes)
+
+    for _ in range(1000):
+        assert http_filter.is_tor_exit("10.0.0.1") is True
+    assert exit_nodes.__contains__.call_count == 1
+
+
+async def test_install_filter(hass: HomeAssistant):
+    """Test filter is installed once and only before server start."""
+    assert async_get_http_filter(hass) is None
+
+    hass.http = MagicMock(app=web.Application())
+    http_filter = async_get_http_filter(hass)
+    assert http_filter is not None
+    assert async_get_http_filter(hass) is http_filter
+    assert list(hass.http.app.middlewares) == [http_filter.middleware]
+
+    hass.data.pop(DOMAIN)
+    hass.http.app.freeze()
+    assert async_get_http_filter(hass) is None
+
+
+@pytest.fixture
+async def filtered_server(socket_enabled):
+    """Run local web server with TOR exit nodes filter."""
+    http_filter = TorExitFilter()
+    http_filter.set_exit_nodes(TorExitNodes.from_strings(["127.0.0.1"]))
+
+    async def handler(request: web.Request) -> web.Response:
+        return web.Response(text="tor" if request.get(KEY_TOR_EXIT) else "direct")
+
+    app = web.Application(middlewares=[http_filter.middleware])
+    app.router.add_get("/", handler)
+    server = TestServer(app)
+    await server.start_server()
+    server.http_filter = http_filter
+    yield server
+    await server.close()
+
+
+async def test_middleware_actions(filtered_server, caplog):
+    """Test requests from exit nodes are tagged, logged or rejected."""
+    http_filter: TorExitFilter = filtered_server.http_filter
+    url = str(filtered_server.make_url("/"))
+
+    async with ClientSession() as session:
+        async with session.get(url) as response:
+            assert await response.text() == "direct"
+
+        http_filter.action = HTTP_FILTER_TAG
+        async with session.get(url) as response:
+            assert await response.text() == "tor"
+        assert "TOR exit node" not in caplog.text
+
+        http_filter.action = HTTP_FILTER_LOG
+        async with session.get(url) as response:
+            assert await response.text() == "tor"
+        assert "Request from TOR exit node 127.0.0.1 to /" in caplog.text
+
+        http_filter.action = HTTP_FILTER_REJECT
+        async with session.get(url) as response:
+            assert response.status == 403
+
+        http_filter.set_exit_nodes(TorExitNodes.from_strings(["10.0.0.1"]))
+        async with session.get(url) as response:
+            assert await response.text() == "direct"
+
+
+async def test_middleware_load(filtered_server):
+    """Measure per request overhead of the middleware."""
+    http_filter: TorExitFilter = filtered_server.http_filter
+    http_filter.set_exit_nodes(TorExitNodes.from_strings(["10.0.0.1"]))
+    url = str(filtered_server.make_url("/"))
+    count = 200
+
+    async def _load() -> float:
+        start = time.monotonic()
+        async with ClientSession() as session:
+            for _ in range(count):
+                async with session.get(url) as response:
+                    await response.read()
+        return time.monotonic() - start
+
+    http_filter.action = HTTP_FILTER_OFF
+    await _load()  # Warm up
+    off_time = min([await _load() for _ in range(3)])
+    http_filter.action = HTTP_FILTER_TAG
+    on_time = min([await _load() for _ in range(3)])
+
+    print(  # noqa: T201
+        f"without filter: {off_time * 1e6 / count:.0f} us/request; "
+        f"with filter: {on_time * 1e6 / count:.0f} us/request"
+    )
+    # Requests of the same client are classified by cache
+    assert http_filter._state[1] == {"127.0.0.1": False}
@@ -0,0 +1,105 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check onion services monitor."""
+import asyncio
+import time
+from unittest.mock import patch
+
+from aiohttp import ClientSession
+from aiohttp_socks import ProxyConnector
+import pytest
+
+from custom_components.tor_check import onion
+from custom_components.tor_check.api import (
+    TorCheckApiClientCommunicationError,
+    _async_probe_url,
+)
+from custom_components.tor_check.onion import OnionServicesMonitor, is_onion_url
+
+from .common import FakeSocksServer
+
+URLS = [f"http://service{i}.onion/" for i in range(10)]
+
+
+def test_is_onion_url():
+    """Test onion URLs validation."""
+    assert is_onion_url("http://example.onion/")
+    assert is_onion_url("https://example.onion:8443/status")
+    assert not is_onion_url("https://example.com/")
+    assert not is_onion_url("ftp://example.onion/")
+    assert not is_onion_url("example.onion")
+
+
+async def test_probe_all_at_once():
+    """Test services are probed concurrently with limited parallelism."""
+    active = max_active = 0
+
+    async def _probe(url: str, timeout: float) -> float:
+        nonlocal active, max_active
+        active += 1
+        max_active = max(max_active, active)
+        await asyncio.sleep(0.05)
+        active -= 1
+        if url == URLS[0]:
+            raise TorCheckApiClientCommunicationError("Timeout")
+        return 0.05
+
+    monitor = OnionServicesMonitor(URLS, parallel=3)
+    start = time.monotonic()
+    services = await monitor.async_probe(_probe)
+
+    # 10 probes of 0.05 s by 3 at once
+    assert time.monotonic() - start < 0.3
+    assert max_active == 3
+    assert services[URLS[0]].reachable is False
+    assert services[URLS[0]].error == "Timeout"
+    assert all(services[url].reachable for url in URLS[1:])
+
+
+async def test_backoff():
+    """Test unreachable service is retried with exponential backoff."""
+    calls = []
+
+    async def _probe(url: str, timeout: float) -> float:
+        calls.append(url)
+        raise TorCheckApiClientCommunicationError
+
+    monitor = OnionServicesMonitor(URLS[:1])
+    now = 1000.0
+    with patch.object(onion.time, "monotonic", side_effect=lambda: now):
+        await monitor.async_probe(_probe)
+        await monitor.async_probe(_probe)
+        assert len(calls) == 1
+        assert monitor.services[URLS[0]].next_probe == now + 60
+
+        now += 60
+        await monitor.async_probe(_probe)
+        assert len(calls) == 2
+        assert monitor.services[URLS[0]].next_probe == now + 120
+
+        for _ in range(10):
+            now = monitor.services[URLS[0]].next_probe
+            await monitor.async_probe(_probe)
+        assert monitor.services[URLS[0]].next_probe == now + 30 * 60
+        assert monitor.services[URLS[0]].failures == 12
+
+
+@pytest.fixture
+async def socks_server(socket_enabled):
+    """Run local stand-in for TOR SOCKS port."""
+    server = FakeSocksServer(["192.0.2.1"])
+    await server.start()
+    yield server
+    await server.stop()
+
+
+async def test_probe_through_tor(socks_server: FakeSocksServer):
+    """Test reachability is probed through SOCKS proxy."""
+    socks_server.unreachable.add("down.onion")
+    async with ClientSession(
+        connector=ProxyConnector.from_url(
+            f"socks5://127.0.0.1:{socks_server.port}", rdns=True
+        )
+    ) as session:
+        assert await _async_probe_url(session, "http://up.onion/", 5) >= 0
+        with pytest.raises(TorCheckApiClientCommunicationError):
+            await _async_probe_url(session, "http://down.onion/", 5)
@@ -0,0 +1,121 @@
+# pylint: disable=protected-access,redefined-outer-name
+"""Test tor_check circuits sampling."""
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.tor_check.api import IpEchoProvider, TorCheckApiClientError
+from custom_components.tor_check.const import DOMAIN
+from custom_components.tor_check.coordinator import (
+    CIRCUITS_EXITS,
+    CIRCUITS_FAILED,
+    CIRCUITS_LATENCIES,
+    CIRCUITS_UNLISTED,
+    KEY_TOR_CIRCUITS,
+    TorCheckDataUpdateCoordinator,
+    TorExitNodesService,
+)
+from custom_components.tor_check.exit_nodes import TorExitNodes
+from custom_components.tor_check.sampling import CircuitSample, TorCircuitSampler
+from homeassistant import config_entries
+from homeassistant.core import HomeAssistant
+
+from .common import FakeSocksServer
+from .const import MOCK_CONFIG
+
+EXITS = ["192.0.2.1", "192.0.2.2", "192.0.2.3"]
+
+
+@pytest.fixture
+async def socks_server(socket_enabled):
+    """Run local stand-in for TOR SOCKS port."""
+    server = FakeSocksServer(EXITS, delay=0.05)
+    await server.start()
+    yield server
+    await server.stop()
+
+
+async def test_sample_circuits(socks_server: FakeSocksServer):
+    """Test circuits are isolated and sampled with bounded parallelism."""
+    sampler = TorCircuitSampler(
+        "127.0.0.1",
+        socks_server.port,
+        8,
+        providers=[IpEchoProvider("echo", "http://echo.example/")],
+        parallel=3,
+    )
+
+    samples = await sampler.async_sample()
+
+    assert len(samples) == 8
+    assert {sample.exit_ip for sample in samples} <= set(EXITS)
+    assert all(sample.latency >= 0.05 for sample in samples)
+    assert len(set(socks_server.usernames)) == 8
+    assert socks_server.max_active == 3
+
+    # Next run uses fresh circuits
+    await sampler.async_sample()
+    assert len(set(socks_server.usernames)) == 16
+
+
+async def test_sample_circuits_failure(socks_server: FakeSocksServer):
+    """Test failed circuit is reported without exit IP."""
+    port = socks_server.port
+    await socks_server.stop()
+    sampler = TorCircuitSampler(
+        "127.0.0.1", port, 2, providers=[IpEchoProvider("echo", "http://echo/")]
+    )
+
+    samples = await sampler.async_sample()
+
+    assert [sample.exit_ip for sample in samples] == [None, None]
+
+
+def test_aggregate_circuits():
+    """Test distinct and unlisted exit nodes of samples."""
+    samples = [
+        CircuitSample("192.0.2.2", 0.5),
+        CircuitSample("192.0.2.1", 1.25),
+        CircuitSample("192.0.2.2", 0.75),
+        CircuitSample(None, 10),
+    ]
+
+    assert TorCheckDataUpdateCoordinator._aggregate_circuits(
+        samples, TorExitNodes.from_strings(["192.0.2.1"])
+    ) == {
+        CIRCUITS_EXITS: ["192.0.2.1", "192.0.2.2"],
+        CIRCUITS_UNLISTED: ["192.0.2.2"],
+        CIRCUITS_LATENCIES: [0.5, 1.25, 0.75],
+        CIRCUITS_FAILED: 1,
+    }
+
+
+async def test_coordinator_circuits(hass: HomeAssistant):
+    """Test circuits are sampled hourly into coordinator data."""
+    entry = MockConfigEntry(domain=DOMAIN, data=MOCK_CONFIG, entry_id="test")
+    entry.add_to_hass(hass)
+    token = config_entries.current_entry.set(entry)
+    client = MagicMock()
+    client.async_get_tor_exit_nodes = AsyncMock(
+        return_value=TorExitNodes.from_strings(EXITS)
+    )
+    client.async_get_my_tor_ip = AsyncMock(return_value="192.0.2.1")
+    client.async_get_my_ip = AsyncMock(return_value="192.168.1.1")
+    client.async_measure_tor_transfer = AsyncMock(side_effect=TorCheckApiClientError)
+    client.async_measure_transfer = AsyncMock(side_effect=TorCheckApiClientError)
+    sampler = MagicMock()
+    sampler.async_sample = AsyncMock(
+        return_value=[CircuitSample("192.0.2.1", 1), CircuitSample("198.51.100.1", 2)]
+    )
+    coordinator = TorCheckDataUpdateCoordinator(
+        hass, client, TorExitNodesService(hass, client), circuit_sampler=sampler
+    )
+    config_entries.current_entry.reset(token)
+
+    await coordinator._async_update_data()
+    data = await coordinator._async_update_data()
+
+    assert sampler.async_sample.await_count == 1
+    assert data[KEY_TOR_CIRCUITS][CIRCUITS_EXITS] == ["192.0.2.1", "198.51.100.1"]
+    assert data[KEY_TOR_CIRCUITS][CIRCUITS_UNLISTED] == ["198.51.100.1"]
@@ -0,0 +1,59 @@
+"""Test tor_check adaptive update interval."""
+from datetime import timedelta
+
+from custom_components.tor_check.scheduler import AdaptiveUpdateInterval
+
+MIN_INTERVAL = timedelta(seconds=30)
+MAX_INTERVAL = timedelta(minutes=15)
+
+
+def test_stretch_while_stable():
+    """Test interval grows up to maximum while state is stable."""
+    scheduler = AdaptiveUpdateInterval(MIN_INTERVAL, MAX_INTERVAL)
+
+    intervals = [scheduler.next() for _ in range(100)]
+
+    assert intervals[:3] == [
+        timedelta(minutes=1),
+        timedelta(minutes=2),
+        timedelta(minutes=4),
+    ]
+    assert intervals == sorted(intervals)
+    assert intervals[-1] == MAX_INTERVAL
+
+
+def test_align_with_cache_expiry():
+    """Test update is scheduled at cache expiration but not below minimum."""
+    scheduler = AdaptiveUpdateInterval(MIN_INTERVAL, MAX_INTERVAL)
+    for _ in range(8):
+        scheduler.next()
+
+    assert scheduler.next(expires_in=timedelta(minutes=3)) == timedelta(minutes=3)
+    assert scheduler.next(expires_in=timedelta(seconds=5)) == MIN_INTERVAL
+    assert scheduler.next(expires_in=timedelta(hours=1)) == MAX_INTERVAL
+
+
+def test_backoff_after_failures():
+    """Test jittered exponential backoff after failures."""
+    scheduler = AdaptiveUpdateInterval(MIN_INTERVAL, MAX_INTERVAL)
+    for _ in range(8):
+        scheduler.next()
+
+    for attempt in range(8):
+        interval = scheduler.next(failed=True)
+        expected = min(MIN_INTERVAL * 2**attempt, MAX_INTERVAL)
+        assert MIN_INTERVAL <= interval <= MAX_INTERVAL
+        assert expected * 0.8 <= interval <= expected * 1.2
+
+    # Success after failures starts stretching from minimum again
+    assert scheduler.next() == timedelta(minutes=1)
+
+
+def test_recheck_after_change():
+    """Test fast recheck after state change."""
+    scheduler = AdaptiveUpdateInterval(MIN_INTERVAL, MAX_INTERVAL)
+    for _ in range(8):
+        scheduler.next()
+
+    assert MIN_INTERVAL <= scheduler.next(changed=True) <= MIN_INTERVAL * 1.2
+    assert scheduler.next() == timedelta(minutes=1)
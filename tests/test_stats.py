@@ -0,0 +1,30 @@
+"""Test tor_check rolling statistics."""
+from custom_components.tor_check.stats import RollingStats
+
+
+def test_percentiles():
+    """Test nearest-rank percentiles."""
+    stats = RollingStats()
+    assert stats.percentile(50) is None
+    assert stats.last is None
+
+    for value in range(100, 0, -1):
+        stats.add(value)
+
+    assert stats.percentile(50) == 50
+    assert stats.percentile(95) == 95
+    assert stats.percentile(99) == 99
+    assert stats.percentile(0) == 1
+    assert stats.last == 1
+
+
+def test_bounded_window():
+    """Test only the latest samples are kept."""
+    stats = RollingStats(10)
+
+    for value in range(100_000):
+        stats.add(value)
+
+    assert len(stats) == 10
+    assert list(stats) == list(range(99_990, 100_000))
+    assert stats.percentile(50) == 99_994